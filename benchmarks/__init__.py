@@ -0,0 +1,18 @@
+# benchmarks
+# Micro-benchmarks of the drifter client and statistics
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 21:40:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: __init__.py [] benjamin@bengfort.com $
+
+"""
+Micro-benchmarks of the drifter client and statistics.
+
+Run a benchmark as a module from the project root, e.g.:
+
+    $ python -m benchmarks.templates
+"""
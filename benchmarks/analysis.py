@@ -0,0 +1,363 @@
+# benchmarks.analysis
+# Time and peak memory of the analysis pipeline at large sample counts
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 00:18:36 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: analysis.py [] benjamin@bengfort.com $
+
+"""
+Time and peak memory of the analysis pipeline at large sample counts.
+
+Generates synthetic results modelled on the fixtures (three endpoints
+with lognormal latencies around half a second, a slow tail and a few
+timeouts) and measures every operation of the pipeline on them:
+
+    statistics  TimeSeries.statistics
+    pprint      TimeSeries.pprint
+    tabelize    TimeSeries.tabelize
+    load        TimeSeries.load of the JSON dump
+    read        drifter.store.read of the binary results
+    chart       chart_times rendered to a PNG
+
+The peak memory of an operation is the growth of the resident set high
+water mark (VmHWM, reset before every operation on Linux) over the
+resident set before it. Every operation runs in a forked child so that
+memory freed (but kept by the interpreter) by one operation does not
+hide the allocations of the next.
+
+Results can be saved as a baseline and later runs compared against it;
+slower or larger operations are reported and the run exits non-zero.
+
+    $ python -m benchmarks.analysis -s 100000 1000000 --save baseline.json
+    $ python -m benchmarks.analysis -s 100000 1000000 --baseline baseline.json
+
+Seconds depend on the machine, so every run also times a fixed reference
+workload (sorting, percentiles and JSON encoding of lognormal samples)
+and times are compared as ratios to it: the baseline seconds are scaled
+by how much faster or slower the reference ran than when the baseline
+was saved. A baseline without a reference is compared in absolute
+seconds, which only holds on the machine that saved it. Peak memory is
+compared as is; regenerate the baseline with --save when numpy or
+matplotlib change.
+
+Samples are counted over all three endpoints; 10^7 samples need a few GB
+and 10^8 tens of GB (for the JSON load and the chart in particular).
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import matplotlib
+matplotlib.use('Agg')
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import numpy as np
+import matplotlib.pyplot as plt
+
+from functools import partial
+from collections import OrderedDict
+from drifter.store import save, read
+from drifter.chart import chart_times
+from drifter.stats import TimeSeries, Records, RECORD, ERRORS
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Median latency (ms) and body size (bytes) of the fixture endpoints
+ENDPOINTS  = OrderedDict([
+    ('GET /categories', (480.0, 61000)),
+    ('GET /merchants', (528.0, 118000)),
+    ('GET /sizes', (212.0, 7400)),
+])
+
+OPERATIONS = ('statistics', 'pprint', 'tabelize', 'load', 'read', 'chart')
+SIZES      = (100000, 1000000)
+
+# The in-run reference workload that times are scaled by
+REFERENCE  = 'reference'
+
+##########################################################################
+## Synthetic data
+##########################################################################
+
+def synthetic(samples, seed=42, tail=0.01, timeouts=0.001, rate=50.0):
+    """
+    Returns a TimeSeries of samples records spread over the fixture
+    endpoints: lognormal latencies around each endpoint's median with a
+    fraction of the requests in a slow tail and a fraction timing out,
+    sent at rate requests per second.
+    """
+    random = np.random.RandomState(seed)
+    series = TimeSeries()
+    share  = samples // len(ENDPOINTS)
+
+    for idx, (label, (median, size)) in enumerate(ENDPOINTS.items()):
+        count   = share + (samples % len(ENDPOINTS) if idx == 0 else 0)
+        records = np.zeros(count, dtype=RECORD)
+        records['start']   = 1.4e9 + np.cumsum(random.exponential(1.0 / rate, count))
+        records['latency'] = random.lognormal(np.log(median), 0.05, count)
+        records['status']  = 200
+        records['bytes']   = random.normal(size, size * 0.01, count)
+
+        slow = random.random_sample(count) < tail
+        records['latency'][slow] *= random.uniform(1.5, 4.0, slow.sum())
+
+        failed = random.random_sample(count) < timeouts
+        records['latency'][failed] = 30000.0
+        records['status'][failed]  = 0
+        records['bytes'][failed]   = 0
+        records['error'][failed]   = ERRORS.index('timeout')
+
+        series.data[label] = Records.wrap(records)
+        series.failures[label]['timeout'] = int(failed.sum())
+        series.elapsed[label] = records['start'][-1] - records['start'][0]
+    return series
+
+##########################################################################
+## Measurement
+##########################################################################
+
+def memory(field):
+    """
+    Returns a field of /proc/self/status in bytes (None if unavailable)
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except IOError:
+        return None
+
+def reset_peak():
+    """
+    Resets the resident set high water mark if the kernel allows it
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as refs:
+            refs.write('5')
+        return True
+    except IOError:
+        return False
+
+def measure(func):
+    """
+    Calls func and returns the seconds it took and the growth in bytes of
+    the peak resident set while it ran.
+    """
+    gc.collect()
+    exact  = reset_peak()
+    before = memory('VmRSS') if exact else memory('VmHWM')
+    if before is None:
+        # ru_maxrss is in kilobytes on Linux
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    started = time.time()
+    func()
+    elapsed = time.time() - started
+
+    after = memory('VmHWM')
+    if after is None:
+        after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return elapsed, max(after - before, 0)
+
+def isolated(func):
+    """
+    Calls func in a forked child (where possible) and returns its result,
+    which must be JSON serializable.
+    """
+    if not hasattr(os, 'fork'):
+        return func()
+
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        try:
+            data = json.dumps(func())
+        except BaseException as e:
+            data = json.dumps({'error': repr(e)})
+        with os.fdopen(wfd, 'w') as pipe:
+            pipe.write(data)
+        os._exit(0)
+
+    os.close(wfd)
+    with os.fdopen(rfd) as pipe:
+        data = json.loads(pipe.read())
+    os.waitpid(pid, 0)
+    if isinstance(data, dict) and 'error' in data:
+        raise RuntimeError("Benchmark failed: %s" % data['error'])
+    return data
+
+def reference(samples=1000000, seed=42):
+    """
+    A fixed workload, mixing numpy and interpreter time like the pipeline,
+    that every run times to calibrate the speed of the machine.
+    """
+    values = np.random.RandomState(seed).lognormal(5, 1, samples)
+    np.sort(values)
+    np.percentile(values, [50, 90, 99, 99.9])
+    json.dumps(values[:samples // 10].tolist())
+
+def operations(series, workdir):
+    """
+    Returns the operations to benchmark on the series by name, writing the
+    files they read into the workdir.
+    """
+    dump   = os.path.join(workdir, 'results.json')
+    binary = os.path.join(workdir, 'results.bin')
+    image  = os.path.join(workdir, 'results.png')
+
+    def write():
+        with open(dump, 'w') as f:
+            series.dump(f)
+        save(series, binary)
+    isolated(write)
+
+    def load():
+        with open(dump) as f:
+            TimeSeries.load(f)
+
+    def read_binary():
+        loaded = read(binary)
+        for label in loaded:
+            loaded.latencies(label).sum()
+
+    def chart():
+        chart_times(series, title="benchmark", saveto=image)
+        plt.close('all')
+
+    return OrderedDict([
+        ('statistics', series.statistics),
+        ('pprint', series.pprint),
+        ('tabelize', series.tabelize),
+        ('load', load),
+        ('read', read_binary),
+        ('chart', chart),
+    ])
+
+def benchmark(sizes=SIZES, names=OPERATIONS, repeat=1, stream=sys.stdout):
+    """
+    Runs the named operations at each sample count and returns a list of
+    results: the operation, samples, best seconds of the repeats and peak
+    memory growth in bytes.
+    """
+    results = []
+    stream.write("%-12s %12s %12s %12s\n" % ("operation", "samples", "seconds", "peak MB"))
+
+    # At least three repeats of the reference so one slow run does not skew it
+    runs = [isolated(partial(measure, reference)) for _ in xrange(max(repeat, 3))]
+    results.append(OrderedDict([
+        ('operation', REFERENCE), ('samples', 0),
+        ('seconds', min(run[0] for run in runs)), ('memory', max(run[1] for run in runs)),
+    ]))
+    stream.write("%-12s %12i %12.3f %12.1f\n" % (REFERENCE, 0, results[0]['seconds'], results[0]['memory'] / 1048576.0))
+
+    for samples in sizes:
+        workdir = tempfile.mkdtemp(prefix='drifter-bench-')
+        try:
+            series = synthetic(samples)
+            funcs  = operations(series, workdir)
+            for name in names:
+                runs    = [isolated(partial(measure, funcs[name])) for _ in xrange(repeat)]
+                seconds = min(run[0] for run in runs)
+                peak    = max(run[1] for run in runs)
+                results.append(OrderedDict([
+                    ('operation', name), ('samples', samples),
+                    ('seconds', seconds), ('memory', peak),
+                ]))
+                stream.write("%-12s %12i %12.3f %12.1f\n" % (name, samples, seconds, peak / 1048576.0))
+                stream.flush()
+        finally:
+            shutil.rmtree(workdir)
+    return results
+
+##########################################################################
+## Baselines
+##########################################################################
+
+def speedup(results, baseline):
+    """
+    Returns how many times longer the reference workload took in the
+    results than in the baseline, or None if either lacks it.
+    """
+    times = []
+    for items in (results, baseline):
+        found = [item['seconds'] for item in items if item['operation'] == REFERENCE]
+        if not found or found[0] <= 0: return None
+        times.append(found[0])
+    return times[0] / times[1]
+
+def regressions(results, baseline, threshold=0.25, floor=(0.05, 1048576)):
+    """
+    Compares results with a baseline and returns (operation, samples,
+    metric, baseline, value) for every operation that took more time or
+    memory than the baseline by more than the threshold (a fraction).
+    Baseline seconds are first scaled by the reference (see speedup), when
+    both have one. Differences below the floor (seconds, bytes) are noise
+    and ignored.
+    """
+    scale = speedup(results, baseline) or 1.0
+    index = dict(((item['operation'], item['samples']), item) for item in baseline)
+    found = []
+    for item in results:
+        base = index.get((item['operation'], item['samples']))
+        if base is None or item['operation'] == REFERENCE: continue
+        expected = {'seconds': base['seconds'] * scale, 'memory': base['memory']}
+        for metric, minimum in zip(('seconds', 'memory'), floor):
+            if item[metric] - expected[metric] < minimum: continue
+            if item[metric] > expected[metric] * (1 + threshold):
+                found.append((item['operation'], item['samples'], metric, expected[metric], item[metric]))
+    return found
+
+def main(args):
+    names   = args.operations or OPERATIONS
+    results = benchmark(args.sizes, names, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        scale = speedup(results, baseline)
+
+        print
+        if scale is None:
+            print "Warning: %s has no reference timing; comparing absolute seconds, " \
+                  "which only holds on the machine that saved it" % args.baseline
+        else:
+            print "Reference ran %0.2fx the baseline time; baseline seconds are scaled to match" % scale
+        for operation, samples, metric, before, after in found:
+            print "REGRESSION %s at %i samples: %s %0.3f -> %0.3f" % (
+                operation, samples, metric, before, after
+            )
+        if found: return 1
+        print "No regressions against %s" % args.baseline
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the stats and charting pipeline")
+    parser.add_argument('-s', '--sizes', default=SIZES, type=int, nargs='+', help='Sample counts to benchmark.')
+    parser.add_argument('-O', '--operations', default=None, nargs='+', choices=OPERATIONS, help='Operations to benchmark (default all).')
+    parser.add_argument('-r', '--repeat', default=1, type=int, help='Repeats of each operation (best time is kept).')
+    parser.add_argument('--save', default=None, help='Save the results as a baseline JSON file.')
+    parser.add_argument('--baseline', default=None, help='Report regressions against a baseline JSON file.')
+    parser.add_argument('--threshold', default=0.25, type=float, help='Fraction slower or larger that is a regression.')
+    sys.exit(main(parser.parse_args()))
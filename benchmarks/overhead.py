@@ -0,0 +1,105 @@
+# benchmarks.overhead
+# How much drifter itself adds to the latencies it records
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 23:41:19 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: overhead.py [] benjamin@bengfort.com $
+
+"""
+How much drifter itself adds to the latencies it records.
+
+Runs the Runner against a local MockServer whose service time is known:
+
+    overhead  closed-loop latency minus the injected latency, i.e. the
+              cost of drifter, requests and the loopback round trip
+    max rate  requests per second with no injected latency, by concurrency
+    accuracy  open-loop runs at a target rate with a constant injected
+              latency: the achieved rate and the error of the recorded
+              latencies against the injected one
+
+    $ python -m benchmarks.overhead [-n 2000] [--size 2048]
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import argparse
+import numpy as np
+
+from drifter.runner import Runner
+from drifter.mock import MockServer, DEFAULT_SIZE
+
+##########################################################################
+## Benchmarks
+##########################################################################
+
+def run(server, runs, **kwargs):
+    """
+    Sends runs requests to the sizes endpoint of the server and returns
+    the latencies in milliseconds and the seconds the run took.
+    """
+    runner = Runner(runs, api_root=server.api_root, quiet=True, **kwargs)
+    try:
+        _, elapsed = runner.request('sizes')
+    finally:
+        runner.close()
+    return np.asarray(runner.results['GET /sizes']), elapsed
+
+def overhead(runs, size, latencies=(0.0, 0.005, 0.02)):
+    print "%-24s %10s %10s %10s" % ("overhead (ms)", "p50", "p99", "max")
+    for latency in latencies:
+        server = MockServer(size=size, latency=latency).start()
+        try:
+            values, _ = run(server, runs)
+        finally:
+            server.stop()
+        values = values - latency * 1000
+        print "%-24s %10.3f %10.3f %10.3f" % (
+            "injected %0.0f ms" % (latency * 1000),
+            np.percentile(values, 50), np.percentile(values, 99), values.max()
+        )
+
+def max_rate(runs, size, concurrencies=(1, 4, 16)):
+    print "%-24s %10s %10s" % ("max rate", "req/sec", "p99 (ms)")
+    server = MockServer(size=size).start()
+    try:
+        for concurrency in concurrencies:
+            values, elapsed = run(server, runs, concurrency=concurrency)
+            print "%-24s %10.0f %10.3f" % (
+                "concurrency %i" % concurrency, len(values) / elapsed, np.percentile(values, 99)
+            )
+    finally:
+        server.stop()
+
+def accuracy(runs, size, rates=(100, 500), latency=0.005):
+    print "%-24s %10s %10s %10s" % ("timing error (ms)", "req/sec", "p50", "p99")
+    server = MockServer(size=size, latency=latency).start()
+    try:
+        for rate in rates:
+            values, elapsed = run(server, runs, rate=rate, concurrency=16)
+            errors = values - latency * 1000
+            print "%-24s %10.0f %10.3f %10.3f" % (
+                "target %i req/sec" % rate, len(values) / elapsed,
+                np.percentile(errors, 50), np.percentile(errors, 99)
+            )
+    finally:
+        server.stop()
+
+def main(runs, size):
+    overhead(runs, size)
+    print
+    max_rate(runs, size)
+    print
+    accuracy(runs, size)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark drifter against a local mock API")
+    parser.add_argument('-n', default=2000, dest='runs', type=int, help='Requests per case.')
+    parser.add_argument('--size', default=DEFAULT_SIZE, type=int, help='Bytes of the mock documents.')
+    args = parser.parse_args()
+    main(args.runs, args.size)
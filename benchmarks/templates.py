@@ -0,0 +1,118 @@
+# benchmarks.templates
+# How many requests per second one core can prepare
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 21:42:55 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: templates.py [] benjamin@bengfort.com $
+
+"""
+How many requests per second one core can prepare.
+
+Compares building every request from scratch (as Drifter.execute and
+build_payload did) with precompiled RequestTemplates, both for a static
+GET and for a POST whose path, query and body take per-request variables,
+and measures the cost of requests preparing the result for the wire.
+
+    $ python -m benchmarks.templates [-n 100000]
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import time
+import random
+import argparse
+import requests
+
+from drifter.api import Drifter
+from drifter.template import RequestTemplate
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+API_ROOT  = "https://local.api.cobrain.com"
+API_KEY   = "0123456789abcdef"
+VARIABLES = {'format': ['light', 'normal', 'full'], 'user': ['me', 'ben', 'allen']}
+
+STATIC    = {'name': 'GET /sizes', 'path': 'sizes', 'params': {'format': 'light'}}
+DYNAMIC   = {
+    'name': 'POST /items', 'method': 'POST', 'path': 'users/{user}/items',
+    'params': {'format': '{format}'}, 'body': {'items': [{'product': 'p-{user}', 'count': 1}]},
+}
+
+##########################################################################
+## Benchmarks
+##########################################################################
+
+def from_scratch(drifter, request):
+    """
+    Returns a function that builds the request the way Drifter.execute
+    does: joining the endpoint and building headers and payload each time.
+    """
+    def prepare():
+        context = dict((key, random.choice(val)) for key, val in VARIABLES.items())
+        path    = request['path'].format(**context)
+        params  = dict((key, val.format(**context)) for key, val in request['params'].items())
+        url     = drifter.build_endpoint(path)
+        headers = drifter.build_headers()
+        body    = None
+        if 'body' in request:
+            body = json.loads(json.dumps(request['body']).replace('{user}', context['user']))
+            headers, body = drifter.build_payload(body, headers)
+        return url, params, headers, body
+    return prepare
+
+def compiled(request):
+    """
+    Returns the prepare method of a precompiled template of the request
+    """
+    return RequestTemplate(request, API_ROOT, API_KEY, VARIABLES).prepare
+
+def wire(session, prepare, method):
+    """
+    Returns a function that also has requests prepare the request for the
+    wire, as Session.request does before sending it.
+    """
+    def prepared():
+        result  = prepare()
+        url, headers, body = result[0], result[-2], result[-1]
+        request = requests.Request(method, url, headers=headers, data=body)
+        return session.prepare_request(request)
+    return prepared
+
+def measure(func, runs):
+    """
+    Returns the number of calls of func per second
+    """
+    started = time.time()
+    for _ in xrange(runs):
+        func()
+    return runs / (time.time() - started)
+
+def main(runs):
+    drifter = Drifter(API_ROOT, API_KEY)
+    cases   = [
+        ("GET from scratch", from_scratch(drifter, STATIC)),
+        ("GET template", compiled(STATIC)),
+        ("POST from scratch", from_scratch(drifter, DYNAMIC)),
+        ("POST template", compiled(DYNAMIC)),
+        ("GET template + requests", wire(drifter.session, compiled(STATIC), 'GET')),
+        ("POST template + requests", wire(drifter.session, compiled(DYNAMIC), 'POST')),
+    ]
+
+    print "%-28s %16s" % ("prepared on one core", "requests/sec")
+    for name, func in cases:
+        func()
+        print "%-28s %16.0f" % (name, measure(func, runs))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark request preparation per core")
+    parser.add_argument('-n', default=100000, dest='runs', type=int, help='Requests to prepare per case.')
+    main(parser.parse_args().runs)
@@ -0,0 +1,299 @@
+# drifter.adaptive
+# Stopping rules that end a run when its estimates have converged
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 03:31:09 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: adaptive.py [] benjamin@bengfort.com $
+
+"""
+Stopping rules that end a run when its estimates have converged.
+
+A fixed number of runs wastes time on stable endpoints and is too few to
+pin down the tail of noisy ones. With a StoppingRule the runner keeps
+sending requests until the confidence interval of every chosen percentile
+(and optionally the mean) of every label is within a tolerance of the
+estimate, e.g. p99 within 2% at 95% confidence, or until a budget of
+requests or seconds is spent.
+
+The estimates are online: successful latencies are recorded in batches
+into a constant memory Histogram (which keeps running sums for the mean),
+so checking for convergence costs the same however long the run is.
+The interval of a percentile is distribution free: with n samples the
+rank of the q-th quantile is binomial with mean nq and variance
+nq(1 - q), so the values at ranks nq -/+ z sqrt(nq(1 - q)) bound it.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import math
+import time
+import threading
+
+from collections import OrderedDict
+from drifter.histogram import Histogram
+from drifter.stats import pkey
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def z_score(confidence):
+    """
+    Returns the two-sided standard normal critical value of a confidence
+    level (e.g. 1.96 for 0.95), found by bisection of the tail area.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+
+    tail = (1.0 - confidence) / 2.0
+    low, high = 0.0, 40.0
+    for _ in xrange(100):
+        middle = (low + high) / 2.0
+        if 0.5 * math.erfc(middle / math.sqrt(2)) > tail:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2.0
+
+def required(q, z):
+    """
+    Returns the fewest samples n for which the confidence interval of the
+    q-th percentile (see Estimator.interval) falls within the data, i.e.
+    nq - z sqrt(nq(1 - q)) >= 1 and nq + z sqrt(nq(1 - q)) + 1 <= n.
+    """
+    p = q / 100.0
+    if not 0 < p < 1:
+        raise ValueError("Percentiles must be between 0 and 100")
+
+    # Both bounds are quadratic in sqrt(n), e.g. p x^2 - z sqrt(p(1-p)) x - 1 >= 0
+    spread = z * math.sqrt(p * (1 - p))
+    roots  = [(spread + math.sqrt(spread ** 2 + 4 * side)) / (2 * side) for side in (p, 1 - p)]
+    return int(math.ceil(max(roots) ** 2))
+
+##########################################################################
+## Online Estimators
+##########################################################################
+
+class Estimator(object):
+    """
+    Online estimates of the percentiles and mean of a series of latencies
+    with their confidence intervals.
+    """
+
+    def __init__(self, precision=3):
+        self.histogram = Histogram(precision)
+
+    def record_many(self, values):
+        self.histogram.record_many(values)
+
+    @property
+    def count(self):
+        return self.histogram.count
+
+    def interval(self, q, z):
+        """
+        Returns the estimate of the q-th percentile and the bounds of its
+        confidence interval, or None for the bounds if there are too few
+        samples for the interval to fall within the data.
+        """
+        n     = self.count
+        p     = q / 100.0
+        value = self.histogram.percentile(q)
+        if not n:
+            return value, None, None
+
+        spread = z * math.sqrt(n * p * (1 - p))
+        lower  = n * p - spread
+        upper  = n * p + spread + 1
+        if lower < 1 or upper > n:
+            return value, None, None
+
+        low, high = self.histogram.percentile([100.0 * lower / n, 100.0 * upper / n])
+        return value, low, high
+
+    def mean_interval(self, z):
+        """
+        Returns the mean and the bounds of its normal confidence interval
+        """
+        n = self.count
+        if n < 2:
+            return self.histogram.mean() if n else float('nan'), None, None
+        mean = self.histogram.mean()
+        half = z * self.histogram.stddev() / math.sqrt(n)
+        return mean, mean - half, mean + half
+
+##########################################################################
+## Stopping Rule
+##########################################################################
+
+class StoppingRule(object):
+    """
+    Decides when an adaptive run is done: when every target (percentiles,
+    and 'mean' if given) of every label has a confidence interval whose
+    half width is within tolerance (a fraction) of its estimate, after at
+    least minimum successful requests per label; or when the runner has
+    sent its budget of requests or the budget of seconds has passed.
+    Targets are percentiles (0-100) or 'mean'.
+    """
+
+    def __init__(self, targets=(99,), tolerance=0.02, confidence=0.95, minimum=100,
+                 budget=None, precision=3):
+        self.targets    = tuple(target if target == 'mean' else float(target) for target in targets)
+        self.tolerance  = tolerance
+        self.confidence = confidence
+        self.z          = z_score(confidence)
+        self.minimum    = minimum
+        self.budget     = budget
+        self.precision  = precision
+        self.estimators = OrderedDict()
+        self.pending    = {}
+        self.lock       = threading.Lock()
+        self.started    = None
+        self.reason     = None
+        self.final      = None
+
+    def track(self, labels):
+        """
+        Starts estimating the series of the labels
+        """
+        for label in labels:
+            self.estimators.setdefault(label, Estimator(self.precision))
+            self.pending.setdefault(label, [])
+        if self.started is None:
+            self.started = time.time()
+
+    def required(self):
+        """
+        Returns the fewest successful requests per label with which every
+        target can converge (at least minimum)
+        """
+        counts = [self.minimum, 2]
+        counts.extend(required(target, self.z) for target in self.targets if target != 'mean')
+        return max(counts)
+
+    def record(self, label, latency):
+        """
+        Queues a successful latency of a tracked label (in any thread)
+        """
+        if label in self.pending:
+            with self.lock:
+                self.pending[label].append(latency)
+
+    def update(self):
+        """
+        Records the queued latencies into the estimators
+        """
+        with self.lock:
+            batches = [(label, values) for label, values in self.pending.items() if values]
+            for label, _ in batches:
+                self.pending[label] = []
+        for label, values in batches:
+            self.estimators[label].record_many(values)
+
+    def intervals(self, update=True):
+        """
+        Returns the estimate, bounds and relative half width of every
+        target of every label, by label and target (after recording the
+        queued latencies, if update).
+        """
+        if update: self.update()
+        result = OrderedDict()
+        for label, estimator in self.estimators.items():
+            result[label] = OrderedDict()
+            for target in self.targets:
+                if target == 'mean':
+                    value, low, high = estimator.mean_interval(self.z)
+                else:
+                    value, low, high = estimator.interval(target, self.z)
+                width = (high - low) / 2.0 / value if low is not None and value > 0 else None
+                result[label]['mean' if target == 'mean' else pkey(target)] = OrderedDict([
+                    ('estimate', value), ('lower', low), ('upper', high), ('width', width),
+                ])
+        return result
+
+    def converged(self):
+        """
+        Returns True if every target of every label is within tolerance
+        """
+        if any(estimator.count < self.minimum for estimator in self.estimators.values()):
+            self.update()
+            if any(estimator.count < self.minimum for estimator in self.estimators.values()):
+                return False
+
+        for targets in self.intervals().values():
+            for stats in targets.values():
+                if stats['width'] is None or stats['width'] > self.tolerance:
+                    return False
+        return True
+
+    def done(self, sent, runs=None):
+        """
+        Returns the reason the run should stop after sent requests (with a
+        budget of runs requests), or None to keep going.
+        """
+        if self.converged():
+            self.reason = 'converged'
+        elif runs is not None and sent >= runs:
+            self.reason = 'requests'
+        elif self.budget is not None and time.time() - self.started >= self.budget:
+            self.reason = 'seconds'
+        else:
+            return None
+
+        # Requests still in flight finish after the decision; keep the
+        # counts and intervals the run stopped on
+        self.final = self.snapshot(update=self.reason != 'converged')
+        return self.reason
+
+    def snapshot(self, update=True):
+        """
+        Returns the successful requests and intervals of every label
+        """
+        intervals = self.intervals(update)
+        return dict(
+            (label, (estimator.count, intervals[label]))
+            for label, estimator in self.estimators.items()
+        )
+
+    def summary(self, label):
+        """
+        Returns the reason the run stopped, the successful requests of the
+        label and its intervals when it stopped, suitable for results
+        metadata.
+        """
+        count, intervals = (self.final or self.snapshot())[label]
+        return OrderedDict([
+            ('reason', self.reason),
+            ('tolerance', self.tolerance),
+            ('confidence', self.confidence),
+            ('count', count),
+            ('intervals', intervals),
+        ])
+
+##########################################################################
+## Formatting
+##########################################################################
+
+def format_convergence(convergence):
+    """
+    Formats the convergence metadata of a run (the summaries by label) as
+    one line per label of why it stopped and its final intervals.
+    """
+    output = []
+    for label, summary in convergence.items():
+        targets = []
+        for key, stats in summary['intervals'].items():
+            if stats['width'] is None:
+                targets.append("%s %0.3f ms (unresolved)" % (key, stats['estimate']))
+            else:
+                targets.append("%s %0.3f ms +/- %0.1f%%" % (key, stats['estimate'], stats['width'] * 100))
+        output.append("%s: stopped (%s) after %i successful requests; %s" % (
+            label, summary['reason'], summary['count'], ", ".join(targets)
+        ))
+    return "\n".join(output)
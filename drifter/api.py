@@ -18,64 +18,278 @@ Executes queries to the Phoenix-API on behalf of the Drifter service.
 ##########################################################################
 
 import json
+import time
+import socket
 import requests
+import threading
 
 from drifter import settings
+from functools import partial
+from collections import defaultdict
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+from requests.packages.urllib3.poolmanager import PoolManager
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+CHUNK_SIZE = 65536
+
+# Per-thread phase timings of the request currently being sent
+PHASES     = threading.local()
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def consume(response, keep=False, chunk_size=CHUNK_SIZE):
+    """
+    Reads the body of a streamed response in chunks, discarding it unless
+    keep is True, and returns the number of bytes read and the body (or
+    None). Reading the body releases the connection back to the pool.
+    """
+    nbytes = 0
+    chunks = [] if keep else None
+    for chunk in response.iter_content(chunk_size):
+        nbytes += len(chunk)
+        if keep: chunks.append(chunk)
+    return nbytes, "".join(chunks) if keep else None
+
+def reset_phases():
+    """
+    Starts recording the phase timings of a request in this thread
+    """
+    PHASES.timings = defaultdict(float)
+
+def record_phase(phase, seconds):
+    """
+    Adds seconds to a phase of the request being recorded in this thread
+    """
+    timings = getattr(PHASES, 'timings', None)
+    if timings is not None:
+        timings[phase] += seconds
+
+def get_phases():
+    """
+    Returns the phase timings recorded in this thread since the last reset:
+    the seconds spent in dns, connect and tls, and the timestamp at which
+    the response headers were received.
+    """
+    return dict(getattr(PHASES, 'timings', None) or {})
+
+##########################################################################
+## Timed Connections
+##########################################################################
+
+class TimedConnectionMixin(object):
+    """
+    Records the DNS lookup, TCP connect and TLS handshake times of new
+    connections, and when the response headers arrive, into the phase
+    timings of the current thread. Reused connections record no setup.
+    """
+
+    def _new_conn(self):
+        host    = getattr(self, '_dns_host', self.host)
+        started = time.time()
+        try:
+            address = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except socket.error:
+            # Let urllib3 raise its own error for the failed lookup
+            return super(TimedConnectionMixin, self)._new_conn()
+
+        resolved = time.time()
+        if hasattr(self, '_dns_host'):
+            self._dns_host = address
+        try:
+            conn = super(TimedConnectionMixin, self)._new_conn()
+        finally:
+            if hasattr(self, '_dns_host'):
+                self._dns_host = host
+
+        record_phase('dns', resolved - started)
+        record_phase('connect', time.time() - resolved)
+        return conn
+
+    def getresponse(self, *args, **kwargs):
+        response = super(TimedConnectionMixin, self).getresponse(*args, **kwargs)
+        record_phase('response', time.time())
+        return response
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        started = time.time()
+        before  = get_phases()
+        super(TimedHTTPSConnection, self).connect()
+
+        # Whatever connect spent outside of _new_conn was the handshake
+        after   = get_phases()
+        setup   = sum(after.get(key, 0) - before.get(key, 0) for key in ('dns', 'connect'))
+        record_phase('tls', time.time() - started - setup)
+
+# The timed connection class of the pools of each scheme
+TIMED_CONNECTIONS = {
+    'http': TimedHTTPConnection,
+    'https': TimedHTTPSConnection,
+}
+
+class TimedPoolManager(PoolManager):
+    """
+    A PoolManager whose new connection pools open timed connections.
+
+    Older urllib3 releases (e.g. the 1.8 bundled with requests 2.3.0) pick
+    the class of a new pool from a module level dictionary rather than the
+    manager, so the pools are left as urllib3 makes them and only their
+    connection class is replaced, which every release reads per pool.
+    """
+
+    def _new_pool(self, scheme, *args, **kwargs):
+        pool = super(TimedPoolManager, self)._new_pool(scheme, *args, **kwargs)
+        pool.ConnectionCls = TIMED_CONNECTIONS.get(scheme, pool.ConnectionCls)
+        return pool
+
+class TimedAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter whose connection pools use timed connections.
+    """
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        # Kept by HTTPAdapter to rebuild the manager when unpickled
+        self._pool_connections = connections
+        self._pool_maxsize     = maxsize
+        self._pool_block       = block
+        self.poolmanager       = TimedPoolManager(num_pools=connections, maxsize=maxsize,
+                                                  block=block, **pool_kwargs)
 
 ##########################################################################
 ## Drifter Class
 ##########################################################################
 
 class Drifter(object):
+    """
+    Client for the Phoenix-API. By default requests are sent through a
+    pooled, keep-alive session so that connections (and TLS handshakes)
+    are reused between requests. Pass keepalive=False for "cold" mode
+    where every request asks the server to close its connection, so the
+    next request opens a fresh one, to measure the cost of connection
+    setup against the warm latency of the API itself.
+
+    Connections are timed: see get_phases for the DNS, connect and TLS
+    times and the arrival of the response headers of the last request.
+    """
+
+    def __init__(self, api_root=None, api_key=None, pool_size=None, keepalive=None):
+        self.api_root  = api_root or settings['api_root']
+        self.api_key   = api_key or settings['api_key']
+        self.pool_size = pool_size or settings['pool_size']
+        self.keepalive = settings['keepalive'] if keepalive is None else keepalive
+        self.session   = self.build_session()
+
+    @property
+    def client(self):
+        """
+        The object whose HTTP methods are called
+        """
+        return self.session
+
+    def build_session(self):
+        """
+        Constructs a keep-alive session whose connection pool holds at
+        least pool_size connections to the api_root host.
+        """
+        session = requests.Session()
+        adapter = TimedAdapter(pool_connections=self.pool_size,
+                               pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keepalive:
+            session.headers['Connection'] = 'close'
+        return session
 
-    def __init__(self, api_root=None, api_key=None):
-        self.api_root = api_root or settings['api_root']
-        self.api_key  = api_key or settings['api_key']
+    def close(self):
+        """
+        Closes any pooled connections held by the session.
+        """
+        self.session.close()
 
     def build_endpoint(self, *path):
         path = '/'.join(path)
         return "%s/%s" % (self.api_root, path)
 
-    def build_headers(self, headers={}):
+    def build_headers(self, headers=None):
         default = {
             'API-Key': self.api_key
         }
-        default.update(headers)
+        default.update(headers or {})
         return default
 
-    def build_payload(self, data, headers={}):
-        headers.update({'content-type': 'application/json'})
+    def build_payload(self, data, headers=None):
+        headers = dict(headers or {})
+        headers['content-type'] = 'application/json'
         payload = json.dumps(data)
         return headers, payload
 
     def execute(self, method, url, **kwargs):
+        # Return the response itself rather than the decoded JSON
+        raw = kwargs.pop('raw', False)
+
         # Set arguments to pass to requests
         kwargs['headers'] = self.build_headers(kwargs.pop('headers', {}))
         kwargs['verify']  = kwargs.get('verify', False)
         kwargs['timeout'] = kwargs.get('timeout', 30)
 
         response = method(url, **kwargs)
+        if raw:
+            response.raise_for_status()
+            return response
         if response.status_code == requests.codes.ok:
             return response.json()
         response.raise_for_status()
 
     def get(self, url, **kwargs):
-        return self.execute(requests.get, url, **kwargs)
+        return self.execute(self.client.get, url, **kwargs)
 
     def put(self, url, data, **kwargs):
         headers, payload  = self.build_payload(data)
         kwargs['headers'] = headers
         kwargs['data']    = payload
-        return self.execute(requests.put, url, **kwargs)
+        return self.execute(self.client.put, url, **kwargs)
 
     def post(self, url, data, **kwargs):
         headers, payload  = self.build_payload(data)
         kwargs['headers'] = headers
         kwargs['data']    = payload
-        return self.execute(requests.post, url, **kwargs)
+        return self.execute(self.client.post, url, **kwargs)
 
     def delete(self, url, **kwargs):
-        return self.execute(requests.delete, url, **kwargs)
+        return self.execute(self.client.delete, url, **kwargs)
+
+    def send(self, method, url, headers=None, data=None, **kwargs):
+        """
+        Sends a request that has already been prepared (e.g. by a
+        RequestTemplate) with its complete headers and serialized body,
+        and returns the response (raising for an error status).
+        """
+        kwargs.setdefault('verify', False)
+        kwargs.setdefault('timeout', 30)
+        response = self.client.request(method, url, headers=headers, data=data, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def request(self, method, url, data=None, **kwargs):
+        """
+        Sends a request with any HTTP method, with data (if not None) as
+        its JSON body.
+        """
+        if data is not None:
+            headers, payload  = self.build_payload(data, kwargs.pop('headers', {}))
+            kwargs['headers'] = headers
+            kwargs['data']    = payload
+        return self.execute(partial(self.client.request, method.upper()), url, **kwargs)
 
 if __name__ == '__main__':
     drifter  = Drifter()
@@ -0,0 +1,148 @@
+# drifter.cache
+# A client-side cache of response validators for conditional requests
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 01:48:22 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: cache.py [] benjamin@bengfort.com $
+
+"""
+A client-side cache of response validators for conditional requests.
+
+To measure how much HTTP caching could save, a runner with a
+ValidatorCache keeps the ETag and Last-Modified validators of every full
+(200) response, keyed by the method, URL and headers of its request, and
+replays later requests for the same resource with If-None-Match and
+If-Modified-Since. A server that supports them answers 304 Not Modified
+without a body; the runner records 304 and 200 latencies as separate
+series, with the body bytes every 304 saved as the bytes of its record.
+
+The cache holds at most capacity entries and evicts the least recently
+used; only validators and the size of the body are kept, not the body.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import threading
+
+from collections import OrderedDict
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Headers that make a request conditional, ignored in cache keys
+CONDITIONAL = ('if-none-match', 'if-modified-since')
+
+DEFAULT_CAPACITY = 1024
+
+##########################################################################
+## Validator Cache
+##########################################################################
+
+class Validators(object):
+    """
+    The validators of a cached response and the size of its body
+    """
+
+    __slots__ = ('etag', 'modified', 'nbytes')
+
+    def __init__(self, etag=None, modified=None, nbytes=0):
+        self.etag     = etag
+        self.modified = modified
+        self.nbytes   = nbytes
+
+    def headers(self):
+        """
+        Returns the conditional request headers for these validators
+        """
+        headers = {}
+        if self.etag: headers['If-None-Match'] = self.etag
+        if self.modified: headers['If-Modified-Since'] = self.modified
+        return headers
+
+class ValidatorCache(object):
+    """
+    A thread safe, bounded LRU cache of response validators by request.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("Validator cache capacity must be positive")
+        self.capacity  = capacity
+        self.entries   = OrderedDict()
+        self.lock      = threading.Lock()
+        self.evictions = 0
+
+    @staticmethod
+    def key(method, url, headers=None):
+        """
+        Returns the cache key of a request: its method, URL and headers
+        other than the conditional ones.
+        """
+        headers = frozenset((name.lower(), value) for name, value in (headers or {}).items()
+                            if name.lower() not in CONDITIONAL)
+        return (method.upper(), url, headers)
+
+    def get(self, key):
+        """
+        Returns the Validators of the key (marking it recently used) or None
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+            return entry
+
+    def put(self, key, validators):
+        """
+        Stores the validators of the key, evicting the least recently used
+        entry if the cache is full.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = validators
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def conditional(self, key, headers=None):
+        """
+        Returns the headers of the request with the conditional headers of
+        its cached validators (if any) and the validators.
+        """
+        validators = self.get(key)
+        if validators is None:
+            return headers, None
+        return dict(headers or {}, **validators.headers()), validators
+
+    def update(self, key, response, nbytes=None):
+        """
+        Stores the validators of a full response, if it has any. The size
+        of the body is the Content-Length unless nbytes is given.
+        """
+        etag     = response.headers.get('ETag')
+        modified = response.headers.get('Last-Modified')
+        if not etag and not modified:
+            return None
+
+        if nbytes is None:
+            nbytes = int(response.headers.get('Content-Length') or 0)
+        validators = Validators(etag, modified, nbytes)
+        self.put(key, validators)
+        return validators
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
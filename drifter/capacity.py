@@ -0,0 +1,274 @@
+# drifter.capacity
+# Searches for the most load an endpoint sustains within a latency SLO
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 04:26:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: capacity.py [] benjamin@bengfort.com $
+
+"""
+Searches for the most load an endpoint sustains within a latency SLO.
+
+A capacity search answers "how many requests per second can GET /merchants
+sustain while p99 stays under 300 ms": it drives the endpoint open-loop
+(see drifter.schedule) at a series of offered rates, one step of a fixed
+duration per rate, and checks every step against a service level
+objective, a percentile latency bound, an error rate bound and that the
+achieved throughput keeps up with the offered rate.
+
+The search either steps the rate up by a fixed increment until a step
+fails, or doubles it until a step fails and then bisects between the
+last passing and first failing rates down to the increment. The highest
+passing rate is the saturation point; every step is recorded under its
+own label ("GET /merchants @ 50 rps") so the results save and load like
+any other run, and the steps together form the throughput vs latency
+curve.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+from collections import OrderedDict
+from drifter.stats import pkey
+from drifter.schedule import Schedule
+from drifter.runner import LATE_FRACTION, in_flight
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+SEARCHES = ('step', 'binary')
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def capacity_label(name, rate):
+    """
+    Returns the label of a step of a capacity search, e.g. "GET /sizes @ 50 rps"
+    """
+    return "%s @ %g rps" % (name, rate)
+
+##########################################################################
+## Service Level Objective
+##########################################################################
+
+class SLO(object):
+    """
+    A service level objective: the percentile latency (ms) must not exceed
+    latency, the fraction of failed requests must not exceed errors and
+    the achieved throughput must be at least 1 - lag of the offered rate.
+    """
+
+    def __init__(self, percentile=99, latency=300.0, errors=0.01, lag=0.1):
+        self.percentile = float(percentile)
+        self.latency    = float(latency)
+        self.errors     = float(errors)
+        self.lag        = float(lag)
+
+    @property
+    def key(self):
+        return pkey(self.percentile)
+
+    def violations(self, point):
+        """
+        Returns a list of the ways a step of the search violated the SLO
+        """
+        found = []
+        if not point['count'] or point[self.key] > self.latency:
+            found.append("%s %0.3f ms > %0.3f ms" % (self.key, point[self.key], self.latency))
+        if point['error_rate'] > self.errors:
+            found.append("error rate %0.3f > %0.3f" % (point['error_rate'], self.errors))
+        if point['throughput'] < (1 - self.lag) * point['offered']:
+            found.append("throughput %0.3f < %0.3f rps offered" % (point['throughput'], point['offered']))
+        return found
+
+    def serialize(self):
+        return OrderedDict([
+            ('percentile', self.percentile), ('latency', self.latency),
+            ('errors', self.errors), ('lag', self.lag),
+        ])
+
+    def __str__(self):
+        return "%s < %g ms, errors < %g%%" % (self.key, self.latency, self.errors * 100)
+
+##########################################################################
+## Capacity Search
+##########################################################################
+
+class CapacitySearch(object):
+    """
+    Searches the offered rates of a request (a RequestConfiguration, a
+    dictionary or the name of a built in endpoint) from start up to
+    maximum requests per second with a Runner, which sends each step
+    open-loop for duration seconds (plus its ramp up and down).
+
+    Unless the runner's concurrency was given, every step has enough
+    workers to keep requests at the SLO latency in flight at its rate
+    (see drifter.runner.in_flight). A failing step in which requests
+    waited for one of fewer workers than that measured the client rather
+    than the endpoint: it is marked client bound instead of failed and the
+    search goes no higher.
+    """
+
+    def __init__(self, runner, request, slo=None, start=10.0, maximum=1000.0,
+                 step=None, search='step', duration=10.0):
+        if search not in SEARCHES:
+            raise ValueError("Unknown capacity search '%s'" % search)
+        if start <= 0 or maximum < start:
+            raise ValueError("Capacity searches need 0 < start <= maximum rate")
+
+        self.runner   = runner
+        self.request  = request
+        self.name     = runner.template(request).name
+        self.slo      = slo or SLO()
+        self.start    = float(start)
+        self.maximum  = float(maximum)
+        self.step     = float(step or start)
+        self.search   = search
+        self.duration = float(duration)
+        self.points   = OrderedDict()
+
+        if not runner.bounded:
+            runner.latency = self.slo.latency / 1000.0
+
+    def measure(self, rate):
+        """
+        Sends the request open-loop at the rate for one step, and returns
+        the offered and achieved rates, latency and errors of the step and
+        whether it met the SLO.
+        """
+        if rate in self.points:
+            return self.points[rate]
+
+        runner   = self.runner
+        label    = capacity_label(self.name, rate)
+        options  = dict(runner.schedule, duration=self.duration)
+        schedule = Schedule(rate, **options)
+        runner.rate, runner.schedule = rate, options
+        runner.request(self.request, label=label)
+
+        stats = runner.results.summary(label, (self.slo.percentile,))
+        total = stats['count'] + stats['timeouts'] + sum(
+            val for key, val in stats.items() if key.endswith('_errors')
+        )
+
+        point = OrderedDict([
+            ('label', label),
+            ('rate', rate),
+            ('offered', schedule.expected / schedule.length if schedule.length else rate),
+            ('throughput', stats.get('throughput', 0.0)),
+            ('count', stats['count']),
+            ('errors', total - stats['count']),
+            ('error_rate', float(total - stats['count']) / total if total else 0.0),
+            ('mean', stats.get('mean', float('nan'))),
+            ('p50', stats.get('median', float('nan'))),
+            (self.slo.key, stats.get(self.slo.key, float('nan'))),
+        ])
+        point['late'] = runner.late
+        point['violations'] = self.slo.violations(point)
+        point['passed'] = not point['violations']
+        if point['passed']:
+            point['status'] = 'ok'
+        elif runner.late > LATE_FRACTION and runner.workers() < in_flight(rate, self.slo.latency / 1000.0):
+            point['status'] = 'client bound'
+        else:
+            point['status'] = 'fail'
+        self.points[rate] = point
+        return point
+
+    def rates(self):
+        """
+        Measures the rates of the search in order and returns the highest
+        passing rate (None if even the start rate failed).
+        """
+        if self.search == 'step':
+            best, rate = None, self.start
+            while rate <= self.maximum:
+                if not self.measure(rate)['passed']: break
+                best, rate = rate, rate + self.step
+            return best
+
+        # Double until a step fails, then bisect down to the step
+        best, rate = None, self.start
+        while True:
+            if not self.measure(rate)['passed']: break
+            best = rate
+            if rate >= self.maximum: return best
+            rate = min(rate * 2, self.maximum)
+
+        failed = rate
+        while best is not None and failed - best > self.step:
+            rate = (best + failed) / 2.0
+            if self.measure(rate)['passed']:
+                best = rate
+            else:
+                failed = rate
+        return best
+
+    def run(self):
+        """
+        Runs the search and returns its summary: the SLO, the saturation
+        point (the highest passing step, or None), the lowest failing and
+        client bound steps and the throughput vs latency curve of every
+        step by rate.
+        """
+        best    = self.rates()
+        curve   = [self.points[rate] for rate in sorted(self.points)]
+        failing = [point for point in curve if point['status'] == 'fail']
+        bound   = [point for point in curve if point['status'] == 'client bound']
+        return OrderedDict([
+            ('endpoint', self.name),
+            ('search', self.search),
+            ('slo', self.slo.serialize()),
+            ('saturation', self.points[best] if best is not None else None),
+            ('limit', failing[0] if failing else None),
+            ('client_bound', bound[0] if bound else None),
+            ('curve', curve),
+        ])
+
+##########################################################################
+## Report
+##########################################################################
+
+def format_report(summary, title=None):
+    """
+    Formats the summary of a capacity search as a text table of the curve
+    followed by the saturation point.
+    """
+    slo    = SLO(**summary['slo'])
+    key    = slo.key
+    output = [title] if title else []
+    output.append("%10s %10s %10s %8s %10s %10s %10s  %s" % (
+        "rate", "offered", "achieved", "requests", "errors %", "p50", key, "slo"
+    ))
+    for point in summary['curve']:
+        output.append("%10g %10.3f %10.3f %8i %10.3f %10.3f %10.3f  %s" % (
+            point['rate'], point['offered'], point['throughput'], point['count'],
+            point['error_rate'] * 100, point['p50'], point[key],
+            "ok" if point['passed'] else "%s (%s)" % (
+                "FAIL" if point['status'] == 'fail' else "CLIENT BOUND",
+                "; ".join(point['violations'])
+            )
+        ))
+
+    output.append("")
+    best = summary['saturation']
+    if best is None:
+        output.append("No offered rate met the SLO (%s)" % slo)
+    else:
+        output.append("Saturation: %g rps offered, %0.3f rps achieved with %s %0.3f ms (SLO %s)" % (
+            best['rate'], best['throughput'], key, best[key], slo
+        ))
+        if summary['limit'] is None and summary['client_bound'] is None:
+            output.append("Every rate up to the maximum met the SLO; capacity may be higher")
+
+    bound = summary['client_bound']
+    if bound is not None:
+        output.append("Client bound at %g rps: %0.0f%% of requests waited for a worker; "
+                      "raise -c to measure higher rates" % (bound['rate'], bound['late'] * 100))
+    return "\n".join(output)
@@ -11,6 +11,15 @@
 
 """
 Does matplotlib charting for the Drifter module
+
+Charts are drawn in time bounded by the size of the figure rather than by
+the number of results: long series are downsampled to a few points per
+pixel column before they are plotted (the min and max of every column, or
+Largest-Triangle-Three-Buckets), and the other charts plot aggregates
+(percentile bands of time windows, binned histograms and CDFs, and two
+dimensional histograms of latency over time). Charts are shown, or saved
+to the format of the saveto extension (e.g. PNG or SVG); call headless()
+first to render without a display.
 """
 
 ##########################################################################
@@ -20,19 +29,163 @@ Does matplotlib charting for the Drifter module
 import numpy as np
 import matplotlib.pyplot as plt
 
+from matplotlib.colors import LogNorm
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Downsampling methods of long series
+DOWNSAMPLE = ('minmax', 'lttb', 'none')
+
+# Number of buckets (about one per pixel column) series are reduced to
+BUCKETS    = 900
+
+# Points are marked only if there are at most this many of them
+MARKERS    = 200
+
+##########################################################################
+## Downsampling
+##########################################################################
+
+def minmax(values, buckets=BUCKETS):
+    """
+    Reduces a series to the min and max of each of buckets equal runs of
+    it, which preserves the envelope (and so every spike) of the series.
+    Returns the x (index) and y values to plot.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= 2 * buckets:
+        return np.arange(len(values)), values
+
+    edges  = np.linspace(0, len(values), buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lows   = np.minimum.reduceat(values, starts)
+    highs  = np.maximum.reduceat(values, starts)
+    middle = (starts + edges[1:] - 1) / 2.0
+    return np.repeat(middle, 2), np.column_stack((lows, highs)).ravel()
+
+def lttb(values, threshold=BUCKETS):
+    """
+    Reduces a series to threshold points with Largest-Triangle-Three-
+    Buckets, which keeps the points that most shape the line. Returns the
+    x (index) and y values to plot.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count  = len(values)
+    if threshold >= count or threshold < 3:
+        return np.arange(count), values
+
+    every  = (count - 2) / float(threshold - 2)
+    chosen = np.zeros(threshold, dtype=np.int64)
+    point  = 0
+
+    for idx in xrange(threshold - 2):
+        # The average of the next bucket is the third corner
+        start  = int(np.floor((idx + 1) * every)) + 1
+        end    = min(int(np.floor((idx + 2) * every)) + 1, count)
+        avg_x  = (start + end - 1) / 2.0
+        avg_y  = values[start:end].mean()
+
+        # Keep the point of this bucket with the largest triangle
+        lower  = int(np.floor(idx * every)) + 1
+        upper  = int(np.floor((idx + 1) * every)) + 1
+        xs     = np.arange(lower, upper)
+        areas  = np.abs((point - avg_x) * (values[lower:upper] - values[point]) -
+                        (point - xs) * (avg_y - values[point]))
+        point  = lower + int(np.argmax(areas))
+        chosen[idx + 1] = point
+
+    chosen[-1] = count - 1
+    return chosen, values[chosen]
+
+def downsample(values, method='minmax', buckets=BUCKETS):
+    """
+    Reduces a series with one of the DOWNSAMPLE methods
+    """
+    if method == 'minmax':
+        return minmax(values, buckets)
+    if method == 'lttb':
+        return lttb(values, 2 * buckets)
+    if method == 'none':
+        return np.arange(len(values)), np.asarray(values)
+    raise ValueError("Unknown downsampling method '%s'" % method)
+
+def bucket_means(values, buckets=BUCKETS):
+    """
+    Reduces a series to the means of buckets equal runs of it
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= buckets:
+        return np.arange(len(values)), values
+
+    edges  = np.linspace(0, len(values), buckets + 1).astype(np.int64)
+    sums   = np.add.reduceat(values, edges[:-1])
+    return (edges[:-1] + edges[1:] - 1) / 2.0, sums / np.diff(edges)
+
 ##########################################################################
 ## Helper functions
 ##########################################################################
 
-def chart_times(runs, title=None, saveto=None, units='milliseconds'):
+def headless():
     """
-    Creates a simple line chart of times (expected is milliseconds) - pass
-    in a dictionary of multiple runs where the key is the label and the
-    value is the times in the units specified.
+    Switches to a backend that renders to files without a display
     """
+    plt.switch_backend('Agg')
+
+def finish(fig, saveto=None):
+    """
+    Saves the figure to saveto (and closes it), or shows it
+    """
+    if saveto:
+        fig.savefig(saveto)
+        plt.close(fig)
+    else:
+        plt.show()
+
+def check_runs(runs):
     if not hasattr(runs, 'items') and not callable(runs.items):
         raise TypeError("Cannot chart a non-dictionary")
 
+def latency_bins(runs, bins):
+    """
+    Returns log spaced bin edges covering the positive values of the runs
+    """
+    lows, highs = [], []
+    for values in runs.values():
+        values = np.asarray(values, dtype=np.float64)
+        values = values[values > 0]
+        if len(values):
+            lows.append(values.min())
+            highs.append(values.max())
+    if not lows:
+        return np.logspace(0, 1, bins + 1)
+    low, high = min(lows), max(highs)
+    return np.logspace(np.log10(low), np.log10(max(high, low * 1.01)), bins + 1)
+
+def distribution_of(series):
+    """
+    Returns the values and weights of an array of latencies or a Histogram
+    """
+    if hasattr(series, 'values') and callable(series.values):
+        return series.values()
+    values = np.asarray(series, dtype=np.float64)
+    return values, None
+
+##########################################################################
+## Charts
+##########################################################################
+
+def chart_times(runs, title=None, saveto=None, units='milliseconds', method='minmax',
+                buckets=BUCKETS):
+    """
+    Creates a simple line chart of times (expected is milliseconds) - pass
+    in a dictionary of multiple runs where the key is the label and the
+    value is the times in the units specified. Runs longer than twice the
+    buckets are downsampled by the method (see DOWNSAMPLE).
+    """
+    check_runs(runs)
+
     # Graph configuration
     fig, axe = plt.subplots(figsize=(9,7))
     if title:
@@ -42,12 +195,227 @@ def chart_times(runs, title=None, saveto=None, units='milliseconds'):
 
     # Plotting each run
     for label, times in runs.items():
-        axe.plot(times, '-o', label=label)
+        xs, ys = downsample(times, method, buckets)
+        axe.plot(xs, ys, '-o' if len(ys) <= MARKERS else '-', label=label, linewidth=0.8)
 
     # Add the legend
     axe.legend()
+    finish(fig, saveto)
 
-    if saveto:
-        plt.savefig(saveto)
-    else:
-        plt.show()
+def chart_distribution(runs, title=None, saveto=None, units='milliseconds'):
+    """
+    Creates a latency by percentile chart from a dictionary of histograms,
+    where the key is the label and the value is a Histogram. The x axis
+    is logarithmic in 1/(1-percentile) so that the tail is legible.
+    """
+    check_runs(runs)
+
+    # Percentiles from 0 to 99.999 spaced evenly on the tail axis
+    nines = np.linspace(0, 5, 200)
+    quant = 100.0 * (1 - 10 ** -nines)
+
+    # Graph configuration
+    fig, axe = plt.subplots(figsize=(9,7))
+    if title:
+        axe.set_title(title)
+    plt.ylabel(units)
+    plt.xlabel('percentile')
+
+    # Plotting each run
+    for label, histogram in runs.items():
+        axe.plot(nines, histogram.percentile(quant), '-', label=label)
+
+    ticks = range(6)
+    axe.set_xticks(ticks)
+    axe.set_xticklabels(["%g%%" % (100.0 * (1 - 10 ** -tick)) for tick in ticks])
+
+    # Add the legend
+    axe.legend(loc='upper left')
+    finish(fig, saveto)
+
+def chart_phases(runs, title=None, saveto=None, units='milliseconds', buckets=BUCKETS):
+    """
+    Creates a stacked area chart of the phases of each request series -
+    pass in a dictionary whose key is the label of the request series and
+    whose value is an ordered dictionary of phase name to times, all of
+    the same length, e.g. dns, connect, tls, server and transfer. Long
+    series are reduced to the mean of every bucket.
+    """
+    check_runs(runs)
+    if not runs:
+        raise ValueError("No phases were recorded to chart")
+
+    # Graph configuration, one subplot per request series
+    fig, axes = plt.subplots(len(runs), 1, figsize=(9, 4 * len(runs) + 1), squeeze=False)
+    if title:
+        fig.suptitle(title)
+
+    for axe, (label, phases) in zip(axes[:, 0], runs.items()):
+        reduced = [bucket_means(series, buckets) for series in phases.values()]
+        polys   = axe.stackplot(reduced[0][0], *[ys for _, ys in reduced])
+
+        axe.set_title(label)
+        axe.set_ylabel(units)
+        axe.set_xlabel('run index')
+        axe.legend(polys, list(phases.keys()), loc='upper left')
+
+    finish(fig, saveto)
+
+def chart_bands(runs, title=None, saveto=None, units='milliseconds'):
+    """
+    Creates a chart of percentile bands over time - pass in a dictionary
+    whose key is the label and whose value is the ordered dictionary of
+    window series of drifter.drift.windows (start, end and percentiles
+    such as p50 and p99). The median is drawn as a line and the space
+    between each pair of percentiles is shaded, lighter towards the tail.
+    """
+    check_runs(runs)
+
+    fig, axe = plt.subplots(figsize=(9,7))
+    if title:
+        axe.set_title(title)
+    plt.ylabel(units)
+    plt.xlabel('seconds')
+
+    for idx, (label, windows) in enumerate(runs.items()):
+        if not len(windows['end']): continue
+        color = "C%i" % (idx % 10)
+        xs    = windows['end'] - windows['start'][0]
+        keys  = sorted((key for key in windows if key.startswith('p') and key[1:2].isdigit()),
+                       key=lambda key: float(key[1:]))
+
+        for step, (lower, upper) in enumerate(zip(keys, keys[1:])):
+            alpha = 0.4 / (step + 1)
+            axe.fill_between(xs, windows[lower], windows[upper], color=color, alpha=alpha,
+                             linewidth=0, step='pre')
+        middle = 'p50' if 'p50' in windows else keys[0]
+        axe.step(xs, windows[middle], color=color, label="%s (%s-%s)" % (label, keys[0], keys[-1]))
+
+    axe.legend(loc='upper left')
+    finish(fig, saveto)
+
+def chart_histogram(runs, title=None, saveto=None, units='milliseconds', bins=100):
+    """
+    Creates a histogram of the latencies of each run on log spaced bins -
+    pass in a dictionary whose key is the label and whose value is the
+    latencies or a Histogram.
+    """
+    check_runs(runs)
+    series = dict((label, distribution_of(values)) for label, values in runs.items())
+    edges  = latency_bins(dict((label, values) for label, (values, _) in series.items()), bins)
+
+    fig, axe = plt.subplots(figsize=(9,7))
+    if title:
+        axe.set_title(title)
+    plt.ylabel('requests')
+    plt.xlabel(units)
+
+    for label, (values, weights) in sorted(series.items()):
+        counts, _ = np.histogram(values, edges, weights=weights)
+        axe.step(edges[:-1], counts, where='post', label=label)
+
+    axe.set_xscale('log')
+    axe.legend(loc='upper right')
+    finish(fig, saveto)
+
+def chart_cdf(runs, title=None, saveto=None, units='milliseconds', points=1000):
+    """
+    Creates a cumulative distribution chart of the latencies of each run
+    evaluated at a fixed number of points - pass in a dictionary whose
+    key is the label and whose value is the latencies or a Histogram.
+    """
+    check_runs(runs)
+    quant = np.linspace(0, 100, points)
+
+    fig, axe = plt.subplots(figsize=(9,7))
+    if title:
+        axe.set_title(title)
+    plt.ylabel('fraction of requests')
+    plt.xlabel(units)
+
+    for label, values in sorted(runs.items()):
+        if hasattr(values, 'percentile') and callable(values.percentile):
+            if not values.count: continue
+            xs = values.percentile(quant)
+        else:
+            values = np.asarray(values, dtype=np.float64)
+            if not len(values): continue
+            xs = np.percentile(values, quant)
+        axe.plot(xs, quant / 100.0, '-', label=label)
+
+    axe.set_xscale('log')
+    axe.legend(loc='lower right')
+    finish(fig, saveto)
+
+def chart_heatmap(runs, title=None, saveto=None, units='milliseconds', columns=BUCKETS // 4,
+                  rows=100):
+    """
+    Creates a heatmap of the number of requests by latency over time, one
+    subplot per run - pass in a dictionary whose key is the label and
+    whose value is a RECORD array (only timestamped successes are drawn).
+    """
+    check_runs(runs)
+    if not runs:
+        raise ValueError("No records to chart")
+
+    fig, axes = plt.subplots(len(runs), 1, figsize=(9, 4 * len(runs) + 1), squeeze=False)
+    if title:
+        fig.suptitle(title)
+
+    for axe, (label, records) in zip(axes[:, 0], sorted(runs.items())):
+        ok     = (records['error'] == 0) & np.isfinite(records['start']) & (records['latency'] > 0)
+        starts = records['start'][ok]
+        values = records['latency'][ok]
+        axe.set_title(label)
+        axe.set_ylabel(units)
+        axe.set_xlabel('seconds')
+        if not len(values): continue
+
+        starts = starts - starts.min()
+        edges  = latency_bins({label: values}, rows)
+        counts, xedges, yedges = np.histogram2d(starts, values, bins=(columns, edges))
+        counts = np.ma.masked_equal(counts, 0)
+        mesh   = axe.pcolormesh(xedges, yedges, counts.T, norm=LogNorm(), cmap='viridis',
+                                rasterized=True)
+        axe.set_yscale('log')
+        fig.colorbar(mesh, ax=axe, label='requests')
+
+    fig.subplots_adjust(hspace=0.35)
+    finish(fig, saveto)
+
+def chart_capacity(summary, title=None, saveto=None, units='milliseconds'):
+    """
+    Creates a throughput vs latency chart of the steps of a capacity search
+    (see drifter.capacity): the median and SLO percentile latency of every
+    step against its achieved throughput, with the SLO bound and the
+    saturation point marked.
+    """
+    slo   = summary['slo']
+    key   = "p%g" % slo['percentile']
+    curve = summary['curve']
+    if not curve:
+        raise ValueError("The capacity search has no steps to chart")
+
+    fig, axe = plt.subplots(figsize=(9,7))
+    if title:
+        axe.set_title(title)
+    plt.ylabel(units)
+    plt.xlabel('achieved requests per second')
+
+    throughput = [point['throughput'] for point in curve]
+    axe.plot(throughput, [point['p50'] for point in curve], 'o-', label='p50')
+    axe.plot(throughput, [point[key] for point in curve], 'o-', label=key)
+    failed = [point for point in curve if not point['passed']]
+    if failed:
+        axe.plot([point['throughput'] for point in failed], [point[key] for point in failed],
+                 'x', color='red', markersize=10, label='violates SLO')
+    axe.axhline(slo['latency'], color='red', linestyle='--', label='SLO %s' % key)
+
+    best = summary['saturation']
+    if best is not None:
+        axe.axvline(best['throughput'], color='gray', linestyle=':')
+        axe.annotate("%g rps" % best['rate'], (best['throughput'], best[key]),
+                     xytext=(5, 5), textcoords='offset points')
+
+    axe.legend(loc='upper left')
+    finish(fig, saveto)
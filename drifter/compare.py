@@ -0,0 +1,229 @@
+# drifter.compare
+# Run-to-run comparison of results with statistical significance
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 19:05:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: compare.py [] benjamin@bengfort.com $
+
+"""
+Run-to-run comparison of results with statistical significance.
+
+The series of a baseline and a candidate run are lined up by label and
+the latency delta at every percentile is reported with a bootstrap
+confidence interval: both runs are resampled with replacement many times
+and the spread of the resampled deltas gives the interval. Raw series are
+resampled by index; histogram series by drawing multinomial bucket counts.
+A one-sided Mann-Whitney U test of the whole distribution is also
+reported for raw series.
+
+A percentile regresses if the candidate is slower by more than the
+threshold (a fraction of the baseline) and the difference is significant,
+so that deploys can be gated on a comparison. A candidate also regresses
+if it fails more often than the baseline (a one-sided two-proportion
+z-test), or if a baseline label is missing from it or never succeeded,
+since an endpoint that only fails has no latencies to be slower.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import math
+import numpy as np
+
+from collections import OrderedDict
+from drifter.histogram import Histogram
+from drifter.drift import mannwhitney
+from drifter.stats import PERCENTILES, pkey
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+TESTS     = ('bootstrap', 'mannwhitney')
+
+# Keys of a label's comparison that are not percentiles
+SUMMARY   = ('pvalue', 'status', 'errors')
+
+# Upper bound on the number of resampled values drawn at once
+BATCH     = 1 << 22
+
+##########################################################################
+## Bootstrap
+##########################################################################
+
+def resample(series, percentiles, iterations, random):
+    """
+    Returns an (iterations, percentiles) array of the percentiles of the
+    series (an array of latencies or a Histogram) resampled with
+    replacement.
+    """
+    percentiles = np.asarray(percentiles, dtype=np.float64)
+
+    if isinstance(series, Histogram):
+        index = np.flatnonzero(series.counts)
+        low, width = series._bounds(index)
+        mids  = np.clip((low + width / 2.0) * series.lowest, series.minimum, series.maximum)
+        probs = series.counts[index] / float(series.count)
+        draws = random.multinomial(series.count, probs, size=iterations)
+        ranks = np.clip(np.ceil(percentiles / 100.0 * series.count), 1, series.count)
+        cums  = np.cumsum(draws, axis=1)
+        return np.array([mids[np.searchsorted(row, ranks)] for row in cums])
+
+    values = np.asarray(series, dtype=np.float64)
+    batch  = max(1, BATCH // max(len(values), 1))
+    result = []
+    for start in xrange(0, iterations, batch):
+        size = min(batch, iterations - start)
+        idx  = random.randint(0, len(values), size=(size, len(values)))
+        result.append(np.percentile(values[idx], percentiles, axis=1).T)
+    return np.concatenate(result)
+
+def point(series, percentiles):
+    """
+    Returns the percentiles of an array of latencies or a Histogram
+    """
+    if isinstance(series, Histogram):
+        return np.asarray(series.percentile(list(percentiles)))
+    return np.percentile(series, list(percentiles))
+
+def compare_series(baseline, candidate, percentiles=PERCENTILES, iterations=1000,
+                   confidence=0.95, seed=None):
+    """
+    Compares two series (arrays of latencies or Histograms) and returns an
+    ordered dictionary of the baseline, candidate, delta, relative change
+    and the bootstrap confidence interval of the delta at every
+    percentile, along with the Mann-Whitney p-value of the candidate
+    being slower (None for histograms).
+    """
+    random = np.random.RandomState(seed)
+    before = point(baseline, percentiles)
+    after  = point(candidate, percentiles)
+    deltas = (resample(candidate, percentiles, iterations, random) -
+              resample(baseline, percentiles, iterations, random))
+
+    tail   = (1.0 - confidence) / 2.0 * 100
+    lower, upper = np.percentile(deltas, [tail, 100 - tail], axis=0)
+
+    result = OrderedDict()
+    for idx, q in enumerate(percentiles):
+        result[pkey(q)] = OrderedDict([
+            ('baseline', before[idx]),
+            ('candidate', after[idx]),
+            ('delta', after[idx] - before[idx]),
+            ('change', (after[idx] - before[idx]) / before[idx] if before[idx] else np.nan),
+            ('lower', lower[idx]),
+            ('upper', upper[idx]),
+        ])
+
+    raw = not isinstance(baseline, Histogram) and not isinstance(candidate, Histogram)
+    result['pvalue'] = mannwhitney(baseline, candidate)[1] if raw else None
+    return result
+
+def proportions(baseline, candidate):
+    """
+    Returns the one-sided p-value of a two-proportion z-test that the
+    candidate rate is higher than the baseline, where both are (failed,
+    total) pairs of counts.
+    """
+    (fails, total), (cfails, ctotal) = baseline, candidate
+    if not total or not ctotal:
+        return 1.0
+    pooled = float(fails + cfails) / (total + ctotal)
+    if pooled in (0.0, 1.0):
+        return 1.0
+    error = math.sqrt(pooled * (1 - pooled) * (1.0 / total + 1.0 / ctotal))
+    z     = (float(cfails) / ctotal - float(fails) / total) / error
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def error_rates(baseline, candidate, label):
+    """
+    Returns the error rates (timeouts and other failures) of a label in
+    two TimeSeries, their difference and the p-value of the candidate
+    failing more often than the baseline.
+    """
+    counts = []
+    for series in (baseline, candidate):
+        failed = sum(series.errors(label).values())
+        total  = failed + (len(series[label]) if label in series else 0)
+        counts.append((failed, total))
+
+    rates = [float(failed) / total if total else 0.0 for failed, total in counts]
+    return OrderedDict([
+        ('baseline', rates[0]),
+        ('candidate', rates[1]),
+        ('delta', rates[1] - rates[0]),
+        ('pvalue', proportions(*counts)),
+    ])
+
+def compare(baseline, candidate, percentiles=None, **kwargs):
+    """
+    Lines up the series of two TimeSeries by label and compares the error
+    rates and latencies (see compare_series) of every baseline label. The
+    status of a label is 'missing' if the candidate did not run it and
+    'empty' if none of its candidate requests succeeded, in which case
+    there are no latencies to compare; labels without baseline latencies
+    are not compared.
+    """
+    percentiles = percentiles or baseline.percentiles
+    result = OrderedDict()
+    for label in sorted(baseline):
+        if not len(baseline[label]):
+            continue
+
+        if label not in candidate:
+            status, stats = 'missing', OrderedDict()
+        elif not len(candidate[label]):
+            status, stats = 'empty', OrderedDict()
+        else:
+            status = 'ok'
+            stats  = compare_series(baseline[label], candidate[label], percentiles, **kwargs)
+
+        stats['status'] = status
+        stats['errors'] = error_rates(baseline, candidate, label)
+        result[label] = stats
+    return result
+
+def regressions(comparison, threshold=0.1, test='bootstrap', alpha=0.05, errors=0.0):
+    """
+    Returns (label, key, stats) for every regression of a comparison: a
+    'missing' or 'empty' label, an 'errors' rate more than errors (an
+    absolute fraction) above the baseline with a proportions test p-value
+    below alpha, and every percentile that is more than threshold slower
+    than the baseline and significant, either because its bootstrap
+    interval excludes zero or because the Mann-Whitney p-value of its label
+    is below alpha. The Mann-Whitney test needs raw series.
+    """
+    if test not in TESTS:
+        raise ValueError("Unknown significance test '%s'" % test)
+
+    found = []
+    for label, result in comparison.items():
+        if result['status'] != 'ok':
+            found.append((label, result['status'], result['errors']))
+            continue
+
+        rates = result['errors']
+        if rates['delta'] > errors and rates['pvalue'] < alpha:
+            found.append((label, 'errors', rates))
+
+        if test == 'mannwhitney' and result['pvalue'] is None:
+            raise ValueError(
+                "The Mann-Whitney test needs raw series but '%s' is a histogram, "
+                "use the bootstrap test" % label
+            )
+
+        for key, stats in result.items():
+            if key in SUMMARY or not stats['change'] > threshold:
+                continue
+            if test == 'bootstrap':
+                significant = stats['lower'] > 0
+            else:
+                significant = result['pvalue'] < alpha
+            if significant:
+                found.append((label, key, stats))
+    return found
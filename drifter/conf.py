@@ -192,11 +192,15 @@ class DrifterConfiguration(Configuration):
 
     debug: allow debug checking
     testing: are we in testing mode?
+    pool_size: number of keep-alive connections to hold per host
+    keepalive: reuse connections between requests (False for cold mode)
     """
     debug           = True
     testing         = False
     api_root        = "https://local.api.cobrain.com"
     api_key         = os.environ.get('PHOENIX_API_KEY', None)
+    pool_size       = 10
+    keepalive       = True
     mongo           = MongoConfiguration()
 
 ##########################################################################
@@ -0,0 +1,308 @@
+# drifter.dashboard
+# Live terminal and HTTP dashboards of a run in progress
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 17:02:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: dashboard.py [] benjamin@bengfort.com $
+
+"""
+Live terminal and HTTP dashboards of a run in progress.
+
+A Monitor is handed to the Runner, which tells it when every request
+begins and ends. For each label the monitor keeps a rolling Window of one
+second buckets, each holding a small histogram and the request and error
+counts of that second. A snapshot merges the buckets of the window, so it
+costs the same no matter how many requests have been made.
+
+The TerminalDashboard redraws a table of the latest snapshot every second,
+and the HTTPDashboard serves it as JSON (at /stats) along with a page that
+polls it (at /).
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import sys
+import json
+import time
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from collections import OrderedDict, Counter
+from drifter.histogram import Histogram
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+DEFAULT_PORT = 8358
+CLEAR        = "\x1b[2J\x1b[H"
+COLUMNS      = ('rps', 'p50', 'p99', 'error_rate', 'inflight', 'count')
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>Drifter</title>
+  <style>
+    body { font-family: monospace; }
+    td, th { padding: 2px 12px; text-align: right; }
+    td:first-child, th:first-child { text-align: left; }
+  </style>
+</head>
+<body>
+  <h1>Drifter</h1>
+  <table id="stats"></table>
+  <script>
+    var columns = %s;
+    function refresh() {
+      var request = new XMLHttpRequest();
+      request.onload = function() {
+        var stats = JSON.parse(request.responseText);
+        var html  = "<tr><th>label</th><th>" + columns.join("</th><th>") + "</th></tr>";
+        for (var label in stats) {
+          html += "<tr><td>" + label + "</td>";
+          for (var i = 0; i < columns.length; i++) {
+            var value = stats[label][columns[i]];
+            html += "<td>" + (value === null ? "" : +value.toFixed(3)) + "</td>";
+          }
+          html += "</tr>";
+        }
+        document.getElementById("stats").innerHTML = html;
+      };
+      request.open("GET", "/stats");
+      request.send();
+    }
+    refresh();
+    setInterval(refresh, 1000);
+  </script>
+</body>
+</html>
+"""
+
+##########################################################################
+## Windowed aggregates
+##########################################################################
+
+class Window(object):
+    """
+    Rolling aggregates of the last width seconds of a series, kept as a
+    ring of one second buckets that are reset as they are reused.
+    """
+
+    def __init__(self, width=10, precision=2):
+        self.width   = width
+        self.ticks   = [None] * width
+        self.counts  = [0] * width
+        self.errors  = [0] * width
+        self.buckets = [Histogram(precision) for _ in xrange(width)]
+
+    def bucket(self, now):
+        """
+        Returns the slot of the bucket for the second now is in
+        """
+        tick = int(now)
+        slot = tick % self.width
+        if self.ticks[slot] != tick:
+            self.ticks[slot]   = tick
+            self.counts[slot]  = 0
+            self.errors[slot]  = 0
+            self.buckets[slot] = Histogram(self.buckets[slot].precision)
+        return slot
+
+    def record(self, now, latency, error=None):
+        """
+        Records the latency (in ms) of a request that ended at now
+        """
+        slot = self.bucket(now)
+        self.counts[slot] += 1
+        if error:
+            self.errors[slot] += 1
+        else:
+            self.buckets[slot].record(latency)
+
+    def snapshot(self, now, started=None):
+        """
+        Returns the rate (over the completed seconds of the window), the
+        error rate and the p50 and p99 latency of the window at now.
+        """
+        tick    = int(now)
+        current = [slot for slot, seen in enumerate(self.ticks)
+                   if seen is not None and tick - self.width < seen <= tick]
+        settled = [slot for slot in current if self.ticks[slot] < tick]
+
+        # Early in the run the window is not yet full
+        seconds = self.width - 1
+        if started is not None:
+            seconds = min(seconds, tick - int(started))
+
+        merged = Histogram(self.buckets[0].precision)
+        for slot in current:
+            merged.merge(self.buckets[slot])
+
+        count  = sum(self.counts[slot] for slot in current)
+        errors = sum(self.errors[slot] for slot in current)
+        p50, p99 = merged.percentile([50, 99]) if merged.count else (None, None)
+        return {
+            'rps': float(sum(self.counts[slot] for slot in settled)) / seconds if seconds > 0 else None,
+            'p50': p50,
+            'p99': p99,
+            'error_rate': float(errors) / count if count else None,
+        }
+
+class Monitor(object):
+    """
+    Tracks the requests in flight and a rolling Window of every label so
+    that dashboards can cheaply report on a run while it is in progress.
+    """
+
+    def __init__(self, width=10, precision=2):
+        self.width     = width
+        self.precision = precision
+        self.windows   = OrderedDict()
+        self.inflight  = Counter()
+        self.totals    = Counter()
+        self.started   = time.time()
+        self.lock      = threading.Lock()
+
+    def begin(self, label):
+        """
+        Marks a request of the label as sent
+        """
+        with self.lock:
+            if label not in self.windows:
+                self.windows[label] = Window(self.width, self.precision)
+            self.inflight[label] += 1
+
+    def end(self, label, latency, error=None):
+        """
+        Marks a request of the label as complete with its latency in ms
+        """
+        with self.lock:
+            self.inflight[label] -= 1
+            self.totals[label]   += 1
+            self.windows[label].record(time.time(), latency, error)
+
+    def snapshot(self):
+        """
+        Returns an ordered dictionary of the current aggregates by label
+        """
+        now = time.time()
+        with self.lock:
+            stats = OrderedDict()
+            for label, window in self.windows.items():
+                stats[label] = window.snapshot(now, self.started)
+                stats[label]['inflight'] = self.inflight[label]
+                stats[label]['count']    = self.totals[label]
+            return stats
+
+def render(snapshot):
+    """
+    Renders a snapshot as a plain text table
+    """
+    width  = max([len(label) for label in snapshot] + [5])
+    header = "%-*s" % (width, "label") + "".join("%12s" % col for col in COLUMNS)
+    lines  = [header, "-" * len(header)]
+    for label, stats in snapshot.items():
+        cells = []
+        for col in COLUMNS:
+            value = stats[col]
+            if value is None:
+                cells.append("%12s" % "-")
+            elif isinstance(value, float):
+                cells.append("%12.3f" % value)
+            else:
+                cells.append("%12i" % value)
+        lines.append("%-*s" % (width, label) + "".join(cells))
+    return "\n".join(lines)
+
+##########################################################################
+## Dashboards
+##########################################################################
+
+class TerminalDashboard(object):
+    """
+    Redraws the monitor's snapshot on the terminal every interval seconds
+    """
+
+    def __init__(self, monitor, interval=1.0, stream=None):
+        self.monitor  = monitor
+        self.interval = interval
+        self.stream   = stream or sys.stdout
+        self.stopped  = threading.Event()
+        self.thread   = None
+
+    def draw(self):
+        self.stream.write(CLEAR + render(self.monitor.snapshot()) + "\n")
+        self.stream.flush()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.draw()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.draw()
+
+class DashboardHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves the dashboard page and the JSON snapshot it polls
+    """
+
+    def do_GET(self):
+        if self.path == '/stats':
+            body  = json.dumps(self.server.monitor.snapshot())
+            ctype = 'application/json'
+        elif self.path == '/':
+            body  = PAGE % json.dumps(COLUMNS)
+            ctype = 'text/html'
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class HTTPDashboard(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Serves the monitor's snapshot on a local HTTP server while running
+    """
+
+    daemon_threads      = True
+    allow_reuse_address = True
+
+    def __init__(self, monitor, host='127.0.0.1', port=DEFAULT_PORT):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), DashboardHandler)
+        self.monitor = monitor
+        self.thread  = None
+
+    @property
+    def url(self):
+        return "http://%s:%i/" % self.server_address
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,288 @@
+# drifter.distributed
+# Spreads a drifter run across local processes and remote workers
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 13:20:41 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: distributed.py [] benjamin@bengfort.com $
+
+"""
+Spreads a drifter run across local processes and remote workers.
+
+A single Python process is limited by the GIL and by JSON decoding long
+before the API saturates, so the Coordinator splits a run into jobs that
+are executed by local worker processes and/or by `drifter worker` servers
+on other hosts. Each worker runs an ordinary Runner and sends back its
+serialized TimeSeries, which the coordinator merges into one.
+
+The remote protocol is a plain TCP socket carrying length-prefixed JSON
+messages: the coordinator sends a job and the worker replies with either
+its results or an error. A worker runs whatever requests it is sent, so
+it listens on the loopback interface by default, only executes jobs that
+carry the shared token it was started with and rejects oversized frames
+before reading them.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import hmac
+import json
+import socket
+import struct
+import threading
+import SocketServer
+import multiprocessing
+
+from drifter.stats import TimeSeries, PERCENTILES
+from drifter.scenario import ScenarioConfiguration, request_configuration
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+DEFAULT_PORT = 8357
+DEFAULT_HOST = '127.0.0.1'
+HEADER       = struct.Struct('!I')
+
+# Largest message read from a socket, and the largest job (read before the
+# sender's token is checked), in bytes
+MAX_MESSAGE  = 1 << 30
+MAX_JOB      = 1 << 20
+
+# Seconds a worker waits for a coordinator to send its job
+JOB_TIMEOUT  = 30.0
+
+##########################################################################
+## Protocol
+##########################################################################
+
+def send_message(sock, message):
+    """
+    Sends a JSON message prefixed by its length on the socket
+    """
+    payload = json.dumps(message)
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+def recv_exactly(sock, size):
+    """
+    Reads exactly size bytes from the socket
+    """
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise IOError("Connection closed before message was received")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return "".join(chunks)
+
+def recv_message(sock, limit=MAX_MESSAGE):
+    """
+    Receives a length-prefixed JSON message from the socket, raising an
+    IOError if its length is over the limit in bytes
+    """
+    size, = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    if size > limit:
+        raise IOError("Message of %i bytes is over the %i byte limit" % (size, limit))
+    return json.loads(recv_exactly(sock, size))
+
+def encode(token):
+    """
+    Returns a token as a byte string for a constant time comparison
+    """
+    return token.encode('utf-8') if isinstance(token, unicode) else str(token)
+
+def parse_address(address):
+    """
+    Parses a host:port string into a (host, port) tuple
+    """
+    host, _, port = address.rpartition(':')
+    if not host:
+        return port, DEFAULT_PORT
+    return host, int(port)
+
+##########################################################################
+## Jobs
+##########################################################################
+
+def execute_job(job):
+    """
+    Runs a job with an ordinary Runner and returns the serialized results.
+    A job is a dictionary of the endpoints and labels (or a serialized
+    scenario) and the Runner options.
+    """
+    from drifter.runner import Runner
+
+    runner = Runner(**job.get('options', {}))
+    if job.get('scenario'):
+        runner.scenario(ScenarioConfiguration.deserialize(job['scenario']), **job.get('mix', {}))
+    else:
+        runner.run(job['endpoints'], labels=job.get('labels'))
+    return runner.results.serialize()
+
+def split_jobs(job, count):
+    """
+    Splits a job into count jobs that share its runs and rate evenly. A
+    seeded scenario mix is seeded differently (but repeatably) per job.
+    """
+    options = job.get('options', {})
+    runs    = options.get('runs') or 100
+    jobs    = []
+
+    for idx in xrange(count):
+        part = dict(options, runs=runs // count + (1 if idx < runs % count else 0))
+        if options.get('rate'):
+            part['rate'] = float(options['rate']) / count
+        jobs.append(dict(job, options=part))
+        if job.get('mix', {}).get('seed') is not None:
+            jobs[-1]['mix'] = dict(job['mix'], seed=job['mix']['seed'] + idx)
+    return jobs
+
+##########################################################################
+## Worker Server
+##########################################################################
+
+class WorkerHandler(SocketServer.BaseRequestHandler):
+    """
+    Handles a single job from a coordinator connection, if it carries the
+    worker's token.
+    """
+
+    def handle(self):
+        self.request.settimeout(JOB_TIMEOUT)
+        try:
+            job = recv_message(self.request, MAX_JOB)
+        except (IOError, ValueError, socket.error) as e:
+            return self.reply({'error': "Bad job: %s" % e})
+        self.request.settimeout(None)
+
+        token = job.pop('token', None) if isinstance(job, dict) else None
+        if not isinstance(token, basestring) or not hmac.compare_digest(encode(token), self.server.token):
+            return self.reply({'error': "Unauthorized: the job does not carry the worker's token"})
+
+        try:
+            reply = {'results': execute_job(job)}
+        except Exception as e:
+            reply = {'error': "%s: %s" % (e.__class__.__name__, e)}
+        self.reply(reply)
+
+    def reply(self, message):
+        try:
+            send_message(self.request, message)
+        except socket.error:
+            pass
+
+class Worker(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """
+    A TCP server that executes jobs sent by a Coordinator with the same
+    shared token, run by the `drifter worker` command on each load
+    generating host.
+    """
+
+    daemon_threads      = True
+    allow_reuse_address = True
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        if not token:
+            raise ValueError("Workers require a shared token")
+        self.token = encode(token)
+        SocketServer.TCPServer.__init__(self, (host, port), WorkerHandler)
+
+    @property
+    def address(self):
+        """
+        The host:port the worker is listening on
+        """
+        return "%s:%i" % self.server_address
+
+##########################################################################
+## Coordinator
+##########################################################################
+
+class Coordinator(object):
+    """
+    Splits a run across local processes and remote workers (given as a
+    list of host:port addresses that share the token), then merges the
+    results of every worker into a single TimeSeries.
+    """
+
+    def __init__(self, processes=0, workers=None, timeout=None, token=None, **options):
+        self.processes = processes or 0
+        self.workers   = [parse_address(worker) for worker in workers or []]
+        self.timeout   = timeout
+        self.token     = token
+        self.options   = options
+
+        if not self.processes and not self.workers:
+            raise ValueError("Coordinator requires processes or workers")
+        if self.workers and not token:
+            raise ValueError("Remote workers require the token they were started with")
+
+    def remote(self, address, job):
+        """
+        Sends a job to a remote worker and returns its results
+        """
+        sock = socket.create_connection(address, timeout=self.timeout)
+        try:
+            send_message(sock, dict(job, token=self.token))
+            reply = recv_message(sock)
+        finally:
+            sock.close()
+
+        if 'error' in reply:
+            raise Exception("Worker %s:%i failed: %s" % (address + (reply['error'],)))
+        return reply['results']
+
+    def run(self, endpoints=None, labels=None, scenario=None, mix=None):
+        """
+        Runs the endpoints (or the mix of a scenario, with the keyword
+        arguments of Runner.scenario in mix) on every worker and returns
+        the merged results
+        """
+        endpoints = [
+            item if isinstance(item, basestring) else request_configuration(item).serialize()
+            for item in endpoints or []
+        ]
+        job    = {'endpoints': endpoints, 'labels': labels, 'options': self.options}
+        if scenario is not None:
+            job['scenario'] = scenario.serialize()
+            job['mix'] = dict(mix or {})
+        jobs   = split_jobs(job, self.processes + len(self.workers))
+        output = [None] * len(self.workers)
+        errors = []
+
+        def dispatch(idx, address, job):
+            try:
+                output[idx] = self.remote(address, job)
+            except Exception as e:
+                errors.append(e)
+
+        # Remote workers are waited on by threads while local processes run
+        threads = [
+            threading.Thread(target=dispatch, args=(idx, address, jobs[self.processes + idx]))
+            for idx, address in enumerate(self.workers)
+        ]
+        for thread in threads: thread.start()
+
+        if self.processes:
+            pool = multiprocessing.Pool(self.processes)
+            try:
+                output.extend(pool.map(execute_job, jobs[:self.processes]))
+            finally:
+                pool.close()
+                pool.join()
+
+        for thread in threads: thread.join()
+        if errors: raise errors[0]
+
+        results = TimeSeries(histogram=self.options.get('histogram', False),
+                             precision=self.options.get('precision', 3),
+                             percentiles=self.options.get('percentiles') or PERCENTILES)
+        for data in output:
+            results.merge(TimeSeries.deserialize(data), concurrent=True)
+        return results
@@ -0,0 +1,232 @@
+# drifter.drift
+# Windowed aggregation of results and detection of latency drift
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 18:10:44 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: drift.py [] benjamin@bengfort.com $
+
+"""
+Windowed aggregation of results and detection of latency drift.
+
+Every result record carries the time its request was (meant to be) sent,
+so a series can be cut into time windows: tumbling windows that do not
+overlap, or rolling windows of a given width that advance by a smaller
+step. The records are sorted once by the slot of step seconds they were
+sent in, so every window is a contiguous range of them found by binary
+search and no record is copied per window it falls in. The count and mean
+of every window come from running totals, and the percentiles of tumbling
+windows are indexed straight out of their sorted ranges.
+
+The drift detector compares the latencies of every tumbling window with a
+baseline window using a one-sided Mann-Whitney U test, and flags windows
+whose median is significantly (and meaningfully) slower.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import math
+import numpy as np
+
+from collections import OrderedDict
+from drifter.stats import PERCENTILES, pkey
+
+##########################################################################
+## Windowing
+##########################################################################
+
+def assign(records, width, step=None, origin=None):
+    """
+    Orders the successful, timestamped records by the slot of step seconds
+    they were sent in and by latency within a slot. Window i ends at
+    origin + (i + 1) * step and covers the width seconds before that, so
+    its records are the contiguous run of the slots ending at slot i;
+    width must be a multiple of step (by default width, i.e. tumbling
+    windows). Returns the ordered latencies, the lower and upper index of
+    the run of every window, the number of windows and the origin.
+    """
+    step  = float(step or width)
+    ratio = width / step
+    if step <= 0 or abs(ratio - round(ratio)) > 1e-9:
+        raise ValueError("Window width must be a positive multiple of the step")
+
+    timed   = np.isfinite(records['start'])
+    if not timed.any():
+        bounds = np.zeros(0, np.int64)
+        return np.zeros(0), bounds, bounds, 0, origin
+
+    # Failed requests count towards the windows too, see window_errors
+    origin  = records['start'][timed].min() if origin is None else origin
+    count   = int(np.floor((records['start'][timed].max() - origin) / step)) + 1
+    ok      = (records['error'] == 0) & timed
+    slots   = np.floor((records['start'][ok] - origin) / step).astype(np.int64)
+    values  = records['latency'][ok]
+    order   = np.lexsort((values, slots))
+
+    # Window i spans the slots i - span + 1 to i (none before the origin)
+    ends    = np.arange(count)
+    firsts  = np.maximum(ends - int(round(ratio)) + 1, 0)
+    lower   = np.searchsorted(slots[order], firsts, side='left')
+    upper   = np.searchsorted(slots[order], ends, side='right')
+    return values[order], lower, upper, count, origin
+
+def windows(records, width, step=None, percentiles=PERCENTILES, origin=None):
+    """
+    Aggregates a RECORD array into windows of width seconds advancing by
+    step seconds (tumbling if no step is given). Returns an ordered
+    dictionary of series with one value per window: start, end, count,
+    errors, mean and the requested percentiles. Windows without any
+    successful requests have a NaN mean and percentiles.
+    """
+    step = float(step or width)
+    values, lower, upper, count, origin = assign(records, width, step, origin)
+
+    series = OrderedDict()
+    ends   = origin + (np.arange(count) + 1) * step if count else np.zeros(0)
+    series['start'] = np.maximum(ends - width, origin) if count else ends
+    series['end']   = ends
+
+    counts = upper - lower
+    sums   = np.concatenate(([0.0], np.cumsum(values)))
+    series['count'] = counts
+    series['errors'] = window_errors(records, width, step, origin, count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        series['mean'] = (sums[upper] - sums[lower]) / counts
+
+    empty = counts == 0
+    if width > step:
+        # Rolling windows overlap, so each run is only sorted by slot
+        stats = np.full((count, len(percentiles)), np.nan)
+        for idx in np.flatnonzero(~empty):
+            stats[idx] = np.percentile(values[lower[idx]:upper[idx]], percentiles)
+        for col, q in enumerate(percentiles):
+            series[pkey(q)] = stats[:, col]
+        return series
+
+    # Linearly interpolated percentiles indexed into each sorted run
+    last  = np.maximum(counts - 1, 0)
+    for q in percentiles:
+        rank  = q / 100.0 * last
+        below = np.floor(rank).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        if len(values):
+            low  = values[np.minimum(lower + below, len(values) - 1)]
+            high = values[np.minimum(lower + above, len(values) - 1)]
+            value = low + (high - low) * (rank - below)
+        else:
+            value = np.zeros(count)
+        series[pkey(q)] = np.where(empty, np.nan, value)
+
+    return series
+
+def window_errors(records, width, step, origin, count):
+    """
+    Counts the failed requests in each window from the running total of
+    failures by slot
+    """
+    failed = records[(records['error'] != 0) & np.isfinite(records['start'])]
+    if not count or not len(failed):
+        return np.zeros(count, dtype=np.int64)
+
+    slots  = np.floor((failed['start'] - origin) / step).astype(np.int64)
+    slots  = slots[(slots >= 0) & (slots < count)]
+    totals = np.concatenate(([0], np.cumsum(np.bincount(slots, minlength=count))))
+    ends   = np.arange(count)
+    return totals[ends + 1] - totals[np.maximum(ends - int(round(width / step)) + 1, 0)]
+
+def series_windows(series, width, step=None, percentiles=None):
+    """
+    Aggregates every raw series of a TimeSeries into windows, returning
+    an ordered dictionary of the window series of each label.
+    """
+    if series.histogram:
+        raise ValueError("Drift windows need the timestamped records of raw results, not histograms")
+
+    percentiles = percentiles or series.percentiles
+    return OrderedDict(
+        (label, windows(series.records(label), width, step, percentiles))
+        for label in sorted(series)
+    )
+
+##########################################################################
+## Drift Detection
+##########################################################################
+
+def mannwhitney(baseline, sample):
+    """
+    One-sided Mann-Whitney U test of whether the sample tends to be larger
+    than the baseline, using the normal approximation with a correction
+    for ties. Returns the U statistic of the sample and the p-value.
+    """
+    n1, n2 = len(baseline), len(sample)
+    if not n1 or not n2:
+        return np.nan, 1.0
+
+    values = np.concatenate((baseline, sample))
+    order  = np.argsort(values, kind='mergesort')
+    ranked = values[order]
+
+    # Average the ranks of tied values
+    bounds = np.flatnonzero(np.diff(ranked)) + 1
+    starts = np.concatenate(([0], bounds))
+    sizes  = np.diff(np.concatenate((starts, [len(ranked)])))
+    ranks  = np.empty(len(values))
+    ranks[order] = np.repeat(starts + (sizes + 1) / 2.0, sizes)
+
+    u     = ranks[n1:].sum() - n2 * (n2 + 1) / 2.0
+    n     = n1 + n2
+    ties  = (sizes ** 3 - sizes).sum() / float(n * (n - 1)) if n > 1 else 0.0
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - ties))
+    if sigma == 0:
+        return u, 1.0
+
+    z = (u - n1 * n2 / 2.0 - 0.5) / sigma
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+def detect(records, width, baseline=0, alpha=0.01, threshold=0.05, minimum=20):
+    """
+    Flags tumbling windows of width seconds whose latencies are
+    significantly slower than the baseline window (by index, or
+    'previous' to compare each window with the one before it).
+
+    A window is flagged if its one-sided Mann-Whitney p-value is below
+    alpha (Bonferroni corrected for the number of windows tested) and its
+    median is at least threshold (a fraction) slower than the baseline
+    median. Windows with fewer than minimum samples are not tested.
+    Returns a list of ordered dictionaries describing each regression.
+    """
+    values, lower, upper, count, origin = assign(records, width)
+    samples = [values[low:high] for low, high in zip(lower, upper)]
+
+    tests = []
+    for idx in xrange(count):
+        base = idx - 1 if baseline == 'previous' else baseline
+        if base < 0 or base == idx or base >= count: continue
+        if len(samples[idx]) < minimum or len(samples[base]) < minimum: continue
+        tests.append((idx, base))
+
+    regressions = []
+    for idx, base in tests:
+        before = np.median(samples[base])
+        after  = np.median(samples[idx])
+        change = (after - before) / before if before > 0 else np.inf
+        if change < threshold: continue
+
+        _, pvalue = mannwhitney(samples[base], samples[idx])
+        if pvalue * len(tests) >= alpha: continue
+
+        regressions.append(OrderedDict([
+            ('window', idx),
+            ('start', origin + idx * width),
+            ('end', origin + (idx + 1) * width),
+            ('baseline', before),
+            ('median', after),
+            ('change', change),
+            ('pvalue', min(pvalue * len(tests), 1.0)),
+        ]))
+    return regressions
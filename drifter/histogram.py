@@ -0,0 +1,255 @@
+# drifter.histogram
+# A constant memory, HDR-style latency histogram
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 11:05:27 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: histogram.py [] benjamin@bengfort.com $
+
+"""
+A constant memory, HDR-style latency histogram.
+
+Values are recorded into log-linear buckets: every power of two range is
+split into enough linear sub-buckets to keep the requested number of
+significant decimal digits, so the relative error of any reported value is
+bounded no matter how many samples are recorded. Exact count, sum, sum of
+squares, minimum and maximum are kept alongside the bucket counts so that
+mean and standard deviation are not subject to bucketing error.
+
+Histograms with the same layout can be merged by adding their counts.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import math
+import numpy as np
+
+##########################################################################
+## Histogram
+##########################################################################
+
+class Histogram(object):
+    """
+    Records non-negative values between lowest and highest (by default in
+    milliseconds, from a microsecond to an hour) with the given number of
+    significant digits of precision. Values above highest are clamped
+    into the top bucket, though the exact maximum is still kept.
+    """
+
+    def __init__(self, precision=3, lowest=0.001, highest=3600000.0):
+        if not 1 <= precision <= 5:
+            raise ValueError("Histogram precision must be between 1 and 5 digits")
+        if lowest <= 0 or highest <= lowest:
+            raise ValueError("Histogram requires 0 < lowest < highest")
+
+        self.precision = precision
+        self.lowest    = float(lowest)
+        self.highest   = float(highest)
+
+        # Layout of the log-linear buckets
+        self.sub_bits  = int(np.ceil(np.log2(2 * 10 ** precision)))
+        self.sub_count = 1 << self.sub_bits
+        self.sub_half  = self.sub_count >> 1
+        self.top       = int(self.highest / self.lowest)
+        self.counts    = np.zeros(self._index(np.array([self.top]))[0] + 1, dtype=np.int64)
+
+        # Exact moments and extrema
+        self.count     = 0
+        self.total     = 0.0
+        self.squares   = 0.0
+        self.minimum   = np.inf
+        self.maximum   = -np.inf
+
+    @property
+    def layout(self):
+        """
+        The parameters that must match for two histograms to be merged
+        """
+        return (self.precision, self.lowest, self.highest)
+
+    def _index(self, units):
+        """
+        Maps integer units (multiples of lowest) to bucket indices
+        """
+        units = np.asarray(units, dtype=np.int64)
+        _, exp = np.frexp(np.maximum(units, 1).astype(np.float64))
+        shift  = np.maximum(exp - self.sub_bits, 0)
+        return np.where(shift == 0, units, shift * self.sub_half + (units >> shift))
+
+    def _bounds(self, index):
+        """
+        Maps bucket indices back to the (low, width) of the bucket in units
+        """
+        index = np.asarray(index, dtype=np.int64)
+        shift = np.maximum((index - self.sub_count) // self.sub_half + 1, 0)
+        sub   = index - shift * self.sub_half
+        return sub << shift, np.left_shift(1, shift)
+
+    def record(self, value):
+        """
+        Records a single value in the histogram. Only the value's bucket is
+        touched, in scalar arithmetic, since record is called once per
+        request (often under a lock); use record_many for batches.
+        """
+        value = float(value)
+        if value < 0:
+            raise ValueError("Histogram cannot record negative values")
+
+        units = int(min(value / self.lowest, self.top))
+        shift = max(math.frexp(max(units, 1))[1] - self.sub_bits, 0)
+        self.counts[units if not shift else shift * self.sub_half + (units >> shift)] += 1
+
+        self.count   += 1
+        self.total   += value
+        self.squares += value * value
+        if value < self.minimum: self.minimum = value
+        if value > self.maximum: self.maximum = value
+
+    def record_many(self, values):
+        """
+        Records an array of values in the histogram in one pass
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values): return
+        if np.any(values < 0):
+            raise ValueError("Histogram cannot record negative values")
+
+        units  = np.minimum(values / self.lowest, self.top).astype(np.int64)
+        index  = self._index(units)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+        self.count   += len(values)
+        self.total   += values.sum()
+        self.squares += np.dot(values, values)
+        self.minimum  = min(self.minimum, values.min())
+        self.maximum  = max(self.maximum, values.max())
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram with the same layout into
+        this one and returns self.
+        """
+        if other.layout != self.layout:
+            raise ValueError("Cannot merge histograms with different layouts")
+
+        self.counts  += other.counts
+        self.count   += other.count
+        self.total   += other.total
+        self.squares += other.squares
+        self.minimum  = min(self.minimum, other.minimum)
+        self.maximum  = max(self.maximum, other.maximum)
+        return self
+
+    def copy(self):
+        """
+        Returns a deep copy of the histogram
+        """
+        clone = Histogram(*self.layout)
+        return clone.merge(self)
+
+    def values(self):
+        """
+        Returns the midpoints and counts of the non-empty buckets
+        """
+        index = np.flatnonzero(self.counts)
+        low, width = self._bounds(index)
+        mids = (low + width / 2.0) * self.lowest
+        return np.clip(mids, self.minimum, self.maximum), self.counts[index]
+
+    def percentile(self, q):
+        """
+        Returns the value at percentile q (0-100); q may be a sequence, in
+        which case an array of values is returned.
+        """
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        ranks = np.ceil(np.asarray(q, dtype=np.float64) / 100.0 * self.count)
+        ranks = np.clip(ranks, 1, self.count)
+        index = np.searchsorted(np.cumsum(self.counts), ranks, side='left')
+
+        low, width = self._bounds(index)
+        values = (low + width / 2.0) * self.lowest
+        values = np.where(ranks >= self.count, self.maximum, values)
+        values = np.where(ranks <= 1, self.minimum, values)
+        values = np.clip(values, self.minimum, self.maximum)
+        return values if np.ndim(q) else float(values)
+
+    def mean(self):
+        """
+        Returns the exact mean of the recorded values
+        """
+        return self.total / self.count if self.count else np.nan
+
+    def median(self):
+        """
+        Returns the median of the recorded values
+        """
+        return self.percentile(50)
+
+    def variance(self):
+        """
+        Returns the exact (population) variance of the recorded values
+        """
+        if not self.count: return np.nan
+        mean = self.mean()
+        return max(self.squares / self.count - mean * mean, 0.0)
+
+    def stddev(self):
+        """
+        Returns the standard deviation of the recorded values
+        """
+        return np.sqrt(self.variance())
+
+    def min(self):
+        """
+        Returns the exact minimum recorded value
+        """
+        return self.minimum if self.count else np.nan
+
+    def max(self):
+        """
+        Returns the exact maximum recorded value
+        """
+        return self.maximum if self.count else np.nan
+
+    def serialize(self):
+        """
+        Returns a JSON serializable dictionary with sparse counts
+        """
+        index = np.flatnonzero(self.counts)
+        return {
+            'precision': self.precision,
+            'lowest': self.lowest,
+            'highest': self.highest,
+            'index': index.tolist(),
+            'counts': self.counts[index].tolist(),
+            'count': self.count,
+            'total': self.total,
+            'squares': self.squares,
+            'minimum': self.min(),
+            'maximum': self.max(),
+        }
+
+    @classmethod
+    def deserialize(klass, data):
+        """
+        Reconstructs a histogram from the output of serialize
+        """
+        instance = klass(data['precision'], data['lowest'], data['highest'])
+        instance.counts[np.asarray(data['index'], dtype=np.int64)] = data['counts']
+        instance.count   = data['count']
+        instance.total   = data['total']
+        instance.squares = data['squares']
+        if instance.count:
+            instance.minimum = data['minimum']
+            instance.maximum = data['maximum']
+        return instance
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,217 @@
+# drifter.mock
+# A local stand-in for the Phoenix-API to benchmark drifter against
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 23:24:07 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: mock.py [] benjamin@bengfort.com $
+
+"""
+A local stand-in for the Phoenix-API to benchmark drifter against.
+
+Latencies recorded against the real API include whatever drifter itself
+adds. The MockServer serves canned /categories, /merchants and /sizes
+documents of a configurable size after an injected latency drawn from a
+configurable distribution (see drifter.users.think_time), so that a run
+against it separates drifter's own overhead, maximum rate and timing
+error from the known service time.
+
+Responses are rendered once, status line and headers included, so every
+request costs one write after the request line is parsed; connections are
+kept alive (HTTP/1.1) and every connection is served by its own thread.
+
+A limit query parameter cuts the documents to their first limit items,
+so that sweeps over page sizes have something to measure. Documents carry
+an ETag and Last-Modified date, and conditional requests that match them
+are answered 304 Not Modified (after the same latency) unless validation
+is disabled.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import time
+import socket
+import hashlib
+import urlparse
+import threading
+import SocketServer
+import BaseHTTPServer
+import numpy as np
+
+from drifter.users import think_time
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Built in endpoints and the name of the items of their documents
+RESOURCES    = ('categories', 'merchants', 'sizes')
+
+# Default size in bytes of the canned documents
+DEFAULT_SIZE = 2048
+
+# Validators of the canned documents, which never change
+MODIFIED     = "Thu, 01 Jan 2015 00:00:00 GMT"
+
+RESPONSE     = ("HTTP/1.1 200 OK\r\n"
+                "Content-Type: application/json\r\n"
+                "ETag: %s\r\n"
+                "Last-Modified: " + MODIFIED + "\r\n"
+                "Content-Length: %i\r\n\r\n")
+
+NOT_MODIFIED = ("HTTP/1.1 304 Not Modified\r\n"
+                "ETag: %s\r\n\r\n")
+
+##########################################################################
+## Canned documents
+##########################################################################
+
+def payload(resource, size=DEFAULT_SIZE):
+    """
+    Returns a JSON document listing items of the resource that is as close
+    to size bytes as possible (never less than an empty listing).
+    """
+    items  = []
+    length = len(json.dumps({resource: items}))
+    idx    = 0
+    while True:
+        item = {"id": idx, "name": "%s-%i" % (resource, idx), "slug": ""}
+        more = len(json.dumps(item)) + (2 if items else 0)
+        if length + more > size:
+            break
+        items.append(item)
+        length += more
+        idx    += 1
+
+    # Pad the last item's slug to land on the requested size exactly
+    if items:
+        items[-1]['slug'] = "x" * (size - length)
+    return json.dumps({resource: items})
+
+##########################################################################
+## Mock Server
+##########################################################################
+
+class MockHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves the canned document of the resource at the end of the path (of
+    any method), after the injected latency, or a 404.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Send every response at once rather than waiting on delayed acks
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length: self.rfile.read(length)
+
+        path, _, query = self.path.partition('?')
+        resource = path.rstrip('/').rpartition('/')[2]
+        if resource not in self.server.documents:
+            self.send_error(404)
+            return
+
+        limit = urlparse.parse_qs(query).get('limit', [None])[0]
+        limit = int(limit) if limit and limit.isdigit() else None
+        etag, response, not_modified = self.server.render(resource, limit)
+        if self.server.conditional and self.fresh(etag):
+            response = not_modified
+
+        delay = self.server.delay()
+        if delay > 0: time.sleep(delay)
+        self.wfile.write(response)
+
+    def fresh(self, etag):
+        """
+        Returns True if the request's validators match the document
+        """
+        match = self.headers.get('If-None-Match')
+        if match is not None:
+            return match == '*' or etag in [tag.strip() for tag in match.split(',')]
+        return self.headers.get('If-Modified-Since') == MODIFIED
+
+    do_GET     = respond
+    do_POST    = respond
+    do_PUT     = respond
+    do_PATCH   = respond
+    do_DELETE  = respond
+    do_OPTIONS = respond
+
+    def log_message(self, *args):
+        pass
+
+class MockServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Serves canned Phoenix-API documents of size bytes (an int, or a dict
+    of sizes by resource) after a latency in seconds drawn from the
+    latency spec (a number or a distribution, see think_time). Listens on
+    a free port unless one is given. Conditional requests are answered
+    304 when they match unless conditional is False.
+    """
+
+    daemon_threads      = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, size=DEFAULT_SIZE, latency=None, seed=None,
+                 conditional=True):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), MockHandler)
+        sizes = size if isinstance(size, dict) else dict.fromkeys(RESOURCES, size)
+
+        self.conditional = conditional
+        self.documents   = dict(
+            (resource, json.loads(payload(resource, sizes.get(resource, DEFAULT_SIZE))))
+            for resource in RESOURCES
+        )
+        self.rendered    = {}
+
+        self.latency = think_time(latency, np.random.RandomState(seed))
+        self.lock    = threading.Lock()
+        self.thread  = None
+        for resource in RESOURCES:
+            self.render(resource)
+
+    @property
+    def api_root(self):
+        return "http://%s:%i" % self.server_address
+
+    def render(self, resource, limit=None):
+        """
+        Returns the ETag, full response and 304 response of the document of
+        the resource (cut to its first limit items), rendering it once.
+        """
+        key = (resource, limit)
+        if key not in self.rendered:
+            if limit is None:
+                body = json.dumps(self.documents[resource])
+            else:
+                body = json.dumps({resource: self.documents[resource][resource][:limit]})
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            self.rendered[key] = (etag, RESPONSE % (etag, len(body)) + body, NOT_MODIFIED % etag)
+        return self.rendered[key]
+
+    def delay(self):
+        """
+        Draws the next injected latency in seconds
+        """
+        with self.lock:
+            return self.latency()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -18,15 +18,47 @@ Runs a drifter on a particular endpoint
 ##########################################################################
 
 import sys
+import json
+import math
 import time
 import copy
 import socket
+import threading
 import progressbar
 
-from drifter.api import Drifter
+from multiprocessing.pool import ThreadPool
+
+from drifter.api import Drifter, consume, reset_phases, get_phases
+from drifter.adaptive import StoppingRule
 from drifter.conf import settings
+from requests import Response, codes
 from requests.exceptions import *
-from drifter.stats import TimeSeries
+from drifter.stats import TimeSeries, PERCENTILES, PHASES, phase_label
+from drifter.schedule import Schedule
+from drifter.store import ResultLog
+from drifter.cache import ValidatorCache, DEFAULT_CAPACITY
+from drifter.scenario import WeightedScheduler, endpoint
+from drifter.template import RequestTemplate
+from drifter.users import UserEngine
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Requests between checks of the stopping rule of an adaptive run
+CHECK_EVERY = 10
+
+# Requests sent by default, and the most sent by default by an adaptive run
+# (which is usually stopped by its stopping rule or budget of seconds first)
+RUNS          = 100
+CONVERGE_RUNS = 100000
+
+# Seconds a request is expected to take when sizing open-loop workers
+EXPECTED_LATENCY = 1.0
+
+# Fraction of open-loop requests that may queue for a busy worker before
+# the run is client bound
+LATE_FRACTION = 0.01
 
 ##########################################################################
 ## Decorator
@@ -48,7 +80,7 @@ def sysout(msg):
     sys.stdout.write(msg)
     sys.stdout.flush()
 
-def progress():
+def progress(maxval=None):
     """
     Constructs the progressbar widget and returns a function.
     """
@@ -59,7 +91,15 @@ def progress():
         progressbar.Timer(),
         ')'
     ]
-    return progressbar.ProgressBar(widgets=widgets)
+    return progressbar.ProgressBar(widgets=widgets, maxval=maxval)
+
+def in_flight(rate, latency=EXPECTED_LATENCY):
+    """
+    Returns the workers an open-loop run at rate (requests per second) needs
+    to keep requests of latency seconds in flight: twice Little's law, so
+    that a server slowing down is measured rather than queued behind.
+    """
+    return max(int(math.ceil(rate * latency * 2)), 1)
 
 def wait_for_return(msg="Hit Return to continue"):
     keys = raw_input(msg)
@@ -74,93 +114,527 @@ class Runner(object):
     Runs a drift
     """
 
-    def __init__(self, runs=100, **kwargs):
-        self.runs     = runs
-        self.wait     = kwargs.pop('wait', None)
-        self.drifter  = Drifter(**kwargs)
-        self.results  = TimeSeries()
-
-
+    def __init__(self, runs=None, **kwargs):
+        self.wait        = kwargs.pop('wait', None)
+        concurrency      = kwargs.pop('concurrency', None)
+        self.concurrency = concurrency or 1
+        self.bounded     = concurrency is not None
+        self.rate        = kwargs.pop('rate', None)
+        self.latency     = kwargs.pop('latency', None) or EXPECTED_LATENCY
+        self.late        = 0.0
+        self.stream      = kwargs.pop('stream', False)
+        self.validate    = kwargs.pop('validate', False)
+        self.phases      = kwargs.pop('phases', False)
+        self.monitor     = kwargs.pop('monitor', None)
+        self.quiet       = kwargs.pop('quiet', False)
+        log              = kwargs.pop('log', None)
+        flush            = kwargs.pop('flush', 1.0)
+        conditional      = kwargs.pop('conditional', False)
+        cache_size       = kwargs.pop('cache_size', None) or DEFAULT_CAPACITY
+        self.converge    = kwargs.pop('converge', None)
+        stopping         = [(key, kwargs.pop(key, None)) for key in ('tolerance', 'confidence', 'budget')]
+        self.stopping    = dict(item for item in stopping if item[1] is not None)
+        self.runs        = runs or (CONVERGE_RUNS if self.converge else RUNS)
+        self.schedule    = dict((key, kwargs.pop(key)) for key in
+                                ('duration', 'ramp_up', 'ramp_down', 'arrival')
+                                if key in kwargs)
+
+        # Hold at least one pooled connection per concurrent worker
+        if kwargs.get('pool_size') is None:
+            kwargs['pool_size'] = max(self.workers(), settings['pool_size'])
+
+        self.results     = TimeSeries(histogram=kwargs.pop('histogram', False),
+                                      precision=kwargs.pop('precision', 3),
+                                      percentiles=kwargs.pop('percentiles', None) or PERCENTILES)
+        self.drifter     = Drifter(**kwargs)
+
+        # Replay requests with the validators of earlier responses
+        self.cache       = ValidatorCache(cache_size) if conditional else None
+
+        # The stopping rule of the adaptive run in progress, if any
+        self.rule        = None
+
+        # Stream every result to an append-only log as the run proceeds
+        if log:
+            self.results.sink = ResultLog(log, interval=flush, series=self.results)
+
+    def sample(self, label, method, *args, **kwargs):
+        """
+        Times a single call of the method and appends the result record to
+        the label. If the intended send time is given, latency is measured
+        from it rather than from when the request actually went out.
+
+        Failures are recorded by kind rather than aborting the run. If the
+        method returns a response (e.g. a Drifter method called with
+        raw=True) its status and size are recorded. By default its JSON is
+        decoded as part of the measured latency; in streaming mode the body
+        is read and discarded, the latency is the time to the last byte and
+        the time to the first byte is appended to the "[ttfb]" phase of the
+        label. Streamed bodies are decoded (outside of the measured time)
+        only if the runner validates responses.
+
+        If the runner records phases, the latency of every successful
+        request is also broken down into queue, dns, connect, tls, server
+        and transfer phase series of the label (see `record_phases`).
+
+        If the runner has a monitor (see drifter.dashboard) it is told when
+        the request begins and ends so it can report on the run live.
+
+        If the runner sends conditional requests (see drifter.cache), full
+        and not modified responses are also appended to the "[200]" and
+        "[304]" series of the label; the bytes of a 304 record are the body
+        bytes it saved. Streamed full responses are cached once their body
+        has been read and its size is known.
+
+        Returns the latency in milliseconds and the kind of error (if any).
+        """
+        wait   = kwargs.pop('wait', None)
+        sent   = time.time()
+        start  = kwargs.pop('intended', None) or sent
+        first  = None
+        body   = None
+        result = None
+        status = 0
+        nbytes = 0
+        error  = None
+
+        if self.phases: reset_phases()
+        if self.monitor: self.monitor.begin(label)
+
+        try:
+            result = method(*args, **kwargs)
+            if isinstance(result, Response):
+                status = result.status_code
+                if kwargs.get('stream'):
+                    first = time.time()
+                    nbytes, body = consume(result, keep=self.validate)
+                else:
+                    nbytes = len(result.content)
+                    if status == codes.ok: result.json()
+        except (Timeout, socket.timeout):
+            error = 'timeout'
+        except HTTPError as e:
+            error  = 'http'
+            status = e.response.status_code
+            nbytes = len(e.response.content)
+        except ConnectionError:
+            error = 'connection'
+        except RequestException:
+            error = 'other'
+        except ValueError:
+            error = 'invalid'
+
+        finit = time.time()
+        delta = finit - start
+
+        # Streamed bodies are only sized (and cached) once they are read
+        key = getattr(result, 'cache_key', None)
+        if key is not None and error is None and status == codes.ok:
+            self.cache.update(key, result, nbytes)
+
+        if body is not None and status == codes.ok:
+            try:
+                json.loads(body)
+            except ValueError:
+                error = 'invalid'
+
+        self.results.append(label, delta * 1000, start=start, status=status,
+                            nbytes=nbytes, error=error)
+        if self.rule is not None and error is None:
+            self.rule.record(label, delta * 1000)
+        if self.monitor:
+            self.monitor.end(label, delta * 1000, error)
+        if self.cache is not None and error is None and status in (codes.ok, codes.not_modified):
+            if status == codes.not_modified:
+                nbytes = getattr(result, 'saved', 0)
+            self.results.append(phase_label(label, str(status)), delta * 1000, start=start,
+                                status=status, nbytes=nbytes)
+        if self.phases and error is None:
+            first = self.record_phases(label, start, sent, finit, status) or first
+        if first is not None and error is None:
+            self.results.append(phase_label(label, 'ttfb'), (first - start) * 1000,
+                                start=start, status=status)
+
+        if wait: time.sleep(wait)
+        return delta * 1000, error
+
+    def record_phases(self, label, start, sent, finit, status):
+        """
+        Appends the phase breakdown of the request just made in this thread
+        to the phase series of the label, and returns the timestamp at
+        which the response headers arrived (if known). The phases are the
+        time queued before sending (open-loop only), the dns, connect and
+        tls setup of a new connection, the server time from sending the
+        request until the response headers and the transfer of the body.
+        """
+        timings  = get_phases()
+        response = timings.get('response', finit)
+        setup    = sum(timings.get(phase, 0.0) for phase in ('dns', 'connect', 'tls'))
+        phases   = {
+            'queue': sent - start,
+            'dns': timings.get('dns', 0.0),
+            'connect': timings.get('connect', 0.0),
+            'tls': timings.get('tls', 0.0),
+            'server': max(response - sent - setup, 0.0),
+            'transfer': max(finit - response, 0.0),
+        }
+
+        for phase in PHASES:
+            self.results.append(phase_label(label, phase), phases[phase] * 1000,
+                                start=start, status=status)
+        return timings.get('response')
 
     @timeit
     def execute(self, method, *args, **kwargs):
         """
-        Runs the requested method the number of times, aggregating times
+        Runs the requested method the number of times, aggregating times.
+        If the runner has a concurrency greater than one, the requests are
+        sent by a pool of worker threads, each of which waits between its
+        own requests, so that many requests are in flight at once.
+
+        If the runner has a target rate, requests are instead sent open-loop
+        on a precomputed schedule, see `open_loop`.
         """
-        wait  = kwargs.pop('wait', self.wait)
-        label = kwargs.pop('label', "run #%i" % (len(self.results) + 1))
-        pbar  = progress()
+        kwargs['wait'] = kwargs.pop('wait', self.wait)
+        if self.stream and kwargs.get('raw'):
+            kwargs['stream'] = True
+        label       = kwargs.pop('label', "run #%i" % (len(self.results) + 1))
+        concurrency = kwargs.pop('concurrency', self.concurrency)
 
-        for idx in pbar(xrange(0, self.runs)):
-            start = time.time()
+        def task(**extra):
+            self.sample(label, method, *args, **dict(kwargs, **extra))
 
-            try:
-                data  = method(*args, **kwargs)
-            except (Timeout, socket.timeout):
-                self.results.append(label, -1)
-                continue
+        return self.drive(task, [label], concurrency)
 
-            finit = time.time()
-            delta = finit - start
-            self.results.append(label, delta * 1000)
+    def drive(self, task, labels, concurrency=None):
+        """
+        Calls the task the number of runs times (or on the open-loop
+        schedule), sequentially or from a pool of concurrency workers,
+        and adds the elapsed time to each of the labels it records.
 
-            if wait: time.sleep(wait)
+        If the runner converges, the runs are a budget and the task is
+        called until the stopping rule is satisfied, see `adaptive`.
+        """
+        concurrency = concurrency or self.concurrency
+        pbar        = iter if self.quiet else progress(self.runs)
+
+        # Create the series up front so workers only ever append to them.
+        for label in labels:
+            self.results.extend(label, [])
+        started   = time.time()
+        self.rule = self.stopping_rule(labels)
+
+        if self.rate:
+            self.open_loop(task, concurrency)
+        elif self.rule is not None:
+            self.adaptive(task, concurrency)
+        elif concurrency > 1:
+            pool = ThreadPool(concurrency)
+            try:
+                for _ in pbar(pool.imap_unordered(lambda idx: task(), xrange(0, self.runs))):
+                    pass
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for idx in pbar(xrange(0, self.runs)):
+                task()
+
+        self.add_elapsed(labels, time.time() - started)
+        if self.rule is not None:
+            self.results.meta.setdefault('convergence', {}).update(
+                (label, self.rule.summary(label)) for label in labels
+            )
+            self.rule = None
+        return self.results[labels[0]] if len(labels) == 1 else self.results
+
+    def stopping_rule(self, labels):
+        """
+        Returns a StoppingRule tracking the labels if the runner converges
+        (see drifter.adaptive), otherwise None.
+        """
+        if not self.converge:
+            return None
+        rule = StoppingRule(self.converge, **self.stopping)
+        rule.track(labels)
+
+        # Percentile intervals need enough samples to fall within the data
+        required = rule.required()
+        if required > self.runs:
+            sys.stderr.write(
+                "Warning: resolving %s at %g%% confidence needs at least %i successful "
+                "requests per label but the run sends at most %i; raise -n\n" % (
+                    ", ".join(str(target) for target in self.converge),
+                    rule.confidence * 100, required, self.runs
+                )
+            )
+        return rule
+
+    def adaptive(self, task, concurrency):
+        """
+        Calls the task until the stopping rule of the run is done: every
+        check requests the rule records the latencies sampled so far and
+        decides whether the estimates have converged or the budget of
+        runs (or seconds) is spent. Workers are handed a new request as
+        soon as one is free, so the pool stays busy between checks.
+        """
+        rule  = self.rule
+        check = max(CHECK_EVERY, concurrency)
+        pbar  = iter if self.quiet else progress(self.runs)
+
+        def requests():
+            sent = 0
+            while True:
+                yield sent
+                sent += 1
+                if sent % check == 0 or sent >= self.runs:
+                    if rule.done(sent, self.runs): return
+
+        if concurrency == 1:
+            for _ in pbar(requests()):
+                task()
+            return
+
+        pool   = ThreadPool(concurrency)
+        slots  = threading.Semaphore(concurrency)
+        errors = []
+
+        def work():
+            try:
+                task()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                slots.release()
+
+        try:
+            for _ in pbar(requests()):
+                slots.acquire()
+                if errors: break
+                pool.apply_async(work)
+        finally:
+            pool.close()
+            pool.join()
+
+        # Re-raise any exceptions from the workers
+        if errors:
+            raise errors[0]
+
+    def add_elapsed(self, labels, elapsed):
+        """
+        Adds the elapsed seconds of a run to each of its labels
+        """
+        for label in labels:
+            self.results.elapsed[label] += elapsed
+            if self.results.sink is not None:
+                self.results.sink.metadata(elapsed={label: self.results.elapsed[label]})
 
-        return self.results[label]
+    def workers(self, concurrency=None):
+        """
+        Returns the number of workers that send requests: the concurrency,
+        unless it was not given and the runner sends open-loop, in which
+        case enough workers to keep requests of the runner's expected
+        latency in flight at its rate (see `in_flight`).
+        """
+        concurrency = concurrency or self.concurrency
+        if self.rate and not self.bounded:
+            return max(concurrency, in_flight(self.rate, self.latency))
+        return concurrency
 
-    def get_runner(self, endpoint, default=None):
+    def open_loop(self, task, concurrency):
         """
-        Returns the runner function for the specified endpoint.
+        Calls the task at the runner's target rate regardless of how fast
+        responses come back. The workers (see `workers`) bound the number
+        of requests in flight; if every worker is busy, requests queue and
+        the queueing delay is included in their latency. The fraction of
+        requests sent while every worker was busy is kept as the runner's
+        late fraction and a warning is written if the run was client bound. If
+        the runner converges, the rest of the schedule is dropped once the
+        stopping rule is done.
         """
-        action = "%s_runner" % endpoint
-        if hasattr(self, action):
-            action = getattr(self, action)
-            if callable(action):
-                return action
-        return default
+        runs     = None if self.schedule.get('duration') else self.runs
+        schedule = Schedule(self.rate, runs=runs, **self.schedule)
+        offsets  = schedule.offsets()
+        pbar     = iter if self.quiet else progress(len(offsets))
+        workers  = self.workers(concurrency)
+        pool     = ThreadPool(workers)
+        pending  = []
+        late     = []
+        busy     = [0]
+        lock     = threading.Lock()
+
+        def work(intended):
+            try:
+                task(intended=intended, wait=None)
+            finally:
+                with lock:
+                    busy[0] -= 1
+
+        try:
+            epoch = time.time()
+            for idx, offset in enumerate(pbar(offsets)):
+                # Stop the schedule early once the stopping rule is done
+                if self.rule is not None and idx and idx % CHECK_EVERY == 0:
+                    if self.rule.done(idx): break
+
+                intended = epoch + offset
+                delay    = intended - time.time()
+                if delay > 0: time.sleep(delay)
+
+                # Requests sent while every worker is busy queue for one
+                with lock:
+                    if busy[0] >= workers: late.append(intended)
+                    busy[0] += 1
+                pending.append(pool.apply_async(work, (intended,)))
+        finally:
+            pool.close()
+            pool.join()
+
+        self.late = float(len(late)) / len(pending) if pending else 0.0
+        if self.late > LATE_FRACTION:
+            sys.stderr.write(
+                "Warning: %i of %i requests queued for one of %i busy workers; "
+                "the run is client bound, raise -c\n" % (len(late), len(pending), workers)
+            )
+
+        # Re-raise any exceptions from the workers
+        for result in pending:
+            result.get()
+
+    def template(self, request, variables=None):
+        """
+        Compiles a request (a RequestConfiguration, a dictionary or the
+        name of a built in endpoint) into a RequestTemplate for the runner's
+        api_root and api_key.
+        """
+        if isinstance(request, basestring):
+            request = endpoint(request)
+        return RequestTemplate(request, self.drifter.api_root, self.drifter.api_key, variables)
 
-    def categories_runner(self, label="GET /categories", **kwargs):
+    def send(self, template, raw=True, prepared=None, **kwargs):
+        """
+        Prepares the next request of a template (unless it was prepared)
+        and sends it, with the validators of the last full response to it
+        if the runner sends conditional requests.
         """
-        Runs the category endpoint for times
+        url, headers, body = prepared or template.prepare()
+        if self.cache is None:
+            return self.drifter.send(template.method, url, headers=headers, data=body, **kwargs)
+
+        key = self.cache.key(template.method, url, headers)
+        headers, validators = self.cache.conditional(key, headers)
+        response = self.drifter.send(template.method, url, headers=headers, data=body, **kwargs)
+        if response.status_code == codes.not_modified:
+            response.saved = validators.nbytes if validators else 0
+        elif response.status_code == codes.ok and kwargs.get('stream'):
+            response.cache_key = key
+        elif response.status_code == codes.ok:
+            self.cache.update(key, response, len(response.content))
+        return response
+
+    def request(self, request, label=None, **kwargs):
         """
-        endpoint = self.drifter.build_endpoint('categories')
-        return self.execute(self.drifter.get, endpoint, label=label, **kwargs)
+        Runs a single kind of request (a RequestConfiguration, a dictionary
+        or the name of a built in endpoint) the number of runs times.
+        """
+        template = self.template(request)
+        return self.execute(self.send, template, label=label or template.name, raw=True, **kwargs)
 
-    def brands_runner(self, label="GET /merchants", **kwargs):
+    @timeit
+    def scenario(self, scenario, seed=None, label_by=None):
         """
-        Runs the brands endpoint for times
+        Runs the weighted mix of requests of a scenario: each of the runs
+        (or each request of the open-loop schedule) is drawn at random in
+        proportion to the weights and recorded under the request's name.
+        The requests are compiled into templates before the run starts.
+
+        The requests and the values of their variables are drawn from one
+        random state, so runs with a seed choose the same sequence. Results
+        are recorded under the request's name with the values chosen for
+        the variables it names, e.g. "GET /sizes ({format})" is recorded
+        as "GET /sizes (full)" (see RequestTemplate.label). If label_by
+        names variables, results are labelled by those instead.
         """
-        endpoint = self.drifter.build_endpoint('merchants')
-        return self.execute(self.drifter.get, endpoint, label=label, **kwargs)
+        templates = [self.template(request, scenario.variables) for request in scenario.requests]
+        scheduler = WeightedScheduler(templates, seed=seed)
+        params    = {'stream': True} if self.stream else {}
+        wait      = self.wait
+        labels    = []
+
+        if label_by and self.converge:
+            raise ValueError("Runs labelled by variables cannot converge")
+
+        def task(intended=None, wait=wait):
+            template = scheduler.next()
+            prepared = template.prepare(scheduler.choose)
+            keys     = label_by or template.named
+            label    = template.label(prepared.context, keys) if keys else template.name
+            if label_by and label not in labels:
+                with scheduler.lock:
+                    if label not in labels: labels.append(label)
+            self.sample(label, self.send, template, prepared=prepared,
+                        intended=intended, wait=wait, **params)
+
+        # Series labelled by any variable are only known as their values
+        # are chosen, so the labels are collected during the run; those of
+        # the variables in the names are known up front
+        if not label_by:
+            for template in templates:
+                labels.extend(label for label in template.labels(template.named) if label not in labels)
+        return self.drive(task, labels)
 
-    def sizes_runner(self, label="GET /sizes", **kwargs):
+    @timeit
+    def users(self, scenario, users=100, duration=None, journeys=None, ramp_up=0.0, seed=None):
         """
-        Runs the sizes endpoint for times
+        Runs the flows of a scenario with virtual users (see
+        drifter.users.UserEngine), using the runner's concurrency (if it
+        was given, otherwise one per user) as the number of worker threads
+        the users share, and warns if steps queued for busy workers. Users
+        run their journeys to the end, so the run cannot converge early.
         """
-        endpoint = self.drifter.build_endpoint('sizes')
-        return self.execute(self.drifter.get, endpoint, label=label, **kwargs)
+        if self.converge:
+            raise ValueError("Virtual users run their journeys and cannot converge")
+        engine = UserEngine(self, scenario, users=users, duration=duration,
+                            journeys=journeys, ramp_up=ramp_up, seed=seed)
+        for label in engine.labels:
+            self.results.extend(label, [])
+
+        started = time.time()
+        engine.run()
+        self.add_elapsed(engine.labels, time.time() - started)
+
+        self.late = engine.late
+        if self.late > LATE_FRACTION:
+            sys.stderr.write(
+                "Warning: %i of %i steps queued for one of %i busy workers; "
+                "the run is client bound, raise -c\n" % (engine.queued, engine.sent, engine.workers)
+            )
+        return self.results
 
     def run(self, endpoints, labels=None, prompt=False, **kwargs):
         """
-        Runs a set of endpoints in a complete fashion.
+        Runs a set of endpoints (built in endpoint names or request
+        configurations), one after the other.
         """
         times = []
-        for idx, endpoint in enumerate(endpoints):
+        for idx, item in enumerate(endpoints):
             if prompt and idx > 0:
                 wait_for_return()
 
-            action = self.get_runner(endpoint)
-            if action is None:
-                raise Exception("Could not find runner for endpoint '%s'" % endpoint)
-
-            if labels:
-                _, time = action(label=labels[idx], **kwargs)
-            else:
-                _, time = action(**kwargs)
+            label   = labels[idx] if labels else None
+            _, time = self.request(item, label=label, **kwargs)
             times.append(time)
 
         return times
 
+    def close(self):
+        """
+        Flushes and closes the result log (if any) and the API session
+        """
+        if self.results.sink is not None:
+            self.results.sink.close()
+        self.drifter.close()
+
     def display(self, title=None, **kwargs):
         """
         Graphs the results of the runner
@@ -0,0 +1,270 @@
+# drifter.scenario
+# Declarative scenarios describing the mix of requests to run
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 19:52:06 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: scenario.py [] benjamin@bengfort.com $
+
+"""
+Declarative scenarios describing the mix of requests to run.
+
+A scenario is a YAML file loaded with the drifter.conf Configuration
+machinery, for example:
+
+    name: projections
+    variables:
+        format: [light, normal, full]
+    requests:
+        - name: GET /categories ({format})
+          path: categories
+          params: {format: "{format}"}
+          weight: 3
+        - name: POST /items
+          method: POST
+          path: users/me/items
+          body: {"product": "{product}"}
+          weight: 1
+
+Every request has a method (GET by default), a path relative to the
+api_root, query params, headers, a body template and a weight. Strings in
+the path, params, headers and body may refer to the scenario variables
+(or to variables of the request itself) in str.format style; each request
+picks a random value for every variable that is a list. Requests are
+filled by their compiled drifter.template.RequestTemplate. The name of a
+request is the label its results are recorded under, with the values
+chosen for the variables it names, so "GET /categories ({format})" is
+recorded as "GET /categories (light)", "GET /categories (full)" and so on.
+
+A WeightedScheduler draws the requests of a scenario in proportion to
+their weights, so that a run sends the whole mix at once.
+
+Scenarios can also describe the flows of virtual users (see drifter.users)
+as scripted steps with think times between them:
+
+    api_keys: [key-one, key-two]
+    think: {distribution: exponential, mean: 2.0}
+    flows:
+        - name: browse
+          weight: 3
+          steps:
+              - path: categories
+              - path: merchants
+                think: {distribution: uniform, min: 5, max: 10}
+              - path: sizes
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import yaml
+import threading
+import numpy as np
+
+from copy import deepcopy
+from drifter.conf import Configuration
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+# Number of requests the scheduler draws at a time
+BATCH = 4096
+
+##########################################################################
+## Scenario Configuration
+##########################################################################
+
+class RequestConfiguration(Configuration):
+    """
+    A single kind of request in a scenario.
+
+    name: the label of the request's results (default "METHOD /path")
+    method: the HTTP method of the request
+    path: the endpoint relative to the api_root
+    params: query parameters, e.g. {format: light}
+    headers: additional request headers
+    body: a template of the JSON body of the request
+    weight: the relative frequency of the request in the mix
+    variables: values of the placeholders of this request
+    think: the think time after this step of a flow
+    """
+    name            = None
+    method          = "GET"
+    path            = ""
+    params          = None
+    headers         = None
+    body            = None
+    weight          = 1.0
+    variables       = None
+    think           = None
+
+    def serialize(self):
+        return dict(self.options())
+
+class ScenarioConfiguration(Configuration):
+    """
+    A mix of requests to run, loaded from a YAML scenario file.
+
+    name: the name of the scenario
+    variables: values of the placeholders shared by every request
+    requests: the list of requests in the mix
+    flows: the scripted flows of virtual users
+    think: the default think time between the steps of a flow
+    api_keys: API keys handed out to virtual users in turn
+    """
+    name            = "scenario"
+    variables       = None
+    requests        = None
+    flows           = None
+    think           = None
+    api_keys        = None
+
+    @classmethod
+    def load_file(klass, path):
+        """
+        Loads a scenario from a YAML file at path
+        """
+        config = klass()
+        with open(path, 'r') as conf:
+            config.configure(yaml.safe_load(conf))
+        return config
+
+    @classmethod
+    def deserialize(klass, data):
+        config = klass()
+        config.configure(deepcopy(data))
+        return config
+
+    def configure(self, conf={}):
+        super(ScenarioConfiguration, self).configure(conf)
+        self.requests = [request_configuration(item) for item in self.requests or []]
+        self.flows    = [flow_configuration(item) for item in self.flows or []]
+        if any(item.weight < 0 for item in self.requests + self.flows):
+            raise ValueError("Scenario weights cannot be negative")
+
+    def serialize(self):
+        data = dict(self.options())
+        data['requests'] = [item.serialize() for item in self.requests]
+        data['flows']    = [item.serialize() for item in self.flows]
+        return data
+
+class FlowConfiguration(Configuration):
+    """
+    A scripted journey of a virtual user through a list of steps.
+
+    name: the name of the flow, which prefixes the labels of its steps
+    weight: the relative frequency of the flow among the flows
+    think: the think time between steps (overrides the scenario's)
+    steps: the list of requests of the flow, in order
+    """
+    name            = "flow"
+    weight          = 1.0
+    think           = None
+    steps           = None
+
+    def configure(self, conf={}):
+        super(FlowConfiguration, self).configure(conf)
+        self.steps = [request_configuration(item) for item in self.steps or []]
+
+    def serialize(self):
+        data = dict(self.options())
+        data['steps'] = [item.serialize() for item in self.steps]
+        return data
+
+def flow_configuration(item):
+    """
+    Returns a FlowConfiguration from a dictionary (or itself)
+    """
+    if isinstance(item, FlowConfiguration):
+        return item
+    config = FlowConfiguration()
+    config.configure(dict(item))
+    return config
+
+def request_configuration(item):
+    """
+    Returns a RequestConfiguration from a dictionary (or itself)
+    """
+    if isinstance(item, RequestConfiguration):
+        return item
+    config = RequestConfiguration()
+    config.configure(dict(item))
+    config.method = config.method.upper()
+    config.name   = config.name or "%s /%s" % (config.method, config.path)
+    return config
+
+##########################################################################
+## Built in endpoints
+##########################################################################
+
+# The Phoenix-API endpoints that drifter has always tested
+ENDPOINTS = {
+    'categories': {'name': 'GET /categories', 'path': 'categories'},
+    'brands': {'name': 'GET /merchants', 'path': 'merchants'},
+    'sizes': {'name': 'GET /sizes', 'path': 'sizes'},
+}
+
+def endpoint(name, method=None):
+    """
+    Returns the RequestConfiguration of a built in endpoint by name, with
+    the method overridden if given.
+    """
+    if name not in ENDPOINTS:
+        raise KeyError("Unknown endpoint '%s'" % name)
+    config = request_configuration(ENDPOINTS[name])
+    if method and method.upper() != config.method:
+        config.method = method.upper()
+        config.name   = "%s /%s" % (config.method, config.path)
+    return config
+
+##########################################################################
+## Weighted Scheduler
+##########################################################################
+
+class WeightedScheduler(object):
+    """
+    Draws the requests of a scenario in proportion to their weights. Draws
+    are made in batches with a vectorized inverse CDF lookup, and are
+    thread safe so that concurrent workers can share one scheduler.
+    """
+
+    def __init__(self, requests, seed=None):
+        self.requests = list(requests)
+        weights       = np.asarray([item.weight for item in self.requests], dtype=np.float64)
+        if not len(weights) or weights.sum() <= 0:
+            raise ValueError("Scenario has no requests with a positive weight")
+
+        self.cumulative = np.cumsum(weights) / weights.sum()
+        self.random     = np.random.RandomState(seed)
+        self.buffer     = []
+        self.lock       = threading.Lock()
+
+    def draw(self, count):
+        """
+        Returns an array of count request indices
+        """
+        index = np.searchsorted(self.cumulative, self.random.random_sample(count), side='right')
+        return np.minimum(index, len(self.requests) - 1)
+
+    def next(self):
+        """
+        Returns the next request to send
+        """
+        with self.lock:
+            if not self.buffer:
+                self.buffer = self.draw(BATCH).tolist()
+                self.buffer.reverse()
+            return self.requests[self.buffer.pop()]
+
+    def choose(self, values):
+        """
+        Returns one of the values, drawn from the scheduler's random state
+        so that seeded runs choose the variables of requests repeatably
+        """
+        with self.lock:
+            return values[self.random.randint(len(values))]
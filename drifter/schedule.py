@@ -0,0 +1,145 @@
+# drifter.schedule
+# Open-loop arrival schedules for constant rate load generation
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 10:02:13 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: schedule.py [] benjamin@bengfort.com $
+
+"""
+Open-loop arrival schedules for constant rate load generation.
+
+A schedule computes, up front, the time at which every request is intended
+to be sent, independently of how quickly the server responds. Sending on
+this schedule (rather than sleeping after each response) avoids
+coordinated omission: when the server slows down, requests queue up and
+their latency is measured from the intended send time.
+
+The offered rate ramps linearly from zero to the target rate, holds it
+steady, then ramps linearly back to zero.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+ARRIVALS = ('uniform', 'poisson')
+
+##########################################################################
+## Schedule
+##########################################################################
+
+class Schedule(object):
+    """
+    Computes intended send offsets (in seconds from the start of the run)
+    for a target rate in requests per second.
+
+    Either the steady state duration or the total number of requests can
+    be given; if only runs is given the steady duration is computed so
+    that approximately that many requests are offered.
+    """
+
+    def __init__(self, rate, runs=None, duration=None, ramp_up=0.0,
+                 ramp_down=0.0, arrival='uniform', seed=None):
+        if rate is None or rate <= 0:
+            raise ValueError("Schedule rate must be a positive number")
+        if arrival not in ARRIVALS:
+            raise ValueError("Unknown arrival process '%s'" % arrival)
+        if runs is None and duration is None:
+            raise ValueError("Schedule requires either runs or duration")
+
+        self.rate      = float(rate)
+        self.runs      = runs
+        self.ramp_up   = float(ramp_up or 0)
+        self.ramp_down = float(ramp_down or 0)
+        self.arrival   = arrival
+        self.random    = np.random.RandomState(seed)
+
+        if duration is None:
+            duration = float(runs) / self.rate - (self.ramp_up + self.ramp_down) / 2.0
+        self.duration  = max(float(duration), 0.0)
+
+    @property
+    def length(self):
+        """
+        Total wall clock length of the schedule in seconds
+        """
+        return self.ramp_up + self.duration + self.ramp_down
+
+    @property
+    def expected(self):
+        """
+        The expected number of requests offered over the whole schedule
+        """
+        return self.rate * (self.ramp_up / 2.0 + self.duration + self.ramp_down / 2.0)
+
+    def rate_at(self, t):
+        """
+        Returns the offered rate at offset t (vectorized over arrays)
+        """
+        t     = np.asarray(t, dtype=float)
+        up    = self.ramp_up
+        down  = up + self.duration
+        rates = np.full(t.shape, self.rate)
+        if up > 0:
+            rates = np.where(t < up, self.rate * t / up, rates)
+        if self.ramp_down > 0:
+            rates = np.where(t > down, self.rate * (self.length - t) / self.ramp_down, rates)
+        return np.clip(np.where((t < 0) | (t > self.length), 0, rates), 0, self.rate)
+
+    def invert(self, y):
+        """
+        Inverts the cumulative arrival function: given a cumulative count
+        of expected requests, returns the offset at which it is reached.
+        """
+        y   = np.asarray(y, dtype=float)
+        r   = self.rate
+        U   = self.ramp_up
+        S   = self.duration
+        D   = self.ramp_down
+        a   = r * U / 2.0
+        b   = a + r * S
+
+        # Each piece is computed for every element and then selected
+        rise = np.sqrt(2.0 * U * np.clip(y, 0, a) / r)
+        flat = U + (y - a) / r
+        z    = np.clip((y - b) / r, 0, D / 2.0)
+        fall = U + S + D - np.sqrt(np.clip(D * D - 2.0 * D * z, 0, None))
+
+        return np.where(y < a, rise, np.where(y <= b, flat, fall))
+
+    def offsets(self):
+        """
+        Returns a sorted array of the intended send offsets in seconds.
+        """
+        total = self.expected
+        if self.runs is not None:
+            total = min(total, self.runs)
+
+        if self.arrival == 'uniform':
+            targets = np.arange(0, int(np.ceil(total)), dtype=float)
+        else:
+            # Draw more exponential gaps than needed, then truncate
+            size    = int(total + 6 * np.sqrt(total + 1) + 10)
+            targets = np.cumsum(self.random.exponential(1.0, size))
+            targets = targets[targets < total]
+
+        if self.runs is not None:
+            targets = targets[:self.runs]
+        return self.invert(targets)
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __iter__(self):
+        for offset in self.offsets():
+            yield offset
@@ -17,11 +17,286 @@ A statistics package for drifter results.
 ## Imports
 ##########################################################################
 
+import re
+import cgi
 import json
+import threading
 import numpy as np
 
-from collections import defaultdict
-from drifter.chart import chart_times
+from functools import partial
+from drifter.histogram import Histogram
+from collections import defaultdict, OrderedDict, Counter
+from drifter.chart import chart_times, chart_distribution, chart_phases
+from drifter.chart import chart_bands, chart_histogram, chart_cdf, chart_heatmap
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Label suffix format of the series that hold the phases of a request
+PHASE       = "%s [%s]"
+SIDE        = re.compile(r'^(.+) \[([^\[\]]+)\]$')
+
+# The phases a request's latency is broken down into, in order
+PHASES      = ('queue', 'dns', 'connect', 'tls', 'server', 'transfer')
+
+# The kinds of failure a request can end in; index 0 is success
+ERRORS      = ('success', 'timeout', 'connection', 'http', 'other', 'invalid')
+
+# The kinds of chart a TimeSeries can display
+CHARTS      = ('times', 'bands', 'histogram', 'cdf', 'heatmap')
+
+# A single request result as stored in a Records buffer
+RECORD      = np.dtype([
+    ('start', np.float64),      # epoch seconds the request was (meant to be) sent
+    ('latency', np.float64),    # milliseconds until the response or failure
+    ('status', np.int16),       # HTTP status code, 0 if there was no response
+    ('bytes', np.int64),        # bytes of response body received
+    ('error', np.uint8),        # index into ERRORS
+])
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def phase_label(label, phase):
+    """
+    Returns the label of the series holding a phase of a request series,
+    e.g. "GET /sizes [ttfb]"
+    """
+    return PHASE % (label, phase)
+
+def parent_label(label):
+    """
+    Returns the label of the request series that a phase (or other side
+    series, e.g. "GET /sizes [304]") label belongs to, or None
+    """
+    match = SIDE.match(label)
+    return match.group(1) if match else None
+
+def pkey(q):
+    """
+    Returns the statistics key for a percentile, e.g. p99.9
+    """
+    return "p%g" % q
+
+def quantiles(ordered, percentiles):
+    """
+    Linearly interpolated percentiles of an already sorted array, computed
+    by indexing rather than re-sorting for every percentile.
+    """
+    ranks = np.asarray(percentiles, dtype=np.float64) / 100.0 * (len(ordered) - 1)
+    lower = np.floor(ranks).astype(np.int64)
+    upper = np.minimum(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (ranks - lower)
+
+def summarize(values, percentiles=PERCENTILES):
+    """
+    Computes the latency summary of an array of samples with one sort and
+    one dot product: count, mean, median, stddev, variance, min, max and
+    the requested percentiles.
+    """
+    ordered = np.sort(np.asarray(values, dtype=np.float64))
+    count   = len(ordered)
+    stats   = OrderedDict([('count', count)])
+    if not count:
+        return stats
+
+    qs       = quantiles(ordered, (50,) + tuple(percentiles))
+    mean     = ordered.sum() / count
+    centered = ordered - mean
+    variance = np.dot(centered, centered) / count
+
+    stats['mean']     = mean
+    stats['median']   = qs[0]
+    stats['stddev']   = np.sqrt(variance)
+    stats['variance'] = variance
+    stats['min']      = ordered[0]
+    stats['max']      = ordered[-1]
+    for q, val in zip(percentiles, qs[1:]):
+        stats[pkey(q)] = val
+    return stats
+
+def histogram_summary(histogram, percentiles=PERCENTILES):
+    """
+    Computes the latency summary (see summarize) of a Histogram
+    """
+    stats = OrderedDict([('count', histogram.count)])
+    if histogram.count:
+        qs = histogram.percentile((50,) + tuple(percentiles))
+        stats['mean']     = histogram.mean()
+        stats['median']   = qs[0]
+        stats['stddev']   = histogram.stddev()
+        stats['variance'] = histogram.variance()
+        stats['min']      = histogram.min()
+        stats['max']      = histogram.max()
+        for q, val in zip(percentiles, qs[1:]):
+            stats[pkey(q)] = val
+    return stats
+
+def batch_summarize(ragged, percentiles=PERCENTILES):
+    """
+    Computes the latency summary (see summarize) of every series of a
+    Ragged array at once: the sums of every series with reduceat and the
+    percentiles of every series by indexing into the sorted values.
+    Returns the summaries in order of the series. The series are sorted
+    in place.
+    """
+    ordered = ragged.sort()
+    values  = ordered.values
+    counts  = ordered.counts
+    full    = np.flatnonzero(counts)
+    summary = [OrderedDict([('count', int(count))]) for count in counts]
+    if not len(full):
+        return summary
+
+    count  = counts[full]
+    starts = ordered.offsets[full]
+    ranks  = np.asarray((50,) + tuple(percentiles), dtype=np.float64) / 100.0
+    ranks  = ranks[np.newaxis, :] * (count - 1)[:, np.newaxis]
+    lower  = np.floor(ranks).astype(np.int64)
+    upper  = np.minimum(lower + 1, (count - 1)[:, np.newaxis])
+    low    = values[starts[:, np.newaxis] + lower]
+    qs     = low + (values[starts[:, np.newaxis] + upper] - low) * (ranks - lower)
+
+    mean     = np.add.reduceat(values, starts) / count
+    centered = values - np.repeat(mean, count)
+    variance = np.add.reduceat(np.square(centered, out=centered), starts) / count
+
+    for idx, pos in enumerate(full):
+        stats = summary[pos]
+        stats['mean']     = mean[idx]
+        stats['median']   = qs[idx, 0]
+        stats['stddev']   = np.sqrt(variance[idx])
+        stats['variance'] = variance[idx]
+        stats['min']      = values[starts[idx]]
+        stats['max']      = values[starts[idx] + count[idx] - 1]
+        for q, val in zip(percentiles, qs[idx, 1:]):
+            stats[pkey(q)] = val
+    return summary
+
+def format_stat(val):
+    """
+    Formats counts as integers and everything else to three places
+    """
+    if isinstance(val, (int, long, np.integer)):
+        return "%i" % val
+    return "%0.3f" % val
+
+##########################################################################
+## Result Records
+##########################################################################
+
+class Records(object):
+    """
+    A growable numpy structured array of RECORD results. Capacity doubles
+    as it fills so that appends are amortized constant time and the
+    records stay contiguous in memory.
+    """
+
+    def __init__(self, capacity=256):
+        self.buffer = np.zeros(capacity, dtype=RECORD)
+        self.size   = 0
+
+    @classmethod
+    def wrap(klass, array):
+        """
+        Wraps an existing (e.g. memory-mapped) RECORD array without copying
+        it; the array is only copied if more records are appended.
+        """
+        instance = klass(0)
+        instance.buffer = array
+        instance.size   = len(array)
+        return instance
+
+    @property
+    def array(self):
+        """
+        A view of the filled portion of the buffer
+        """
+        return self.buffer[:self.size]
+
+    def reserve(self, count):
+        """
+        Ensures there is room for count more records
+        """
+        needed = self.size + count
+        if needed > len(self.buffer):
+            buffer = np.zeros(max(needed, 2 * len(self.buffer)), dtype=RECORD)
+            buffer[:self.size] = self.array
+            self.buffer = buffer
+
+    def append(self, start, latency, status=0, nbytes=0, error=0):
+        """
+        Appends a single result record
+        """
+        self.reserve(1)
+        self.buffer[self.size] = (start, latency, status, nbytes, error)
+        self.size += 1
+
+    def extend(self, records):
+        """
+        Appends a structured array of result records
+        """
+        records = np.asarray(records, dtype=RECORD)
+        self.reserve(len(records))
+        self.buffer[self.size:self.size + len(records)] = records
+        self.size += len(records)
+
+    def __getitem__(self, field):
+        return self.array[field]
+
+    def __len__(self):
+        return self.size
+
+##########################################################################
+## Ragged Arrays
+##########################################################################
+
+class Ragged(object):
+    """
+    Many series of values of different lengths stored contiguously as a
+    flat array of the values and the offsets of each series, so that
+    series i is values[offsets[i]:offsets[i + 1]] and operations over all
+    of the series are single numpy passes over the flat values.
+    """
+
+    def __init__(self, values, offsets):
+        self.values  = np.asarray(values, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def concatenate(klass, arrays):
+        """
+        Copies a sequence of arrays into a single ragged array
+        """
+        arrays  = [np.asarray(array, dtype=np.float64) for array in arrays]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(array) for array in arrays])
+        values  = np.concatenate(arrays) if arrays else np.zeros(0)
+        return klass(values, offsets)
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    def sort(self):
+        """
+        Sorts the values of every series in place. The series are sorted
+        one by one: sorting the flat values by series and value at once
+        (e.g. with lexsort) is several times slower.
+        """
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            if end - start > 1: self.values[start:end].sort()
+        return self
+
+    def __getitem__(self, idx):
+        return self.values[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
 
 ##########################################################################
 ## Time Series
@@ -30,155 +305,519 @@ from drifter.chart import chart_times
 class TimeSeries(object):
     """
     An object that holds a dictionary of various time series for display.
+
+    By default every request result is kept as a RECORD (start time,
+    latency, status, bytes and error kind) in a compact structured array.
+    With histogram=True only successful latencies are recorded into a
+    constant memory HDR-style Histogram with the given number of
+    significant digits of precision. In both cases latency statistics are
+    computed over successful requests only and failures are counted by
+    kind of error: failures holds the raw Counter of every series, and
+    errors(series) returns the count of every kind of error in ERRORS
+    order, zeros included, which is what callers should use.
+
+    The percentiles reported by statistics can be configured, and the
+    runner records the elapsed wall time of each series so that the
+    throughput can be reported.
+
+    If a sink (e.g. a drifter.store.ResultLog) is assigned, every result
+    appended or extended is also written to it as it arrives.
+
+    Latency summaries are cached by series and recomputed only for the
+    series that have changed since, all of them at once (see
+    batch_summarize over a Ragged array of their latencies).
+
+    The phases of a request series and its other side series (see
+    phase_label, e.g. "GET /sizes [ttfb]" or "GET /sizes [304]") are kept
+    with it, but iterating, counting, statistics and comparisons only
+    cover the request series; see labels to include the side series.
     """
 
     @classmethod
     def load(klass, stream):
         """
-        Load a stats object from a JSON data file on disk
+        Load a stats object from a JSON data file on disk. Lists of floats
+        (the original format) are loaded as latencies, where negative
+        values mark timeouts.
+        """
+        return klass.deserialize(json.load(stream))
+
+    @classmethod
+    def deserialize(klass, data):
+        """
+        Constructs a stats object from the dictionary form of serialize
         """
-        instance = klass()
-        data     = json.load(stream)
+        compact  = any('counts' in series for series in data.values()
+                       if isinstance(series, dict))
+        instance = klass(histogram=compact)
         for label, series in data.items():
-            instance.extend(label, series)
+            if isinstance(series, dict) and compact:
+                instance[label] = Histogram.deserialize(series)
+                instance.failures[label].update(series.get('errors', {}))
+            elif isinstance(series, dict):
+                records = np.zeros(len(series['latency']), dtype=RECORD)
+                for field in RECORD.names:
+                    records[field] = series[field]
+                instance.extend(label, records)
+            else:
+                instance.extend(label, series)
+
+            if isinstance(series, dict) and series.get('elapsed'):
+                instance.elapsed[label] = series['elapsed']
         return instance
 
-    def __init__(self):
-        self.data = defaultdict(list)
+    def __init__(self, histogram=False, precision=3, percentiles=PERCENTILES):
+        self.histogram   = histogram
+        self.precision   = precision
+        self.percentiles = tuple(percentiles)
+        self.failures    = defaultdict(Counter)
+        self.elapsed     = defaultdict(float)
+        self.meta        = {}
+        self.sink        = None
+        self.lock        = threading.Lock()
+        self.versions    = Counter()
+        self.summaries   = {}
+
+        if histogram:
+            self.data = defaultdict(partial(Histogram, precision))
+        else:
+            self.data = defaultdict(Records)
 
     def __getitem__(self, series):
-        return np.array(self.data[series])
+        if self.histogram:
+            return self.data[series]
+        return self.latencies(series)
 
     def __setitem__(self, series, val):
         self.data[series] = val
+        self.versions[series] += 1
 
     def __contains__(self, series):
         return series in self.data
 
     def __iter__(self):
-        for item in self.data:
+        for item in self.labels():
             yield item
 
     def __len__(self):
-        return len(self.data)
+        return len(self.labels())
+
+    def labels(self, sides=False):
+        """
+        Returns the labels of the request series, and of their phase and
+        other side series if sides is True
+        """
+        if sides:
+            return list(self.data)
+        return [label for label in self.data if not self.is_side(label)]
+
+    def is_side(self, series):
+        """
+        Returns True if the series is a phase or other side series of a
+        request series (e.g. "GET /sizes [ttfb]" of "GET /sizes")
+        """
+        return parent_label(series) in self.data
 
     def items(self):
         """
-        Iterate through series, values pairs of data
+        Iterate through series, values pairs of the request series where
+        the values are the successful latencies (or the histogram of them)
         """
-        for item in self.data.items():
-            yield item
+        for label in self.labels():
+            yield label, self[label]
 
     def get(self, series, default=None):
         """
         Get a timeseries if exists, else default
         """
-        return self.data.get(series, default)
+        if series not in self.data:
+            return default
+        return self[series]
 
     def pop(self, series, default=None):
         """
         Pop a timeseries if exists, else default
         """
-        return self.data.pop(series, default)
+        value = self.get(series, default)
+        self.data.pop(series, None)
+        self.failures.pop(series, None)
+        self.summaries.pop(series, None)
+        self.versions[series] += 1
+        return value
 
-    def append(self, series, value):
+    def append(self, series, value, start=None, status=0, nbytes=0, error=None):
         """
-        Append a value to a particular timeseries
+        Append a result to a particular timeseries. The error is the name
+        of a kind of failure in ERRORS (None for success); a negative value
+        without an error is the legacy timeout marker.
         """
-        self.data[series].append(value)
+        if error is None and value < 0:
+            error = 'timeout'
+        code  = ERRORS.index(error) if error else 0
+        start = np.nan if start is None else start
+
+        with self.lock:
+            self.versions[series] += 1
+            if code:
+                self.failures[series][ERRORS[code]] += 1
+
+            if not self.histogram:
+                self.data[series].append(start, value, status, nbytes, code)
+            elif not code:
+                self.data[series].record(value)
+
+        if self.sink is not None:
+            self.sink.write(series, (start, value, status, nbytes, code))
 
     def extend(self, series, values):
         """
-        Extend a particular timeseries with values
+        Extend a particular timeseries with values, either a structured
+        array of RECORD results or a sequence of latencies.
         """
-        self.data[series].extend(values)
+        values = np.asarray(values)
+        if values.dtype != RECORD:
+            latency = np.asarray(values, dtype=np.float64)
+            values  = np.zeros(len(latency), dtype=RECORD)
+            values['start']   = np.nan
+            values['latency'] = latency
+            values['error']   = np.where(latency < 0, ERRORS.index('timeout'), 0)
+
+        counts = np.bincount(values['error'], minlength=len(ERRORS))
+        with self.lock:
+            self.versions[series] += 1
+            for code in np.flatnonzero(counts[1:]) + 1:
+                self.failures[series][ERRORS[code]] += int(counts[code])
+
+            if not self.histogram:
+                self.data[series].extend(values)
+            else:
+                self.data[series].record_many(values['latency'][values['error'] == 0])
+
+        if self.sink is not None:
+            self.sink.write(series, values)
+
+    def merge(self, other, concurrent=False):
+        """
+        Merges the series of another TimeSeries into this one. Histograms
+        are added together; raw records are concatenated. If the other
+        series ran concurrently with this one (e.g. on another worker) the
+        elapsed time is the longer of the two rather than their sum.
+        """
+        for label in other.labels(sides=True):
+            series = other.data[label]
+            if self.histogram and isinstance(series, Histogram):
+                self.data[label].merge(series)
+                self.failures[label].update(other.failures.get(label, {}))
+                self.versions[label] += 1
+            elif isinstance(series, Histogram):
+                raise ValueError("Cannot merge histograms into raw records")
+            else:
+                self.extend(label, series.array)
+
+            elapsed = other.elapsed.get(label, 0.0)
+            if concurrent:
+                self.elapsed[label] = max(self.elapsed.get(label, 0.0), elapsed)
+            else:
+                self.elapsed[label] += elapsed
+        return self
+
+    def records(self, series):
+        """
+        Returns the structured array of result records of a raw series
+        """
+        if self.histogram:
+            raise TypeError("Histogram series do not keep result records")
+        return self.data[series].array
+
+    def latencies(self, series):
+        """
+        Returns the latencies of the successful requests of a raw series
+        """
+        records = self.records(series)
+        return records['latency'][records['error'] == 0]
+
+    def phases(self, series):
+        """
+        Returns an ordered dictionary of the phase breakdown series of a
+        request series (e.g. dns, connect, tls, server and transfer), or an
+        empty dictionary if no phases were recorded for it.
+        """
+        phases = OrderedDict()
+        for phase in PHASES:
+            label = phase_label(series, phase)
+            if label in self.data:
+                phases[phase] = self[label]
+        return phases
+
+    def errors(self, series):
+        """
+        Returns the number of failed requests of each kind of error (every
+        kind but success, in ERRORS order) of the series
+        """
+        counts = self.failures.get(series, {})
+        return OrderedDict((name, counts.get(name, 0)) for name in ERRORS[1:])
+
+    def ragged(self, labels=None):
+        """
+        Returns the latencies of the successful requests of the labels (by
+        default every raw series) copied contiguously into a Ragged array.
+        The records of every label are taken once, under the lock, so
+        results appended meanwhile cannot change them part way through.
+        """
+        labels  = list(self) if labels is None else list(labels)
+        with self.lock:
+            records = [self.records(label) for label in labels]
+        masks   = [batch['error'] == 0 for batch in records]
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([np.count_nonzero(mask) for mask in masks])
+        values  = np.empty(offsets[-1], dtype=np.float64)
+        for idx, (batch, mask) in enumerate(zip(records, masks)):
+            values[offsets[idx]:offsets[idx + 1]] = batch['latency'][mask]
+        return Ragged(values, offsets)
+
+    def latency_summaries(self, labels=None, percentiles=None):
+        """
+        Returns the latency summaries (see summarize) of the labels (by
+        default every series) by label. Summaries are cached and only the
+        series appended to (or replaced) since they were last summarized
+        are recomputed, in one batch.
+        """
+        percentiles = self.percentiles if percentiles is None else tuple(percentiles)
+        labels      = list(self) if labels is None else list(labels)
+        result      = OrderedDict()
+        stale       = []
+
+        for label in labels:
+            series = self.data[label]
+            key    = (self.versions[label], id(series), len(series), percentiles)
+            cached = self.summaries.get(label)
+            if cached is not None and cached[0] == key:
+                result[label] = cached[1]
+            else:
+                result[label] = None
+                stale.append((label, key))
+
+        if self.histogram:
+            computed = [histogram_summary(self.data[label], percentiles) for label, _ in stale]
+        elif stale:
+            computed = batch_summarize(self.ragged(label for label, _ in stale), percentiles)
+        else:
+            computed = []
+
+        for (label, key), stats in zip(stale, computed):
+            self.summaries[label] = (key, stats)
+            result[label] = stats
+        return result
+
+    def latency_stat(self, series, stat):
+        """
+        Returns a statistic of the cached latency summary of a raw series
+        (NaN if it has no successful requests)
+        """
+        return self.latency_summaries([series])[series].get(stat, np.nan)
 
     def mean(self, series):
         """
         Returns the mean value for a particular series
         """
-        return np.mean(self[series])
+        if self.histogram:
+            return self[series].mean()
+        return self.latency_stat(series, 'mean')
 
     def median(self, series):
         """
         Returns the median value for a particular series
         """
-        return np.median(self[series])
+        if self.histogram:
+            return self[series].median()
+        return self.latency_stat(series, 'median')
+
+    def percentile(self, series, q):
+        """
+        Returns the value at percentile q (0-100) of a particular series
+        """
+        if self.histogram:
+            return self[series].percentile(q)
+        if q in self.percentiles:
+            return self.latency_stat(series, pkey(q))
+        return np.percentile(self[series], q)
 
     def stddev(self, series):
         """
         Returns the standard deviation of a particular series
         """
-        return np.std(self[series])
+        if self.histogram:
+            return self[series].stddev()
+        return self.latency_stat(series, 'stddev')
 
     def variance(self, series):
         """
         Returns the variance of a particular series
         """
-        return np.var(self[series])
+        if self.histogram:
+            return self[series].variance()
+        return self.latency_stat(series, 'variance')
 
     def max(self, series):
         """
         Returns the maximum value of a particular series
         """
-        return np.amax(self[series])
+        if self.histogram:
+            return self[series].max()
+        return self.latency_stat(series, 'max')
 
     def min(self, series):
         """
         Returns the lowest value of a particular series
         """
-        return np.amin(self[series])
+        if self.histogram:
+            return self[series].min()
+        return self.latency_stat(series, 'min')
 
-    def statistics(self):
+    def outcomes(self, series, stats):
+        """
+        Adds the throughput and the counts and rates of timeouts and other
+        errors of a series to a copy of its latency summary
+        """
+        stats    = OrderedDict(stats)
+        errors   = self.errors(series)
+        timeouts = errors.pop('timeout')
+        failed   = sum(errors.values())
+        total    = stats['count'] + timeouts + failed
+        if self.elapsed.get(series):
+            stats['throughput'] = stats['count'] / self.elapsed[series]
+        stats['timeouts'] = timeouts
+        for name, count in errors.items():
+            stats['%s_errors' % name] = count
+        stats['timeout_rate'] = float(timeouts) / total if total else 0.0
+        stats['error_rate']   = float(failed) / total if total else 0.0
+        return stats
+
+    def summary(self, series, percentiles=None):
         """
-        Returns all statistics for the various series
+        Returns the statistics of a single series
         """
-        stats = {}
-        for label, times in self.items():
-            stats[label] = {
-                'mean': np.mean(times),
-                'median': np.median(times),
-                'stddev': np.std(times),
-                'variance': np.var(times),
-                'max': np.amax(times),
-                'min': np.amin(times)
-            }
-        return stats
+        return self.outcomes(series, self.latency_summaries([series], percentiles)[series])
 
-    def tabelize(self):
+    def statistics(self, percentiles=None):
         """
-        Returns a statistical table
+        Returns all statistics for the various series: the latency summary
+        of successful requests with the configured percentiles, throughput
+        in requests per second (when the elapsed time is known) and the
+        counts and rates of timeouts and other errors.
         """
-        output = []
-        for label, stats in self.statistics().items():
-            output.append("<tr>")
-            output.append("<td>%s</td>" % label)
-            for stat, val in stats.items():
-                output.append("<td>%0.3f</td>" % val)
-            output.append("</tr>")
+        labels    = sorted(self)
+        summaries = self.latency_summaries(labels, percentiles)
+        return OrderedDict((label, self.outcomes(label, summaries[label])) for label in labels)
+
+    def tabelize(self, percentiles=None):
+        """
+        Returns a statistical table as HTML: a header row of the statistics
+        (every statistic of any series, in order) and a row per series, an
+        empty cell where a series lacks a statistic. Cells are padded to
+        the width of their column so the source lines up as well.
+        """
+        statistics = self.statistics(percentiles)
+        columns = []
+        for stats in statistics.values():
+            columns.extend(stat for stat in stats if stat not in columns)
+
+        rows = [["series"] + columns]
+        for label, stats in statistics.items():
+            rows.append([cgi.escape(label)] + [
+                format_stat(stats[stat]) if stat in stats else "" for stat in columns
+            ])
+
+        widths = [max(len(row[idx]) for row in rows) for idx in xrange(len(rows[0]))]
+        output = ["<table>", "<thead>"]
+        for idx, row in enumerate(rows):
+            tag   = "th" if idx == 0 else "td"
+            cells = [row[0].ljust(widths[0])]
+            cells.extend(cell.rjust(width) for cell, width in zip(row[1:], widths[1:]))
+            output.append("<tr>%s</tr>" % "".join("<%s>%s</%s>" % (tag, cell, tag) for cell in cells))
+            if idx == 0: output.extend(["</thead>", "<tbody>"])
+        output.extend(["</tbody>", "</table>"])
         return "\n".join(output)
 
-    def pprint(self, title=None):
+    def pprint(self, title=None, percentiles=None):
         """
         Pretty prints the statistics for the timeseries
         """
         output = []
-        for label, stats in self.statistics().items():
+        if title: output.append(title)
+        for label, stats in self.statistics(percentiles).items():
             output.append("Statistics for the %s series:" % label)
             for stat, val in stats.items():
-                output.append("    %s: %0.3f" % (stat.title(), val))
+                name = stat if stat.startswith('p') and stat[1:2].isdigit() else stat.replace('_', ' ').title()
+                output.append("    %s: %s" % (name, format_stat(val)))
         return "\n".join(output)
 
     def display(self, title=None, **kwargs):
         """
-        Creates line plots of the data using matplotlib
-        """
-        title = title or "Statistics for %i series" % len(self)
-        chart_times(self, title=title, **kwargs)
+        Creates line plots of the data using matplotlib, or if stacked is
+        True, stacked plots of the phases of every request series. Other
+        kinds of chart (see CHARTS) are percentile bands over time windows
+        of window seconds (by default a hundredth of the run), histograms,
+        CDFs and heatmaps of latency over time. Histogram series are
+        charted by percentile unless their histogram or CDF is asked for.
+        """
+        title   = title or "Statistics for %i series" % len(self)
+        stacked = kwargs.pop('stacked', False)
+        kind    = kwargs.pop('kind', None) or 'times'
+        window  = kwargs.pop('window', None)
+        if kind not in CHARTS:
+            raise ValueError("Unknown kind of chart '%s'" % kind)
+        if self.histogram and kind in ('bands', 'heatmap'):
+            raise ValueError("Cannot chart %s of histogram series" % kind)
+
+        if stacked:
+            if self.histogram:
+                raise ValueError("Cannot stack phases of histogram series")
+            runs = OrderedDict()
+            for label in sorted(self):
+                if self.phases(label):
+                    runs[label] = self.phases(label)
+            chart_phases(runs, title=title, **kwargs)
+        elif kind == 'bands':
+            # Imported here since drifter.drift depends on this module
+            from drifter.drift import series_windows
+            starts = [self.records(label)['start'] for label in self]
+            starts = np.concatenate(starts) if starts else np.zeros(0)
+            starts = starts[np.isfinite(starts)]
+            if not window:
+                span   = starts.max() - starts.min() if len(starts) else 0.0
+                window = span / 100.0 or 1.0
+            chart_bands(series_windows(self, window), title=title, **kwargs)
+        elif kind == 'heatmap':
+            runs = OrderedDict((label, self.records(label)) for label in sorted(self))
+            chart_heatmap(runs, title=title, **kwargs)
+        elif kind == 'histogram':
+            chart_histogram(self, title=title, **kwargs)
+        elif kind == 'cdf':
+            chart_cdf(self, title=title, **kwargs)
+        elif self.histogram:
+            chart_distribution(self, title=title, **kwargs)
+        else:
+            chart_times(self, title=title, **kwargs)
+
+    def serialize(self):
+        """
+        Returns a JSON serializable dictionary of the series. Records are
+        written as a column per field; histograms as sparse bucket counts.
+        """
+        data = {}
+        for label, series in self.data.items():
+            if self.histogram:
+                data[label] = series.serialize()
+                data[label]['errors'] = dict(self.failures.get(label, {}))
+            else:
+                data[label] = dict((field, series[field].tolist())
+                                   for field in RECORD.names)
+            data[label]['elapsed'] = self.elapsed.get(label, 0.0)
+        return data
 
     def dump(self, stream, **kwargs):
         """
         Dump the data to a JSON file
         """
-        json.dump(self.data, stream, **kwargs)
-
+        json.dump(self.serialize(), stream, **kwargs)
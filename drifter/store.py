@@ -0,0 +1,424 @@
+# drifter.store
+# A compact columnar binary file format for drifter results
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 15:12:37 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: store.py [] benjamin@bengfort.com $
+
+"""
+A compact columnar binary file format for drifter results.
+
+A columnar results file is laid out as:
+
+    MAGIC       8 bytes identifying the format and its version
+    LENGTH      unsigned 64-bit little endian length of the header
+    HEADER      JSON document describing the run and every series
+    padding     to align the data section to 64 bytes
+    DATA        the RECORD array of every series, one after the other
+
+The header holds the record dtype, the run metadata, and for every series
+its label, offset and count of records in the data section, its elapsed
+time and its error counts (or, for histogram runs, the sparse histogram
+itself). Reading a file parses only the small header; the data section is
+memory-mapped so each series is a view onto the file, not a copy.
+
+Long runs can instead stream their results to an append-only log file as
+they go with a ResultLog. A log has the same magic and header (with a
+"log" layout) followed by a sequence of blocks, each a small BLOCK struct
+and either a label and its batch of records, or a JSON metadata update
+such as the elapsed time of a series. A log can be read while it is still
+being written or after a crash: a partially written last block is ignored.
+A log only bounds the memory of a run whose TimeSeries keeps histograms:
+the log always holds the raw records, while a raw TimeSeries also keeps
+every record in memory.
+
+Files too large to load can be summarized with `aggregate`, which streams
+the records of either layout into constant memory histograms.
+
+JSON (TimeSeries.dump and TimeSeries.load) remains available as an export.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import json
+import struct
+import threading
+import numpy as np
+
+from drifter.histogram import Histogram
+from drifter.stats import TimeSeries, Records, RECORD, PERCENTILES
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+MAGIC     = "DRIFTER\x01"
+LENGTH    = struct.Struct('<Q')
+ALIGNMENT = 64
+
+# Log blocks: kind, length of the label (or metadata) and record count
+BLOCK     = struct.Struct('<4sII')
+RECORDS   = "RECS"
+METADATA  = "META"
+
+# Number of records to stream at a time when aggregating
+CHUNK     = 1048576
+
+##########################################################################
+## Helper functions
+##########################################################################
+
+def align(offset, alignment=ALIGNMENT):
+    """
+    Rounds the offset up to the next multiple of the alignment
+    """
+    return (offset + alignment - 1) // alignment * alignment
+
+def is_binary(path):
+    """
+    Returns True if the file at path is a drifter binary results file
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def nulls(value):
+    """
+    Returns a copy of a JSON document (dicts, lists and numbers) with
+    every NaN or infinite float replaced by None, which JSON has no
+    literal for.
+    """
+    if isinstance(value, dict):
+        return value.__class__((key, nulls(val)) for key, val in value.items())
+    if isinstance(value, (list, tuple)):
+        return [nulls(val) for val in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+def write_report(report, path):
+    """
+    Writes a report (e.g. the summary of a sweep or capacity search) to a
+    strict JSON file, with missing statistics as null.
+    """
+    with open(path, 'w') as f:
+        json.dump(nulls(report), f, indent=2, allow_nan=False)
+
+def read_header(f):
+    """
+    Reads the header from an open binary results file and returns it
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a drifter binary results file")
+    length, = LENGTH.unpack(f.read(LENGTH.size))
+    return json.loads(f.read(length))
+
+def write_header(f, header):
+    """
+    Writes the magic, length and header and pads to the data section.
+    Returns the offset of the data section.
+    """
+    # The data offset is itself in the header, so leave room for it
+    payload = json.dumps(header)
+    start   = align(len(MAGIC) + LENGTH.size + len(payload) + 32)
+    header['data'] = start
+    payload = json.dumps(header)
+
+    f.write(MAGIC)
+    f.write(LENGTH.pack(len(payload)))
+    f.write(payload)
+    f.write("\x00" * (start - f.tell()))
+    return start
+
+##########################################################################
+## Save and Open
+##########################################################################
+
+def new_header(series, layout):
+    """
+    Returns the header of a results file for the series
+    """
+    return {
+        'version': 1,
+        'layout': layout,
+        'dtype': RECORD.descr,
+        'histogram': series.histogram and layout != 'log',
+        'precision': series.precision,
+        'percentiles': list(series.percentiles),
+        'meta': series.meta,
+        'series': [],
+    }
+
+def save(series, path):
+    """
+    Writes a TimeSeries to path in the columnar binary format
+    """
+    header = new_header(series, 'columnar')
+
+    offset = 0
+    for label in sorted(series.labels(sides=True)):
+        entry = {
+            'label': label,
+            'elapsed': series.elapsed.get(label, 0.0),
+            'errors': dict(series.failures.get(label, {})),
+        }
+        if series.histogram:
+            entry['histogram'] = series.data[label].serialize()
+        else:
+            entry['offset'] = offset
+            entry['count']  = len(series.data[label])
+            offset += entry['count']
+        header['series'].append(entry)
+
+    with open(path, 'wb') as f:
+        write_header(f, header)
+        if not series.histogram:
+            for label in sorted(series.labels(sides=True)):
+                f.write(series.data[label].array.tostring())
+
+def read(path, mmap=True):
+    """
+    Opens a results file, in either the binary or the JSON format. Binary
+    record data is memory-mapped unless mmap is False.
+    """
+    if not is_binary(path):
+        with open(path, 'r') as f:
+            return TimeSeries.load(f)
+
+    with open(path, 'rb') as f:
+        header = read_header(f)
+    check_dtype(header)
+
+    instance = TimeSeries(histogram=header['histogram'], precision=header['precision'],
+                          percentiles=header.get('percentiles') or PERCENTILES)
+    instance.meta = header.get('meta', {})
+
+    if header['layout'] == 'log':
+        for label, records in iter_blocks(path, header):
+            instance.extend(label, records)
+        for label, elapsed in read_elapsed(path, header).items():
+            instance.elapsed[label] = elapsed
+        return instance
+
+    total = sum(entry.get('count', 0) for entry in header['series'])
+    if total and mmap:
+        data = np.memmap(path, dtype=RECORD, mode='r', offset=header['data'], shape=(total,))
+    elif total:
+        with open(path, 'rb') as f:
+            f.seek(header['data'])
+            data = np.fromfile(f, dtype=RECORD, count=total)
+
+    for entry in header['series']:
+        label = entry['label']
+        if instance.histogram:
+            instance[label] = Histogram.deserialize(entry['histogram'])
+        else:
+            offset = entry['offset']
+            view   = data[offset:offset + entry['count']] if entry['count'] else np.zeros(0, RECORD)
+            instance[label] = Records.wrap(view)
+
+        instance.failures[label].update(entry.get('errors', {}))
+        if entry.get('elapsed'):
+            instance.elapsed[label] = entry['elapsed']
+
+    return instance
+
+def check_dtype(header):
+    """
+    Raises a ValueError if the header's records are not RECORD
+    """
+    dtype = np.dtype([tuple(str(item) for item in field) for field in header['dtype']])
+    if dtype != RECORD:
+        raise ValueError("Results file has an unknown record layout")
+
+##########################################################################
+## Streaming
+##########################################################################
+
+def iter_log(path, header):
+    """
+    Iterates over the complete blocks of a log file, yielding the kind of
+    each block, its label (or metadata) and its records as a view onto the
+    memory-mapped file. A partially written last block is ignored.
+    """
+    size = os.path.getsize(path)
+    if size <= header['data']:
+        return
+
+    data   = np.memmap(path, dtype=np.uint8, mode='r')
+    offset = header['data']
+    while offset + BLOCK.size <= size:
+        kind, length, count = BLOCK.unpack(data[offset:offset + BLOCK.size].tostring())
+        start = offset + BLOCK.size + length
+        end   = start + count * RECORD.itemsize
+        if kind not in (RECORDS, METADATA) or end > size:
+            break
+
+        name    = data[offset + BLOCK.size:start].tostring().decode('utf-8')
+        records = data[start:end].view(RECORD)
+        yield kind, name, records
+        offset  = end
+
+def iter_blocks(path, header=None, chunk=CHUNK):
+    """
+    Iterates over the records of a binary results file of either layout,
+    yielding (label, records) pairs of at most chunk records each, without
+    loading the whole file into memory.
+    """
+    if header is None:
+        with open(path, 'rb') as f:
+            header = read_header(f)
+
+    if header['layout'] == 'log':
+        for kind, label, records in iter_log(path, header):
+            if kind == RECORDS:
+                yield label, records
+        return
+
+    total = sum(entry.get('count', 0) for entry in header['series'])
+    if not total: return
+
+    data = np.memmap(path, dtype=RECORD, mode='r', offset=header['data'], shape=(total,))
+    for entry in header['series']:
+        for offset in xrange(entry['offset'], entry['offset'] + entry['count'], chunk):
+            end = min(offset + chunk, entry['offset'] + entry['count'])
+            yield entry['label'], data[offset:end]
+
+def read_elapsed(path, header):
+    """
+    Returns the latest elapsed time of each series written to a log file
+    """
+    elapsed = {}
+    for kind, meta, _ in iter_log(path, header):
+        if kind == METADATA:
+            elapsed.update(json.loads(meta).get('elapsed', {}))
+    return elapsed
+
+def aggregate(path, precision=3):
+    """
+    Summarizes a results file of any size (or format) into a histogram
+    TimeSeries in constant memory by streaming its records.
+    """
+    if not is_binary(path):
+        with open(path, 'r') as f:
+            return TimeSeries(histogram=True, precision=precision).merge(TimeSeries.load(f))
+
+    with open(path, 'rb') as f:
+        header = read_header(f)
+    check_dtype(header)
+
+    if header['histogram']:
+        return read(path)
+
+    instance = TimeSeries(histogram=True, precision=precision,
+                          percentiles=header.get('percentiles') or PERCENTILES)
+    instance.meta = header.get('meta', {})
+
+    for label, records in iter_blocks(path, header):
+        instance.extend(label, records)
+
+    if header['layout'] == 'log':
+        instance.elapsed.update(read_elapsed(path, header))
+    else:
+        for entry in header['series']:
+            instance.elapsed[entry['label']] = entry.get('elapsed', 0.0)
+    return instance
+
+class ResultLog(object):
+    """
+    An append-only sink that streams result records to a log file as a
+    run proceeds. Records are buffered in memory and flushed as a block per
+    series every interval seconds by a background thread, or as soon as
+    capacity records are buffered, so that the buffers are bounded and at
+    most one interval of results is lost if the run dies. Buffers are
+    swapped out under the lock and written and synced outside of it, so
+    appending results never waits on the disk.
+
+    Assign a ResultLog to the sink of a TimeSeries to log every result;
+    the log holds raw records even if the TimeSeries keeps histograms,
+    which is how a long run keeps its memory constant.
+    """
+
+    def __init__(self, path, interval=1.0, capacity=65536, series=None):
+        self.path     = path
+        self.interval = interval
+        self.capacity = capacity
+        self.buffers  = {}
+        self.buffered = 0
+        self.lock     = threading.Lock()
+        self.writing  = threading.RLock()
+        self.closed   = threading.Event()
+
+        self.stream = open(path, 'wb')
+        write_header(self.stream, new_header(series or TimeSeries(), 'log'))
+        self.stream.flush()
+
+        self.flusher = threading.Thread(target=self.run)
+        self.flusher.daemon = True
+        self.flusher.start()
+
+    def run(self):
+        """
+        Flushes the buffered records every interval until closed
+        """
+        while not self.closed.wait(self.interval):
+            self.flush()
+
+    def write(self, label, records):
+        """
+        Buffers a RECORD array (or a single record) for the label
+        """
+        records = np.atleast_1d(np.asarray(records, dtype=RECORD))
+        with self.lock:
+            if label not in self.buffers:
+                self.buffers[label] = Records()
+            self.buffers[label].extend(records)
+            self.buffered += len(records)
+            full = self.buffered >= self.capacity
+        if full:
+            self.flush()
+
+    def metadata(self, **meta):
+        """
+        Writes a metadata block, e.g. metadata(elapsed={label: seconds})
+        """
+        payload = json.dumps(meta)
+        with self.writing:
+            self.flush()
+            self.stream.write(BLOCK.pack(METADATA, len(payload), 0))
+            self.stream.write(payload)
+            self.stream.flush()
+
+    def flush(self):
+        """
+        Writes a block for every series with buffered records
+        """
+        with self.writing:
+            if self.stream.closed: return
+            with self.lock:
+                buffers, self.buffers, self.buffered = self.buffers, {}, 0
+
+            for label, buffer in buffers.items():
+                if not len(buffer): continue
+                name = label.encode('utf-8')
+                self.stream.write(BLOCK.pack(RECORDS, len(name), len(buffer)))
+                self.stream.write(name)
+                self.stream.write(buffer.array.tostring())
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+
+    def close(self):
+        """
+        Flushes any remaining records and closes the log file
+        """
+        self.closed.set()
+        self.flusher.join()
+        with self.writing:
+            self.flush()
+            self.stream.close()
@@ -0,0 +1,180 @@
+# drifter.sweep
+# Sweeps of an endpoint over a grid of query parameters
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 02:37:15 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: sweep.py [] benjamin@bengfort.com $
+
+"""
+Sweeps of an endpoint over a grid of query parameters.
+
+The projection investigation (docs/projection_speed.md) compared the
+format=full, normal and light responses of the same endpoints by hand. A
+sweep runs a request at every point of a grid of parameter values (e.g.
+format by limit), each point under its own label, and reports the
+latency and response size of every point side by side, how much faster
+each point is than the slowest, and a fit of latency against response
+size over all of the successful requests:
+
+    latency = intercept + slope * KB    (least squares, with its r^2)
+    latency ~ KB ^ exponent             (least squares on the logs)
+
+so that the gain of smaller responses can be checked on every release.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import numpy as np
+
+from itertools import product
+from collections import OrderedDict
+from drifter.stats import pkey
+from drifter.scenario import request_configuration
+
+##########################################################################
+## Grid
+##########################################################################
+
+def parse_parameter(text):
+    """
+    Parses a command line parameter "name=v1,v2,v3" to (name, values)
+    """
+    name, sep, values = text.partition('=')
+    values = [value for value in values.split(',') if value]
+    if not sep or not name or not values:
+        raise ValueError("Sweep parameters look like name=value,value: '%s'" % text)
+    return name, values
+
+def grid(parameters):
+    """
+    Returns every combination of the values of the parameters (an ordered
+    dictionary or list of name, values pairs) as a list of dictionaries.
+    """
+    parameters = OrderedDict(parameters)
+    names      = list(parameters.keys())
+    return [OrderedDict(zip(names, values)) for values in product(*parameters.values())]
+
+def sweep_label(name, point):
+    """
+    Returns the label of a point of a sweep, e.g. "GET /sizes (format=light)"
+    """
+    return "%s (%s)" % (name, ", ".join("%s=%s" % item for item in point.items()))
+
+def sweep_requests(request, parameters):
+    """
+    Returns (point, request configuration) pairs for every point of the
+    grid of the parameters, with the point added to the query params of
+    the request and labelled by the point.
+    """
+    request  = request_configuration(request)
+    requests = []
+    for point in grid(parameters):
+        config = request_configuration(request.serialize())
+        config.params = dict(request.params or {}, **point)
+        config.name   = sweep_label(request.name, point)
+        requests.append((point, config))
+    return requests
+
+##########################################################################
+## Fitting
+##########################################################################
+
+def fit(nbytes, latency):
+    """
+    Fits latency (ms) against response size (converted to KB) and returns
+    an ordered dictionary of the intercept, slope and r^2 of the linear
+    fit and the exponent of the power law fit (NaN where undefined, e.g.
+    when every response is the same size).
+    """
+    kb      = np.asarray(nbytes, dtype=np.float64) / 1024.0
+    latency = np.asarray(latency, dtype=np.float64)
+    result  = OrderedDict([
+        ('intercept', np.nan), ('slope', np.nan), ('r2', np.nan), ('exponent', np.nan),
+    ])
+    if len(kb) < 2 or np.ptp(kb) == 0:
+        return result
+
+    slope, intercept = np.polyfit(kb, latency, 1)
+    residual = latency - (intercept + slope * kb)
+    total    = ((latency - latency.mean()) ** 2).sum()
+    result['intercept'] = intercept
+    result['slope']     = slope
+    result['r2']        = 1 - (residual ** 2).sum() / total if total else np.nan
+
+    positive = (kb > 0) & (latency > 0)
+    if positive.sum() >= 2 and np.ptp(kb[positive]) > 0:
+        result['exponent'] = np.polyfit(np.log(kb[positive]), np.log(latency[positive]), 1)[0]
+    return result
+
+##########################################################################
+## Report
+##########################################################################
+
+def report(results, requests, percentiles=None):
+    """
+    Summarizes the results of a sweep of the requests (the pairs of
+    sweep_requests) and returns an ordered dictionary with the points
+    (their parameters, count, errors, mean KB, mean and percentile
+    latencies and speedup over the slowest point by median) and the fit
+    of latency against size.
+    """
+    percentiles = percentiles or results.percentiles
+    points      = OrderedDict()
+    sizes, lats = [], []
+
+    for point, request in requests:
+        records = results.records(request.name)
+        ok      = records[records['error'] == 0]
+        row     = OrderedDict([('params', dict(point))])
+        row['count']  = len(records)
+        row['errors'] = len(records) - len(ok)
+        row['kb']     = ok['bytes'].mean() / 1024.0 if len(ok) else np.nan
+        row['mean']   = ok['latency'].mean() if len(ok) else np.nan
+        for q in (50,) + tuple(q for q in percentiles if q != 50):
+            row[pkey(q)] = np.percentile(ok['latency'], q) if len(ok) else np.nan
+        points[request.name] = row
+        sizes.append(ok['bytes'])
+        lats.append(ok['latency'])
+
+    slowest = np.nanmax([row['p50'] for row in points.values()]) if points else np.nan
+    for row in points.values():
+        row['speedup'] = slowest / row['p50'] if row['p50'] > 0 else np.nan
+
+    return OrderedDict([
+        ('points', points),
+        ('fit', fit(np.concatenate(sizes), np.concatenate(lats)) if sizes else fit([], [])),
+    ])
+
+def format_report(summary, title=None):
+    """
+    Formats a sweep report as a text table
+    """
+    points  = summary['points']
+    output  = [title] if title else []
+    if not points:
+        return "\n".join(output + ["No points were swept"])
+
+    columns = [key for key in points.values()[0] if key not in ('params', 'count', 'errors')]
+    width   = max(len(label) for label in points)
+    output.append("%-*s %8s %8s" % (width, "point", "requests", "errors") +
+                  "".join("%10s" % col for col in columns))
+
+    for label, row in points.items():
+        output.append("%-*s %8i %8i" % (width, label, row['count'], row['errors']) +
+                      "".join("%10.3f" % row[col] for col in columns))
+
+    fitted = summary['fit']
+    output.append("")
+    if np.isnan(fitted['slope']):
+        output.append("Latency vs size: not enough variation in response size to fit")
+    else:
+        output.append("Latency vs size: %0.3f ms + %0.3f ms/KB (r^2 %0.3f); latency ~ KB^%0.3f" % (
+            fitted['intercept'], fitted['slope'], fitted['r2'], fitted['exponent']
+        ))
+    return "\n".join(output)
@@ -0,0 +1,251 @@
+# drifter.template
+# Precompiled request templates for the hot loop of a run
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 21:03:28 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: template.py [] benjamin@bengfort.com $
+
+"""
+Precompiled request templates for the hot loop of a run.
+
+Building every request from scratch (joining the URL, encoding the query,
+merging the headers and serializing the JSON body) allocates on every
+request and, at high rates, caps how fast drifter can send and adds
+jitter to its measurements. A RequestTemplate does all of that once per
+kind of request: the URL (with its query string), the headers and the
+serialized body are compiled to strings in which only the placeholders of
+the variables chosen per request remain, as %-style format fields. Each
+request then costs one string interpolation per templated part, with the
+chosen values escaped for where they appear (URL quoted in the URL, JSON
+escaped in the body). Requests without any per-request variables are
+prepared once and reused as they are.
+
+A prepared request carries the context of the values chosen for it, so a
+run can label its results by them (see RequestTemplate.label), and the
+choices are made by a chooser the caller passes in, so that a seeded run
+makes the same choices every time.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import re
+import json
+import random
+import itertools
+import urllib
+
+from collections import namedtuple
+from drifter.scenario import request_configuration
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+##########################################################################
+## Escaping
+##########################################################################
+
+def as_text(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    return str(value)
+
+def quote_path(value):
+    return urllib.quote(as_text(value), safe='')
+
+def quote_url(value):
+    return urllib.quote_plus(as_text(value))
+
+def quote_json(value):
+    return json.dumps(as_text(value))[1:-1]
+
+def quote_literal(text):
+    """
+    Quotes the literal text of a URL, leaving its structure intact
+    """
+    return urllib.quote(as_text(text), safe="/:?&=@+,;$!*'()~-._")
+
+##########################################################################
+## Compiled strings
+##########################################################################
+
+class Compiled(object):
+    """
+    A string with {name} placeholders compiled to a %-style format, into
+    which values are substituted after being escaped. The static values
+    are substituted at compile time, so only the fields left need values.
+    """
+
+    def __init__(self, template, static=None, escape=as_text, literal=None):
+        static = static or {}
+        parts  = PLACEHOLDER.split(template)
+        fields = []
+        text   = []
+
+        # Split alternates literal text and placeholder names
+        for idx, part in enumerate(parts):
+            if idx % 2 == 0:
+                part = literal(part) if literal else part
+                text.append(part.replace('%', '%%'))
+            elif part in static:
+                text.append(escape(static[part]).replace('%', '%%'))
+            else:
+                text.append('%%(%s)s' % part)
+                fields.append(part)
+
+        self.fields = tuple(sorted(set(fields)))
+        self.format = "".join(text)
+        self.escape = escape
+        self.text   = None if self.fields else self.format % {}
+
+    def render(self, context):
+        """
+        Returns the string with the escaped values of the context
+        """
+        if self.text is not None:
+            return self.text
+        escape = self.escape
+        return self.format % dict((field, escape(context[field])) for field in self.fields)
+
+##########################################################################
+## Request Template
+##########################################################################
+
+class Prepared(namedtuple('Prepared', ('url', 'headers', 'body'))):
+    """
+    The url, headers and body of a prepared request, with the context of
+    the values chosen for it (empty for static templates).
+    """
+
+    context = {}
+
+class RequestTemplate(object):
+    """
+    A request (a RequestConfiguration or dictionary) of a scenario compiled
+    against an api_root and api_key, with the scenario variables. Variables
+    that are lists are chosen from per request; all others are fixed.
+    """
+
+    def __init__(self, request, api_root, api_key=None, variables=None):
+        request = request_configuration(request)
+        context = dict(variables or {})
+        context.update(request.variables or {})
+
+        self.name    = request.name
+        self.method  = request.method
+        self.weight  = request.weight
+        self.choices = dict((key, val) for key, val in context.items() if isinstance(val, list))
+        static       = dict((key, val) for key, val in context.items() if key not in self.choices)
+
+        # The chosen variables the name refers to label its results by default
+        self.named   = []
+        for key in PLACEHOLDER.findall(self.name):
+            if key in self.choices and key not in self.named:
+                self.named.append(key)
+
+        # The URL and its query string, quoted except for the placeholders
+        url = "%s/%s" % (api_root, request.path)
+        if request.params:
+            url += "?" + "&".join("%s=%s" % item for item in sorted(request.params.items()))
+        path, _, query = url.partition('?')
+        self.path  = Compiled(path, static, quote_path, literal=quote_literal)
+        self.query = Compiled(query, static, quote_url, literal=quote_literal) if query else None
+
+        # Headers are compiled one value at a time
+        headers = {'API-Key': api_key} if api_key else {}
+        if request.body is not None:
+            headers['content-type'] = 'application/json'
+        headers.update(request.headers or {})
+        self.headers = dict((key, Compiled(as_text(val), static)) for key, val in headers.items())
+        self.fixed   = dict((key, val.text) for key, val in self.headers.items() if not val.fields)
+        self.dynamic = [(key, val) for key, val in self.headers.items() if val.fields]
+
+        # The body is serialized once with its placeholders inside strings
+        if request.body is not None:
+            self.body = Compiled(json.dumps(request.body, sort_keys=True), static, quote_json)
+        else:
+            self.body = None
+
+        self.static = not any(part.fields for part in self.parts())
+        if self.static:
+            self.prepared = Prepared(*self.render({}))
+
+    def parts(self):
+        """
+        Iterates over the compiled parts of the template
+        """
+        yield self.path
+        if self.query is not None:
+            yield self.query
+        for part in self.headers.values():
+            yield part
+        if self.body is not None:
+            yield self.body
+
+    def render(self, context):
+        """
+        Returns the url, headers and body with the values of the context
+        """
+        url     = self.path.render(context)
+        if self.query is not None:
+            url = url + "?" + self.query.render(context)
+        headers = self.fixed
+        if self.dynamic:
+            headers = dict(self.fixed)
+            for key, val in self.dynamic:
+                headers[key] = val.render(context)
+        body    = self.body.render(context) if self.body is not None else None
+        return url, headers, body
+
+    def prepare(self, chooser=random.choice):
+        """
+        Returns the url, headers and body of the next request as Prepared,
+        with the values the chooser picked from each list of choices as its
+        context. Headers are shared between requests where possible so
+        callers must not modify them; static templates return the same
+        prepared request every time.
+        """
+        if self.static:
+            return self.prepared
+        context  = dict((key, chooser(val)) for key, val in self.choices.items())
+        prepared = Prepared(*self.render(context))
+        prepared.context = context
+        return prepared
+
+    def label(self, context, keys):
+        """
+        Returns the name of the request with the values of the keys in the
+        context substituted for their placeholders, or appended if the name
+        has none, e.g. "POST /users/42/items" or "GET /sizes (format=full)",
+        so that results are split by the values chosen for them.
+        """
+        keys   = [key for key in keys if key in context]
+        named  = set(PLACEHOLDER.findall(self.name))
+        name   = PLACEHOLDER.sub(
+            lambda match: "%s" % context[match.group(1)] if match.group(1) in keys else match.group(0),
+            self.name
+        )
+        values = ["%s=%s" % (key, context[key]) for key in keys if key not in named]
+        if not values:
+            return name
+        return "%s (%s)" % (name, ", ".join(values))
+
+    def labels(self, keys):
+        """
+        Returns every label (see label) of the request for the values that
+        can be chosen for the keys, in the order of the choices.
+        """
+        keys   = [key for key in keys if key in self.choices]
+        labels = []
+        for values in itertools.product(*[self.choices[key] for key in keys]):
+            label = self.label(dict(zip(keys, values)), keys)
+            if label not in labels: labels.append(label)
+        return labels
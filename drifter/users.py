@@ -0,0 +1,302 @@
+# drifter.users
+# Virtual users that follow scripted flows with think times
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 22:20:14 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: users.py [] benjamin@bengfort.com $
+
+"""
+Virtual users that follow scripted flows with think times.
+
+Rather than one anonymous caller hitting one endpoint in a tight loop, a
+UserEngine simulates many users, each with its own session (API key,
+cookies and connection), who repeatedly pick a flow of the scenario (in
+proportion to the flow weights) and walk through its steps, thinking for
+a random time between steps.
+
+A user is only a small object holding its session and its place in its
+journey, so thousands of them are cheap: they wait in a heap ordered by
+the time they next wake up, and a single dispatcher hands each user whose
+time has come to a pool of worker threads to send its next request. A
+user has at most one request in flight, so by default there is a worker
+per user. The latency of a step is measured from when the user meant to
+send it, so if the workers fall behind the delay is included (as in
+open-loop runs) rather than omitted, and the fraction of steps that
+queued for a busy worker is kept so the run can be flagged client bound.
+
+Every step is recorded in a series labelled "flow / step" and every
+complete journey as the "flow [journey]" series: the sum of the latencies
+of its steps (think time excluded), failed if any of its steps failed.
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import time
+import heapq
+import random
+import threading
+import numpy as np
+
+from itertools import count
+from multiprocessing.pool import ThreadPool
+
+from drifter.api import Drifter
+from drifter.stats import phase_label
+from drifter.template import RequestTemplate
+from drifter.scenario import WeightedScheduler
+
+##########################################################################
+## Module Constants
+##########################################################################
+
+DISTRIBUTIONS = ('constant', 'uniform', 'exponential', 'lognormal')
+
+# Label of the series of a step of a flow
+STEP          = "%s / %s"
+
+##########################################################################
+## Think times
+##########################################################################
+
+def think_time(spec, random):
+    """
+    Returns a function that draws think times in seconds from the spec:
+    a number of seconds, or a dictionary with a distribution and its
+    parameters, e.g. {distribution: exponential, mean: 2.0}, uniform with
+    min and max, lognormal with median and sigma, or constant with mean.
+    """
+    if spec is None:
+        return lambda: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+
+    kind = spec.get('distribution', 'constant')
+    if kind == 'constant':
+        return lambda: float(spec.get('mean', 0.0))
+    if kind == 'uniform':
+        return lambda: random.uniform(spec.get('min', 0.0), spec['max'])
+    if kind == 'exponential':
+        return lambda: random.exponential(spec['mean'])
+    if kind == 'lognormal':
+        return lambda: random.lognormal(np.log(spec['median']), spec.get('sigma', 1.0))
+    raise ValueError("Unknown think time distribution '%s'" % kind)
+
+##########################################################################
+## Virtual Users
+##########################################################################
+
+class Step(object):
+    """
+    A compiled step of a flow and the think time after it
+    """
+
+    def __init__(self, flow, request, template, think):
+        self.flow     = flow
+        self.label    = STEP % (flow, request.name)
+        self.template = template
+        self.think    = think
+
+class VirtualUser(object):
+    """
+    A simulated user: its own session and its place in its journey
+    """
+
+    def __init__(self, uid, drifter, chooser=random.choice):
+        self.uid      = uid
+        self.drifter  = drifter
+        self.chooser  = chooser
+        self.flow     = None
+        self.steps    = None
+        self.step     = 0
+        self.journeys = 0
+        self.elapsed  = 0.0
+        self.error    = None
+        self.started  = None
+
+    def send(self, template, raw=True, **kwargs):
+        """
+        Prepares the next request of a template and sends it in this
+        user's session, with this user's API key.
+        """
+        url, headers, body = template.prepare(self.chooser)
+        if self.drifter.api_key:
+            headers = dict(headers, **{'API-Key': self.drifter.api_key})
+        return self.drifter.send(template.method, url, headers=headers, data=body, **kwargs)
+
+class UserEngine(object):
+    """
+    Runs the flows of a scenario with a number of virtual users sharing a
+    pool of workers threads (by default the runner's concurrency if it was
+    given, otherwise one per user), on behalf of a Runner (which records
+    the results). Users start evenly spread over ramp_up seconds and walk
+    through journeys until the duration (in seconds) has passed or each
+    has completed the given number of journeys.
+    """
+
+    def __init__(self, runner, scenario, users=100, workers=None, duration=None,
+                 journeys=None, ramp_up=0.0, seed=None):
+        if not scenario.flows:
+            raise ValueError("Scenario has no flows for virtual users")
+        if duration is None and journeys is None:
+            raise ValueError("Virtual users require a duration or a number of journeys")
+
+        self.runner   = runner
+        self.users    = users
+        self.workers  = workers or (runner.concurrency if runner.bounded else max(users, 1))
+        self.duration = duration
+        self.journeys = journeys
+        self.ramp_up  = float(ramp_up or 0)
+        self.random   = np.random.RandomState(seed)
+        self.flows    = WeightedScheduler(scenario.flows, seed=seed)
+        self.keys     = scenario.api_keys or [runner.drifter.api_key]
+
+        # Compile every step of every flow once
+        self.steps = {}
+        for flow in scenario.flows:
+            think = flow.think if flow.think is not None else scenario.think
+            self.steps[flow.name] = [
+                Step(flow.name, request,
+                     RequestTemplate(request, runner.drifter.api_root, None, scenario.variables),
+                     think_time(request.think if request.think is not None else think, self.random))
+                for request in flow.steps
+            ]
+
+        self.heap      = []
+        self.sequence  = count()
+        self.inflight  = 0
+        self.sent      = 0
+        self.queued    = 0
+        self.errors    = []
+        self.condition = threading.Condition()
+
+    @property
+    def labels(self):
+        """
+        The labels of the step and journey series, in flow order
+        """
+        labels = []
+        for flow in self.flows.requests:
+            labels.extend(step.label for step in self.steps[flow.name])
+            labels.append(phase_label(flow.name, 'journey'))
+        return labels
+
+    def spawn(self, uid):
+        """
+        Creates a virtual user with its own session and API key
+        """
+        drifter = self.runner.drifter
+        session = Drifter(drifter.api_root, self.keys[uid % len(self.keys)] or None,
+                          pool_size=1, keepalive=drifter.keepalive)
+        return VirtualUser(uid, session, self.flows.choose)
+
+    def schedule(self, user, wake):
+        """
+        Puts the user to sleep until wake (epoch seconds)
+        """
+        with self.condition:
+            heapq.heappush(self.heap, (wake, next(self.sequence), user))
+            self.condition.notify()
+
+    def begin(self, user, now):
+        """
+        Starts a new journey of the user, unless the run is over
+        """
+        if self.journeys is not None and user.journeys >= self.journeys:
+            return False
+        if self.duration is not None and now >= self.deadline:
+            return False
+
+        user.flow    = self.flows.next().name
+        user.steps   = self.steps[user.flow]
+        user.step    = 0
+        user.elapsed = 0.0
+        user.error   = None
+        return True
+
+    def act(self, user, intended):
+        """
+        Sends the user's next step (in a worker thread), records it and
+        puts the user back to sleep for its think time.
+        """
+        try:
+            step = user.steps[user.step]
+            if user.step == 0:
+                user.started = intended
+
+            latency, error = self.runner.sample(step.label, user.send, step.template,
+                                                intended=intended, wait=None)
+            user.elapsed += latency
+            user.error    = user.error or error
+            user.step    += 1
+
+            # The user thinks after every step, including the last
+            wake = intended + latency / 1000.0 + step.think()
+            if user.step == len(user.steps):
+                user.journeys += 1
+                self.runner.results.append(phase_label(user.flow, 'journey'), user.elapsed,
+                                           start=user.started, error=user.error)
+                if not self.begin(user, time.time()):
+                    user.drifter.close()
+                    return
+
+            self.schedule(user, wake)
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            with self.condition:
+                self.inflight -= 1
+                self.condition.notify()
+
+    @property
+    def late(self):
+        """
+        The fraction of steps dispatched while every worker was busy
+        """
+        return float(self.queued) / self.sent if self.sent else 0.0
+
+    def run(self):
+        """
+        Dispatches the users to the workers as they wake up until every
+        user is done, counting the steps that queue for a busy worker.
+        """
+        epoch = time.time()
+        self.deadline = epoch + self.ramp_up + (self.duration or 0)
+
+        for uid in xrange(self.users):
+            user = self.spawn(uid)
+            wake = epoch + self.ramp_up * uid / max(self.users, 1)
+            if self.begin(user, wake):
+                heapq.heappush(self.heap, (wake, next(self.sequence), user))
+
+        pool = ThreadPool(self.workers)
+        try:
+            while True:
+                with self.condition:
+                    if not self.heap and not self.inflight:
+                        break
+                    if not self.heap:
+                        self.condition.wait()
+                        continue
+
+                    wake  = self.heap[0][0]
+                    delay = wake - time.time()
+                    if delay > 0:
+                        self.condition.wait(delay)
+                        continue
+
+                    _, _, user = heapq.heappop(self.heap)
+                    if self.inflight >= self.workers: self.queued += 1
+                    self.inflight += 1
+                    self.sent     += 1
+                pool.apply_async(self.act, (user, wake))
+        finally:
+            pool.close()
+            pool.join()
+
+        if self.errors: raise self.errors[0]
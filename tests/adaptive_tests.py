@@ -0,0 +1,153 @@
+# tests.adaptive_tests
+# Tests for the stopping rules of adaptive runs
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 03:58:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: adaptive_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the stopping rules of adaptive runs
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import sys
+import time
+import unittest
+import numpy as np
+
+from StringIO import StringIO
+
+from drifter.adaptive import *
+from drifter.mock import MockServer
+from drifter.runner import Runner
+
+##########################################################################
+## Test case
+##########################################################################
+
+class AdaptiveTestCase(unittest.TestCase):
+
+    def test_z_score(self):
+        """
+        Assert the critical values of common confidence levels
+        """
+        self.assertAlmostEqual(z_score(0.95), 1.95996, places=4)
+        self.assertAlmostEqual(z_score(0.99), 2.57583, places=4)
+        self.assertRaises(ValueError, z_score, 1.0)
+
+    def test_interval(self):
+        """
+        Assert percentile intervals bracket the estimate and narrow with n
+        """
+        random    = np.random.RandomState(42)
+        estimator = Estimator()
+        estimator.record_many(random.lognormal(np.log(100), 0.5, 100))
+        self.assertEqual(estimator.interval(99, 1.96)[1:], (None, None))
+
+        estimator.record_many(random.lognormal(np.log(100), 0.5, 10000))
+        value, low, high = estimator.interval(99, 1.96)
+        self.assertLess(low, value)
+        self.assertLess(value, high)
+
+        truth = 100 * np.exp(0.5 * 2.3263)
+        self.assertLess(abs(value - truth) / truth, 0.05)
+
+        mean, low, high = estimator.mean_interval(1.96)
+        self.assertLess(low, mean)
+        self.assertLess(mean, high)
+
+    def test_required(self):
+        """
+        Assert the samples required for an interval to fall within the data
+        """
+        random = np.random.RandomState(42)
+        for q in (50, 90, 99):
+            n = required(q, 1.96)
+            estimator = Estimator()
+            estimator.record_many(random.lognormal(5, 1, n - 1))
+            self.assertIsNone(estimator.interval(q, 1.96)[1])
+            estimator.record_many(random.lognormal(5, 1, 1))
+            self.assertIsNotNone(estimator.interval(q, 1.96)[1])
+
+        self.assertEqual(StoppingRule(targets=(50, 'mean')).required(), 100)
+        self.assertGreater(StoppingRule(targets=(50, 99.9)).required(), 5000)
+
+        # Runs that cannot resolve their targets are warned about
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            Runner(converge=[99]).stopping_rule(['a'])
+            Runner(1000, converge=[99]).stopping_rule(['a'])
+            self.assertEqual(Runner(converge=[99]).runs, 100000)
+            self.assertEqual(Runner().runs, 100)
+            Runner(100, converge=[99]).stopping_rule(['a'])
+            warnings = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        self.assertEqual(warnings.count("Warning: "), 1)
+        self.assertIn("at most 100;", warnings)
+
+    def test_converged(self):
+        """
+        Assert the rule converges only on enough, steady enough samples
+        """
+        random = np.random.RandomState(42)
+        rule   = StoppingRule(targets=(50, 'mean'), tolerance=0.02, minimum=100)
+        rule.track(['a'])
+
+        for value in random.normal(100, 10, 50):
+            rule.record('a', value)
+        rule.record('b', 1.0)
+        self.assertIsNone(rule.done(50))
+        self.assertEqual(rule.estimators['a'].count, 50)
+
+        for value in random.normal(100, 10, 2000):
+            rule.record('a', value)
+        self.assertEqual(rule.done(2050), 'converged')
+
+        summary = rule.summary('a')
+        self.assertEqual(summary['count'], 2050)
+        self.assertEqual(list(summary['intervals']), ['p50', 'mean'])
+        self.assertLessEqual(summary['intervals']['p50']['width'], 0.02)
+        self.assertIn('(converged) after 2050', format_convergence({'a': summary}))
+
+    def test_budgets(self):
+        """
+        Assert the rule stops when the request or time budget is spent
+        """
+        rule = StoppingRule(targets=(99.9,), budget=0.05)
+        rule.track(['a'])
+        rule.record('a', 10.0)
+        self.assertEqual(rule.done(10, runs=10), 'requests')
+        self.assertIsNone(rule.done(10, runs=11))
+        time.sleep(0.06)
+        self.assertEqual(rule.done(10, runs=11), 'seconds')
+
+    def test_runner(self):
+        """
+        Assert a runner stops early once its estimates converge
+        """
+        server = MockServer(latency=0.002).start()
+        try:
+            for concurrency in (1, 4):
+                runner = Runner(5000, api_root=server.api_root, concurrency=concurrency,
+                                converge=[50], tolerance=0.05, quiet=True)
+                runner.request('sizes')
+
+                records = runner.results.records('GET /sizes')
+                summary = runner.results.meta['convergence']['GET /sizes']
+                self.assertEqual(summary['reason'], 'converged')
+                self.assertGreaterEqual(len(records), 100)
+                self.assertLess(len(records), 5000)
+                self.assertLessEqual(summary['intervals']['p50']['width'], 0.05)
+        finally:
+            server.stop()
+
+        runner = Runner(10, converge=[50])
+        self.assertRaises(ValueError, runner.users, None)
@@ -17,10 +17,12 @@ Tests for the API module
 ## Imports
 ##########################################################################
 
+import json
 import drifter
 import unittest
 
 from drifter.api import *
+from tests.distributed_tests import CannedServer, serve
 
 ##########################################################################
 ## Test case
@@ -53,3 +55,65 @@ class DrifterTestCase(unittest.TestCase):
         self.assertEqual('https://local.api.cobrain.com/catalogs/43', drifter.build_endpoint('catalogs', '43'))
         self.assertEqual('https://local.api.cobrain.com/catalogs/43/products', drifter.build_endpoint('catalogs', '43', 'products'))
         self.assertEqual('https://local.api.cobrain.com/catalogs/43/products', drifter.build_endpoint('catalogs/43/products'))
+
+    def test_keepalive_session(self):
+        """
+        Assert that drifter pools connections in a keep-alive session
+        """
+        drifter = Drifter(pool_size=42)
+        self.assertIsNotNone(drifter.session)
+        self.assertIs(drifter.client, drifter.session)
+
+        adapter = drifter.session.get_adapter(drifter.build_endpoint('sizes'))
+        self.assertEqual(adapter._pool_maxsize, 42)
+
+    def test_cold_connections(self):
+        """
+        Assert that cold mode asks for connections to be closed
+        """
+        drifter = Drifter(keepalive=False)
+        self.assertEqual(drifter.session.headers['Connection'], 'close')
+        self.assertNotEqual(Drifter().session.headers.get('Connection'), 'close')
+
+    def test_timed_adapter(self):
+        """
+        Assert requests through the adapter use and time new connections
+        """
+        server = serve(CannedServer())
+        try:
+            root    = "http://127.0.0.1:%i" % server.server_address[1]
+            client  = Drifter(api_root=root)
+            adapter = client.session.get_adapter(root)
+            self.assertIsInstance(adapter.poolmanager, TimedPoolManager)
+
+            reset_phases()
+            client.session.get(root + "/sizes")
+            first = get_phases()
+            reset_phases()
+            client.session.get(root + "/sizes")
+            again = get_phases()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        pool = adapter.poolmanager.connection_from_url(root)
+        self.assertIs(pool.ConnectionCls, TimedHTTPConnection)
+        self.assertGreater(first['connect'], 0)
+        self.assertIn('dns', first)
+        self.assertIn('response', first)
+
+        # The pooled connection is reused without any setup
+        self.assertNotIn('connect', again)
+        self.assertIn('response', again)
+
+    def test_payload_headers(self):
+        """
+        Assert building a payload does not mutate shared headers
+        """
+        drifter = Drifter()
+        headers, payload = drifter.build_payload({'a': 1})
+        self.assertEqual(headers, {'content-type': 'application/json'})
+        self.assertEqual(json.loads(payload), {'a': 1})
+
+        headers['X-Extra'] = 'leak'
+        self.assertNotIn('X-Extra', drifter.build_payload({})[0])
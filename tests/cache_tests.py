@@ -0,0 +1,163 @@
+# tests.cache_tests
+# Tests for the validator cache and conditional requests
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 02:10:54 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: cache_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the validator cache and conditional requests
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import requests
+import BaseHTTPServer
+
+from drifter.cache import *
+from drifter.runner import Runner
+from drifter.mock import MockServer, DEFAULT_SIZE
+from tests.distributed_tests import CannedServer, serve
+
+##########################################################################
+## Helpers
+##########################################################################
+
+class ChunkedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves a chunked body of DEFAULT_SIZE bytes with an ETag, without a
+    Content-Length, and answers requests with the ETag 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"chunked"':
+            self.send_response(304)
+            self.send_header("ETag", '"chunked"')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", '"chunked"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for _ in xrange(DEFAULT_SIZE // 1024):
+            self.wfile.write("400\r\n" + "x" * 1024 + "\r\n")
+        self.wfile.write("0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+class ChunkedServer(CannedServer):
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), ChunkedHandler)
+
+##########################################################################
+## Test case
+##########################################################################
+
+class ValidatorCacheTestCase(unittest.TestCase):
+
+    def test_key(self):
+        """
+        Assert keys depend on the method, URL and unconditional headers
+        """
+        key = ValidatorCache.key('get', '/sizes', {'API-Key': 'a'})
+        self.assertEqual(key, ValidatorCache.key('GET', '/sizes', {'api-key': 'a', 'If-None-Match': '"x"'}))
+        self.assertNotEqual(key, ValidatorCache.key('GET', '/sizes', {'API-Key': 'b'}))
+        self.assertNotEqual(key, ValidatorCache.key('GET', '/sizes?format=light', {'API-Key': 'a'}))
+
+    def test_lru(self):
+        """
+        Assert the cache evicts the least recently used validators
+        """
+        cache = ValidatorCache(2)
+        cache.put('a', Validators('"a"'))
+        cache.put('b', Validators('"b"'))
+        cache.get('a')
+        cache.put('c', Validators('"c"'))
+        self.assertEqual(len(cache), 2)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertRaises(ValueError, ValidatorCache, 0)
+
+    def test_conditional(self):
+        """
+        Assert cached validators are added to the request headers
+        """
+        cache = ValidatorCache()
+        headers, validators = cache.conditional('a', {'API-Key': 'k'})
+        self.assertEqual(headers, {'API-Key': 'k'})
+        self.assertIsNone(validators)
+
+        cache.put('a', Validators('"x"', 'Thu, 01 Jan 2015 00:00:00 GMT', 100))
+        headers, validators = cache.conditional('a', {'API-Key': 'k'})
+        self.assertEqual(headers['If-None-Match'], '"x"')
+        self.assertEqual(headers['If-Modified-Since'], 'Thu, 01 Jan 2015 00:00:00 GMT')
+        self.assertEqual(validators.nbytes, 100)
+
+    def test_mock_validation(self):
+        """
+        Assert the mock server answers matching conditional requests 304
+        """
+        server = MockServer().start()
+        try:
+            url  = server.api_root + "/sizes"
+            full = requests.get(url)
+            etag = full.headers['ETag']
+            self.assertEqual(requests.get(url, headers={'If-None-Match': etag}).status_code, 304)
+            self.assertEqual(requests.get(url, headers={'If-None-Match': '"stale"'}).status_code, 200)
+            modified = {'If-Modified-Since': full.headers['Last-Modified']}
+            self.assertEqual(requests.get(url, headers=modified).status_code, 304)
+        finally:
+            server.stop()
+
+    def test_runner(self):
+        """
+        Assert conditional runs record 200 and 304 series and bytes saved
+        """
+        server = MockServer().start()
+        try:
+            runner = Runner(10, api_root=server.api_root, conditional=True, quiet=True)
+            runner.request('sizes')
+            runner.request('categories')
+        finally:
+            server.stop()
+
+        results = runner.results
+        self.assertEqual(len(results['GET /sizes']), 10)
+        self.assertEqual(len(results['GET /sizes [200]']), 1)
+        self.assertEqual(len(results['GET /sizes [304]']), 9)
+        self.assertNotIn('GET /sizes [saved]', results)
+        self.assertTrue((results.records('GET /sizes [304]')['bytes'] == DEFAULT_SIZE).all())
+        self.assertTrue((results.records('GET /sizes')['bytes'][1:] == 0).all())
+        self.assertEqual(len(runner.cache), 2)
+
+    def test_streamed_runner(self):
+        """
+        Assert streamed chunked responses are cached with the bytes read
+        """
+        server = serve(ChunkedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(5, api_root=root, conditional=True, stream=True, quiet=True)
+            runner.request('sizes')
+            runner.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        results = runner.results
+        self.assertEqual(len(results['GET /sizes [304]']), 4)
+        self.assertTrue((results.records('GET /sizes [304]')['bytes'] == DEFAULT_SIZE).all())
+        self.assertEqual(runner.cache.entries.values()[0].nbytes, DEFAULT_SIZE)
@@ -0,0 +1,109 @@
+# tests.capacity_tests
+# Tests for the capacity search under a latency SLO
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 05:02:51 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: capacity_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the capacity search under a latency SLO
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+
+from drifter.capacity import *
+from drifter.mock import MockServer
+from drifter.runner import Runner
+
+##########################################################################
+## Test case
+##########################################################################
+
+class CapacityTestCase(unittest.TestCase):
+
+    def point(self, **kwargs):
+        point = {'count': 100, 'p99': 100.0, 'error_rate': 0.0, 'throughput': 50.0, 'offered': 50.0}
+        point.update(kwargs)
+        return point
+
+    def test_slo(self):
+        """
+        Assert steps violate the SLO on latency, errors or falling behind
+        """
+        slo = SLO(99, 300.0, errors=0.01, lag=0.1)
+        self.assertEqual(slo.violations(self.point()), [])
+        self.assertEqual(len(slo.violations(self.point(p99=301.0))), 1)
+        self.assertEqual(len(slo.violations(self.point(error_rate=0.02))), 1)
+        self.assertEqual(len(slo.violations(self.point(throughput=40.0))), 1)
+        self.assertEqual(len(slo.violations(self.point(count=0))), 1)
+        self.assertEqual(SLO(**slo.serialize()).key, 'p99')
+        self.assertEqual(capacity_label("GET /sizes", 50.0), "GET /sizes @ 50 rps")
+
+    def test_validation(self):
+        """
+        Assert searches reject unknown kinds and empty rate ranges
+        """
+        runner = Runner(quiet=True)
+        self.assertRaises(ValueError, CapacitySearch, runner, 'sizes', search='random')
+        self.assertRaises(ValueError, CapacitySearch, runner, 'sizes', start=100, maximum=50)
+
+    def test_search(self):
+        """
+        Assert step and binary searches find where a slow server saturates
+        """
+        # Two workers against 20ms responses saturate near 100 rps
+        server = MockServer(latency=0.02).start()
+        try:
+            for kind in SEARCHES:
+                runner  = Runner(api_root=server.api_root, concurrency=2, quiet=True)
+                slo     = SLO(99, 200.0, lag=0.25)
+                search  = CapacitySearch(runner, 'sizes', slo, start=40, maximum=320,
+                                         step=40, search=kind, duration=1.0)
+                summary = search.run()
+
+                rates = [point['rate'] for point in summary['curve']]
+                self.assertEqual(rates, sorted(rates))
+                self.assertIsNotNone(summary['saturation'])
+                self.assertTrue(40 <= summary['saturation']['rate'] < 160)
+                self.assertIn(capacity_label('GET /sizes', rates[0]), runner.results)
+                self.assertIn("Saturation: ", format_report(summary))
+
+                # The two workers, not the server, limit the rate
+                self.assertIsNone(summary['limit'])
+                self.assertIsNotNone(summary['client_bound'])
+                self.assertGreater(summary['client_bound']['rate'], summary['saturation']['rate'])
+                self.assertIn("Client bound at ", format_report(summary))
+        finally:
+            server.stop()
+
+    def test_sized_workers(self):
+        """
+        Assert steps without a concurrency have workers for the SLO latency
+        """
+        server = MockServer(latency=0.05).start()
+        try:
+            runner  = Runner(api_root=server.api_root, quiet=True)
+            search  = CapacitySearch(runner, 'sizes', SLO(99, 200.0, lag=0.25), start=40,
+                                     maximum=80, step=40, duration=1.0)
+            summary = search.run()
+            self.assertEqual([point['status'] for point in summary['curve']], ['ok', 'ok'])
+            self.assertEqual(summary['saturation']['rate'], 80)
+            self.assertLess(summary['saturation']['p99'], 200)
+
+            # Responses slower than the SLO fail the step, not the client
+            runner  = Runner(api_root=server.api_root, quiet=True)
+            summary = CapacitySearch(runner, 'sizes', SLO(99, 40.0), start=20, maximum=20,
+                                     duration=0.5).run()
+            self.assertIsNone(summary['saturation'])
+            self.assertEqual(summary['limit']['status'], 'fail')
+            self.assertIsNone(summary['client_bound'])
+        finally:
+            server.stop()
@@ -0,0 +1,106 @@
+# tests.chart_tests
+# Tests for downsampled and aggregated charting
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 01:06:12 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: chart_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for downsampled and aggregated charting
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from drifter.chart import *
+from drifter.stats import TimeSeries, CHARTS, RECORD
+
+##########################################################################
+## Test case
+##########################################################################
+
+class ChartTestCase(unittest.TestCase):
+
+    def setUp(self):
+        headless()
+        self.tmpdir = tempfile.mkdtemp()
+        random  = np.random.RandomState(42)
+        records = np.zeros(200000, dtype=RECORD)
+        records['start']   = 1.4e9 + np.arange(len(records)) * 0.01
+        records['latency'] = random.lognormal(np.log(500), 0.1, len(records))
+        records['latency'][123456] = 90000.0
+        self.series = TimeSeries()
+        self.series.extend('GET /sizes', records)
+        self.series.extend('GET /categories', records[:1000])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_minmax(self):
+        """
+        Assert min/max downsampling keeps the envelope of the series
+        """
+        values = self.series['GET /sizes']
+        xs, ys = minmax(values, 100)
+        self.assertEqual(len(ys), 200)
+        self.assertEqual(ys.max(), 90000.0)
+        self.assertEqual(ys.min(), values.min())
+        self.assertTrue((np.diff(xs) >= 0).all())
+
+        xs, ys = minmax(values[:50], 100)
+        self.assertTrue((ys == values[:50]).all())
+
+    def test_lttb(self):
+        """
+        Assert LTTB keeps the endpoints and the spike of the series
+        """
+        values = self.series['GET /sizes']
+        xs, ys = lttb(values, 500)
+        self.assertEqual(len(ys), 500)
+        self.assertEqual((xs[0], xs[-1]), (0, len(values) - 1))
+        self.assertIn(123456, xs)
+        self.assertTrue((np.diff(xs) > 0).all())
+        self.assertRaises(ValueError, downsample, values, 'median')
+
+    def test_bucket_means(self):
+        """
+        Assert long series are reduced to the means of their buckets
+        """
+        xs, ys = bucket_means(np.arange(1000.0), 10)
+        self.assertEqual(len(ys), 10)
+        self.assertAlmostEqual(ys[0], 49.5)
+
+    def test_render(self):
+        """
+        Assert every kind of chart renders large series headless and fast
+        """
+        for kind in CHARTS:
+            for ext in ('png', 'svg'):
+                path    = os.path.join(self.tmpdir, "%s.%s" % (kind, ext))
+                started = time.time()
+                self.series.display(kind=kind, saveto=path)
+                self.assertTrue(os.path.getsize(path) > 0)
+                self.assertLess(time.time() - started, 20)
+
+    def test_render_histograms(self):
+        """
+        Assert histogram series chart their distributions
+        """
+        series = TimeSeries(histogram=True)
+        series.extend('GET /sizes', self.series['GET /sizes'])
+        for kind in ('times', 'histogram', 'cdf'):
+            series.display(kind=kind, saveto=os.path.join(self.tmpdir, kind + ".png"))
+        self.assertRaises(ValueError, series.display, kind='heatmap')
+        self.assertRaises(ValueError, self.series.display, kind='pie')
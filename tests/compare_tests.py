@@ -0,0 +1,123 @@
+# tests.compare_tests
+# Tests for run-to-run comparisons
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 19:31:50 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: compare_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for run-to-run comparisons
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+import numpy as np
+
+from drifter.compare import *
+from drifter.stats import TimeSeries
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r') as f:
+        return TimeSeries.load(f)
+
+##########################################################################
+## Test case
+##########################################################################
+
+class CompareTestCase(unittest.TestCase):
+
+    def test_identical_runs(self):
+        """
+        Assert a run compared with itself has no regressions
+        """
+        series = fixture('phoenix-local.json')
+        result = compare(series, series, percentiles=(50, 99), iterations=200, seed=1)
+
+        self.assertEqual(list(result), ["GET /categories", "GET /merchants", "GET /sizes"])
+        for label, stats in result.items():
+            self.assertEqual(stats['p50']['delta'], 0)
+            self.assertLessEqual(stats['p50']['lower'], 0)
+            self.assertGreaterEqual(stats['p50']['upper'], 0)
+        self.assertEqual(regressions(result), [])
+        self.assertEqual(regressions(result, test='mannwhitney'), [])
+
+    def test_regression(self):
+        """
+        Assert a slower run is flagged by both tests
+        """
+        baseline  = fixture('phoenix-local.json')
+        candidate = fixture('phoenix-prototype.json')
+        result    = compare(baseline, candidate, percentiles=(50,), iterations=200, seed=1)
+
+        # The prototype also timed out more often on two endpoints
+        slower = lambda found: [item for item in found if item[1] == 'p50']
+        self.assertEqual(len(slower(regressions(result))), 3)
+        self.assertEqual(len(slower(regressions(result, test='mannwhitney'))), 3)
+        self.assertEqual(sorted(key for _, key, _ in regressions(result, threshold=100.0)),
+                         ['errors', 'errors'])
+
+        # The reverse comparison is an improvement, not a regression
+        reverse = compare(candidate, baseline, percentiles=(50,), iterations=200, seed=1)
+        self.assertEqual(regressions(reverse), [])
+
+    def test_histograms(self):
+        """
+        Assert histogram series are bootstrapped from their buckets
+        """
+        baseline  = TimeSeries(histogram=True).merge(fixture('phoenix-local.json'))
+        candidate = TimeSeries(histogram=True).merge(fixture('phoenix-prototype.json'))
+        result    = compare(baseline, candidate, percentiles=(50, 90), iterations=200, seed=1)
+
+        stats = result["GET /sizes"]
+        self.assertIsNone(stats['pvalue'])
+        self.assertLess(stats['p50']['lower'], stats['p50']['delta'])
+        self.assertGreater(stats['p50']['upper'], stats['p50']['delta'])
+        self.assertEqual(len([item for item in regressions(result) if item[1] != 'errors']), 6)
+
+        # Histograms have no Mann-Whitney test to fall back on
+        self.assertRaises(ValueError, regressions, result, test='mannwhitney')
+
+    def test_failing_candidate(self):
+        """
+        Assert missing, failing and more error prone labels regress
+        """
+        baseline  = TimeSeries()
+        candidate = TimeSeries()
+        latencies = np.random.RandomState(3).lognormal(3, 0.5, 500)
+        for label in ('GET /sizes', 'GET /brands', 'GET /colors'):
+            baseline.extend(label, latencies)
+        candidate.extend('GET /sizes', latencies)
+        for _ in xrange(50):
+            candidate.append('GET /sizes', 30000, error='timeout')
+            candidate.append('GET /brands', 10, error='connection')
+
+        result = compare(baseline, candidate, percentiles=(50,), iterations=100, seed=1)
+        self.assertEqual(result['GET /brands']['status'], 'empty')
+        self.assertEqual(result['GET /colors']['status'], 'missing')
+        self.assertAlmostEqual(result['GET /sizes']['errors']['candidate'], 50.0 / 550)
+        self.assertEqual(sorted((label, key) for label, key, _ in regressions(result)), [
+            ('GET /brands', 'empty'), ('GET /colors', 'missing'), ('GET /sizes', 'errors'),
+        ])
+        self.assertEqual(len(regressions(result, errors=0.1)), 2)
+
+        # A single extra failure is not a significant increase
+        candidate = TimeSeries()
+        for label in ('GET /sizes', 'GET /brands', 'GET /colors'):
+            candidate.extend(label, latencies)
+        candidate.append('GET /sizes', 30000, error='timeout')
+        self.assertEqual(regressions(compare(baseline, candidate, percentiles=(50,),
+                                             iterations=100, seed=1)), [])
@@ -0,0 +1,85 @@
+# tests.dashboard_tests
+# Tests for the live dashboards and their windowed aggregates
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 17:31:08 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: dashboard_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the live dashboards and their windowed aggregates
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import urllib2
+import unittest
+
+from StringIO import StringIO
+from drifter.dashboard import *
+
+##########################################################################
+## Test case
+##########################################################################
+
+class WindowTestCase(unittest.TestCase):
+
+    def test_rolling_window(self):
+        """
+        Assert the window reports only its last width seconds
+        """
+        window = Window(width=5)
+        for second in xrange(10):
+            for ms in xrange(1, 11):
+                window.record(1000 + second + 0.5, ms * (second + 1), error='http' if ms == 10 else None)
+
+        stats = window.snapshot(1009.5)
+        self.assertEqual(stats['rps'], 10.0)
+        self.assertEqual(stats['error_rate'], 0.1)
+        self.assertAlmostEqual(stats['p50'], 5 * 8, delta=1)
+
+        # Buckets that have rolled out of the window are ignored
+        self.assertIsNone(window.snapshot(1100)['p99'])
+
+    def test_monitor(self):
+        """
+        Assert the monitor tracks in flight requests and renders
+        """
+        monitor = Monitor()
+        monitor.begin("GET /sizes")
+        monitor.begin("GET /sizes")
+        monitor.end("GET /sizes", 12.0)
+
+        stats = monitor.snapshot()["GET /sizes"]
+        self.assertEqual(stats['inflight'], 1)
+        self.assertEqual(stats['count'], 1)
+        self.assertIn("GET /sizes", render(monitor.snapshot()))
+
+        stream = StringIO()
+        TerminalDashboard(monitor, stream=stream).draw()
+        self.assertTrue(stream.getvalue().startswith(CLEAR))
+
+    def test_http_dashboard(self):
+        """
+        Assert the HTTP dashboard serves the snapshot as JSON
+        """
+        monitor = Monitor()
+        monitor.begin("GET /sizes")
+        monitor.end("GET /sizes", 12.0)
+
+        dashboard = HTTPDashboard(monitor, port=0)
+        dashboard.start()
+        try:
+            stats = json.load(urllib2.urlopen(dashboard.url + "stats"))
+            page  = urllib2.urlopen(dashboard.url).read()
+        finally:
+            dashboard.stop()
+
+        self.assertEqual(stats["GET /sizes"]["count"], 1)
+        self.assertIn("/stats", page)
@@ -0,0 +1,162 @@
+# tests.distributed_tests
+# Tests for the distributed coordinator and workers
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 13:58:09 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: distributed_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the distributed coordinator and workers
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import socket
+import threading
+import unittest
+import SocketServer
+import BaseHTTPServer
+
+from drifter.distributed import *
+
+##########################################################################
+## Helpers
+##########################################################################
+
+class CannedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Serves the same small JSON document for every GET request.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"sizes": [{"name": "small"}, {"name": "large"}]})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class CannedServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), CannedHandler)
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+##########################################################################
+## Test case
+##########################################################################
+
+class DistributedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api    = serve(CannedServer())
+        self.worker = serve(Worker('127.0.0.1', 0, token='secret'))
+        self.root   = "http://127.0.0.1:%i" % self.api.server_address[1]
+
+    def tearDown(self):
+        for server in (self.api, self.worker):
+            server.shutdown()
+            server.server_close()
+
+    def test_protocol(self):
+        """
+        Assert messages survive the length-prefixed framing
+        """
+        left, right = socket.socketpair()
+        message = {"labels": ["GET /sizes"] * 10000}
+        send_message(left, message)
+        self.assertEqual(recv_message(right), message)
+
+    def test_split_jobs(self):
+        """
+        Assert runs and rate are shared evenly between jobs
+        """
+        jobs = split_jobs({'endpoints': ['sizes'], 'options': {'runs': 10, 'rate': 30}}, 3)
+        self.assertEqual([job['options']['runs'] for job in jobs], [4, 3, 3])
+        self.assertEqual([job['options']['rate'] for job in jobs], [10, 10, 10])
+
+    def test_coordinated_run(self):
+        """
+        Assert a coordinator merges local and remote worker results
+        """
+        coordinator = Coordinator(2, [self.worker.address], runs=30, api_root=self.root,
+                                  token='secret')
+        results = coordinator.run(['sizes'])
+
+        self.assertEqual(len(results['GET /sizes']), 30)
+        self.assertEqual(results.records('GET /sizes')['status'].tolist(), [200] * 30)
+
+    def test_coordinated_histograms(self):
+        """
+        Assert a coordinator merges worker histograms
+        """
+        coordinator = Coordinator(0, [self.worker.address, self.worker.address],
+                                  runs=20, api_root=self.root, histogram=True, token='secret')
+        results = coordinator.run(['sizes'])
+
+        self.assertTrue(results.histogram)
+        self.assertEqual(results['GET /sizes'].count, 20)
+
+    def test_worker_error(self):
+        """
+        Assert worker failures are raised by the coordinator
+        """
+        coordinator = Coordinator(0, [self.worker.address], runs=1, api_root=self.root,
+                                  token='secret')
+        with self.assertRaises(Exception):
+            coordinator.run(['nonexistent'])
+
+    def test_worker_token(self):
+        """
+        Assert workers only run jobs that carry their token
+        """
+        self.assertRaises(ValueError, Worker, '127.0.0.1', 0)
+        self.assertRaises(ValueError, Coordinator, 0, [self.worker.address])
+
+        for token in ('wrong', u'secr\xe9t'):
+            coordinator = Coordinator(0, [self.worker.address], runs=1, api_root=self.root,
+                                      token=token)
+            with self.assertRaisesRegexp(Exception, 'Unauthorized'):
+                coordinator.run(['sizes'])
+
+        sock = socket.create_connection(self.worker.server_address)
+        try:
+            send_message(sock, {'endpoints': ['sizes'], 'options': {'api_root': self.root}})
+            self.assertIn('Unauthorized', recv_message(sock)['error'])
+        finally:
+            sock.close()
+
+    def test_message_limit(self):
+        """
+        Assert oversized frames are rejected before they are read
+        """
+        left, right = socket.socketpair()
+        send_message(left, {"labels": ["GET /sizes"] * 100})
+        self.assertRaises(IOError, recv_message, right, 100)
+
+        # Workers refuse jobs over their limit without reading them
+        sock = socket.create_connection(self.worker.server_address)
+        try:
+            sock.sendall(HEADER.pack(MAX_JOB + 1))
+            self.assertIn('Bad job', recv_message(sock)['error'])
+        finally:
+            sock.close()
@@ -0,0 +1,128 @@
+# tests.drift_tests
+# Tests for windowed aggregation and drift detection
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 18:42:17 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: drift_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for windowed aggregation and drift detection
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from drifter.drift import *
+from drifter.stats import TimeSeries, RECORD
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+def fixture(seconds=10, rate=100, slowdown=None, seed=42):
+    """
+    Records at rate per second with lognormal latencies around 100 ms,
+    slowed down by a factor from the given second on.
+    """
+    random  = np.random.RandomState(seed)
+    records = np.zeros(seconds * rate, dtype=RECORD)
+    records['start']   = 1000.0 + np.arange(len(records)) / float(rate)
+    records['latency'] = random.lognormal(np.log(100), 0.25, len(records))
+    if slowdown:
+        second, factor = slowdown
+        records['latency'][second * rate:] *= factor
+    return records
+
+##########################################################################
+## Test case
+##########################################################################
+
+class DriftTestCase(unittest.TestCase):
+
+    def test_tumbling_windows(self):
+        """
+        Assert tumbling windows match per-window numpy statistics
+        """
+        records = fixture()
+        records['error'][::10] = 3
+        series  = windows(records, 2.0, percentiles=(50, 99))
+
+        self.assertEqual(len(series['end']), 5)
+        self.assertEqual(series['count'].tolist(), [180] * 5)
+        self.assertEqual(series['errors'].tolist(), [20] * 5)
+        for idx in xrange(5):
+            chunk = records[idx * 200:(idx + 1) * 200]
+            chunk = chunk['latency'][chunk['error'] == 0]
+            self.assertAlmostEqual(series['mean'][idx], chunk.mean())
+            self.assertAlmostEqual(series['p50'][idx], np.percentile(chunk, 50))
+            self.assertAlmostEqual(series['p99'][idx], np.percentile(chunk, 99))
+
+    def test_rolling_windows(self):
+        """
+        Assert rolling windows overlap by their width over the step
+        """
+        records = fixture()
+        series  = windows(records, 3.0, step=1.0)
+
+        self.assertEqual(len(series['end']), 10)
+        self.assertEqual(series['count'].tolist(), [100, 200] + [300] * 8)
+        latency = records['latency'][400:700]
+        self.assertAlmostEqual(series['p90'][6], np.percentile(latency, 90))
+        self.assertRaises(ValueError, windows, records, 3.0, 2.0)
+
+        # Every window agrees with numpy over its own records
+        records['error'][::7] = 2
+        series  = windows(records, 4.0, step=0.5, percentiles=(50, 99))
+        for idx, (start, end) in enumerate(zip(series['start'], series['end'])):
+            inside = (records['start'] >= start) & (records['start'] < end - 1e-9)
+            chunk  = records['latency'][inside & (records['error'] == 0)]
+            self.assertEqual(series['count'][idx], len(chunk))
+            self.assertEqual(series['errors'][idx], np.count_nonzero(inside) - len(chunk))
+            self.assertAlmostEqual(series['mean'][idx], chunk.mean())
+            self.assertAlmostEqual(series['p99'][idx], np.percentile(chunk, 99))
+
+    def test_series_windows(self):
+        """
+        Assert every label of a TimeSeries is windowed
+        """
+        series = TimeSeries()
+        series.extend("GET /sizes", fixture())
+        series.extend("GET /merchants", fixture(seconds=4))
+
+        result = series_windows(series, 1.0)
+        self.assertEqual(list(result), ["GET /merchants", "GET /sizes"])
+        self.assertIn("p99.9", result["GET /sizes"])
+
+        histograms = TimeSeries(histogram=True).merge(series)
+        self.assertRaises(ValueError, series_windows, histograms, 1.0)
+
+    def test_mannwhitney(self):
+        """
+        Assert the Mann-Whitney test separates shifted samples
+        """
+        random = np.random.RandomState(7)
+        base   = random.normal(100, 10, 200)
+        self.assertLess(mannwhitney(base, base + 10)[1], 1e-6)
+        self.assertGreater(mannwhitney(base, random.normal(100, 10, 200))[1], 0.01)
+        self.assertGreater(mannwhitney(base + 10, base)[1], 0.99)
+
+    def test_detect(self):
+        """
+        Assert drift is flagged only where the latency regressed
+        """
+        self.assertEqual(detect(fixture(), 1.0), [])
+
+        found = detect(fixture(slowdown=(6, 1.5)), 1.0)
+        self.assertEqual([item['window'] for item in found], [6, 7, 8, 9])
+        self.assertAlmostEqual(found[0]['change'], 0.5, delta=0.15)
+
+        found = detect(fixture(slowdown=(6, 1.5)), 1.0, baseline='previous')
+        self.assertEqual([item['window'] for item in found], [6])
@@ -0,0 +1,112 @@
+# tests.histogram_tests
+# Tests for the HDR-style histogram
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 11:48:02 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: histogram_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the HDR-style histogram
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import unittest
+import numpy as np
+
+from drifter.histogram import *
+
+##########################################################################
+## Test case
+##########################################################################
+
+class HistogramTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.samples = np.random.RandomState(42).lognormal(5, 1, 50000)
+
+    def test_constant_memory(self):
+        """
+        Assert the histogram does not grow with the number of samples
+        """
+        histogram = Histogram()
+        size = histogram.counts.nbytes
+        histogram.record_many(self.samples)
+        histogram.record_many(self.samples)
+        self.assertEqual(histogram.counts.nbytes, size)
+        self.assertEqual(len(histogram), 2 * len(self.samples))
+
+    def test_record(self):
+        """
+        Assert single values land in the same buckets as batches
+        """
+        values  = np.concatenate([self.samples[:5000], [0.0, 0.0005, 1.0, 3600000.0, 1e8]])
+        single  = Histogram()
+        batched = Histogram()
+        for value in values:
+            single.record(value)
+        batched.record_many(values)
+
+        self.assertTrue((single.counts == batched.counts).all())
+        self.assertEqual(single.count, batched.count)
+        self.assertEqual(single.min(), batched.min())
+        self.assertEqual(single.max(), batched.max())
+        self.assertAlmostEqual(single.mean(), batched.mean())
+        self.assertRaises(ValueError, single.record, -1.0)
+
+    def test_statistics(self):
+        """
+        Assert statistics agree with numpy within the precision
+        """
+        histogram = Histogram(precision=3)
+        histogram.record_many(self.samples)
+
+        self.assertAlmostEqual(histogram.mean(), np.mean(self.samples))
+        self.assertAlmostEqual(histogram.stddev(), np.std(self.samples))
+        self.assertEqual(histogram.min(), self.samples.min())
+        self.assertEqual(histogram.max(), self.samples.max())
+
+        for q in (50, 90, 99):
+            expected = np.percentile(self.samples, q)
+            self.assertLess(abs(histogram.percentile(q) - expected) / expected, 0.005)
+
+    def test_merge(self):
+        """
+        Assert merged histograms equal a histogram of all samples
+        """
+        first, second, whole = Histogram(), Histogram(), Histogram()
+        first.record_many(self.samples[:1000])
+        second.record_many(self.samples[1000:])
+        whole.record_many(self.samples)
+
+        first.merge(second)
+        self.assertTrue(np.array_equal(first.counts, whole.counts))
+        self.assertEqual(first.percentile(99), whole.percentile(99))
+
+        with self.assertRaises(ValueError):
+            first.merge(Histogram(precision=2))
+
+    def test_serialize(self):
+        """
+        Assert histograms round trip through JSON
+        """
+        histogram = Histogram(precision=2)
+        histogram.record_many(self.samples)
+        clone = Histogram.deserialize(json.loads(json.dumps(histogram.serialize())))
+
+        self.assertTrue(np.array_equal(histogram.counts, clone.counts))
+        self.assertEqual(histogram.mean(), clone.mean())
+
+    def test_negative(self):
+        """
+        Assert negative values cannot be recorded
+        """
+        with self.assertRaises(ValueError):
+            Histogram().record(-1)
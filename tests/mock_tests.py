@@ -0,0 +1,73 @@
+# tests.mock_tests
+# Tests for the local mock Phoenix-API server
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 23:52:40 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: mock_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the local mock Phoenix-API server
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import unittest
+import requests
+
+from drifter.mock import *
+from drifter.runner import Runner
+
+##########################################################################
+## Test case
+##########################################################################
+
+class MockTestCase(unittest.TestCase):
+
+    def test_payload(self):
+        """
+        Assert canned documents are valid JSON of the requested size
+        """
+        for size in (10, 100, 2048, 100000):
+            text = payload('sizes', size)
+            self.assertIn('sizes', json.loads(text))
+            if size >= 100:
+                self.assertEqual(len(text), size)
+
+    def test_serve(self):
+        """
+        Assert the server serves the resources after the injected latency
+        """
+        server = MockServer(size={'sizes': 512}, latency=0.05).start()
+        try:
+            response = requests.get(server.api_root + "/sizes?format=light")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.content), 512)
+            self.assertGreaterEqual(response.elapsed.total_seconds(), 0.05)
+            self.assertEqual(len(requests.post(server.api_root + "/v1/categories/", data="{}").content), DEFAULT_SIZE)
+            self.assertEqual(requests.get(server.api_root + "/users").status_code, 404)
+        finally:
+            server.stop()
+
+    def test_runner(self):
+        """
+        Assert a runner records the injected latency against the server
+        """
+        server = MockServer(latency={'distribution': 'uniform', 'min': 0.01, 'max': 0.02}, seed=42).start()
+        try:
+            runner = Runner(20, api_root=server.api_root, concurrency=4, quiet=True)
+            runner.request('sizes')
+        finally:
+            server.stop()
+
+        records = runner.results.records('GET /sizes')
+        self.assertEqual(len(records), 20)
+        self.assertTrue((records['error'] == 0).all())
+        self.assertTrue((records['latency'] >= 10).all())
+        self.assertTrue((records['bytes'] == DEFAULT_SIZE).all())
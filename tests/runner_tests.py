@@ -0,0 +1,211 @@
+# tests.runner_tests
+# Tests for the runner module
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 09:12:44 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: runner_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the runner module
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from drifter.runner import *
+from drifter.stats import phase_label
+from drifter.store import read
+from tests.distributed_tests import CannedServer, serve
+
+##########################################################################
+## Helpers
+##########################################################################
+
+class SlowMethod(object):
+    """
+    A stand in for a Drifter method that sleeps and tracks concurrency.
+    """
+
+    def __init__(self, delay=0.01):
+        self.delay    = delay
+        self.calls    = 0
+        self.inflight = 0
+        self.peak     = 0
+        self.lock     = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.calls    += 1
+            self.inflight += 1
+            self.peak      = max(self.peak, self.inflight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.inflight -= 1
+        return {}
+
+class FailingMethod(object):
+    """
+    A stand in for a Drifter method that raises the given exception.
+    """
+
+    def __init__(self, exception):
+        self.exception = exception
+
+    def __call__(self, *args, **kwargs):
+        raise self.exception
+
+##########################################################################
+## Test case
+##########################################################################
+
+class RunnerTestCase(unittest.TestCase):
+
+    def test_sequential_execute(self):
+        """
+        Assert the default runner sends one request at a time
+        """
+        method = SlowMethod()
+        runner = Runner(10)
+        times, delta = runner.execute(method, label="seq")
+
+        self.assertEqual(method.calls, 10)
+        self.assertEqual(method.peak, 1)
+        self.assertEqual(len(times), 10)
+        self.assertIn("seq", runner.results)
+
+    def test_concurrent_execute(self):
+        """
+        Assert a concurrent runner keeps many requests in flight
+        """
+        method = SlowMethod(0.05)
+        runner = Runner(40, concurrency=20)
+        times, delta = runner.execute(method, label="con")
+
+        self.assertEqual(method.calls, 40)
+        self.assertGreater(method.peak, 1)
+        self.assertEqual(len(times), 40)
+        self.assertLess(delta, 40 * 0.05)
+
+    def test_open_loop_execute(self):
+        """
+        Assert an open-loop runner measures from the intended send time
+        """
+        method = SlowMethod(0.05)
+        runner = Runner(20, rate=100, concurrency=1, quiet=True)
+        times, delta = runner.execute(method, label="open")
+
+        # A single worker cannot keep up, so latency includes queueing
+        self.assertEqual(method.calls, 20)
+        self.assertEqual(len(times), 20)
+        self.assertGreater(times.max(), 5 * 50)
+        self.assertGreater(runner.late, 0.5)
+
+    def test_open_loop_workers(self):
+        """
+        Assert open-loop workers are sized from the rate unless given
+        """
+        self.assertEqual(in_flight(100, 0.05), 10)
+        self.assertEqual(Runner(rate=100, latency=0.05).workers(), 10)
+        self.assertEqual(Runner(rate=100, concurrency=3).workers(), 3)
+        self.assertEqual(Runner().workers(), 1)
+
+        method = SlowMethod(0.05)
+        runner = Runner(20, rate=100, latency=0.1, quiet=True)
+        times, delta = runner.execute(method, label="open")
+        self.assertGreaterEqual(method.peak, 4)
+        self.assertLess(times.max(), 100)
+        self.assertEqual(runner.late, 0.0)
+
+    def test_failures_recorded(self):
+        """
+        Assert request failures are recorded rather than aborting the run
+        """
+        runner = Runner(5)
+        runner.execute(FailingMethod(Timeout()), label="timeout")
+        runner.execute(FailingMethod(ConnectionError()), label="refused")
+
+        self.assertEqual(runner.results.errors("timeout")['timeout'], 5)
+        self.assertEqual(runner.results.errors("refused")['connection'], 5)
+        self.assertEqual(len(runner.results["timeout"]), 0)
+        self.assertEqual(len(runner.results.records("refused")), 5)
+
+    def test_streaming_execute(self):
+        """
+        Assert streaming mode records first byte, last byte and size
+        """
+        server = serve(CannedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(5, api_root=root, stream=True, validate=True)
+            runner.request("sizes")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        records = runner.results.records("GET /sizes")
+        first   = runner.results[phase_label("GET /sizes", "ttfb")]
+        self.assertEqual(len(records), 5)
+        self.assertTrue((records['bytes'] > 0).all())
+        self.assertEqual(records['status'].tolist(), [200] * 5)
+        self.assertEqual(len(first), 5)
+        self.assertTrue((first <= records['latency']).all())
+
+    def test_result_log(self):
+        """
+        Assert results are streamed to the log while the runner runs
+        """
+        tmpdir = tempfile.mkdtemp()
+        path   = os.path.join(tmpdir, "results.log")
+        server = serve(CannedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(5, api_root=root, log=path)
+            runner.request("sizes")
+            runner.close()
+
+            logged = read(path)
+            self.assertEqual(len(logged.records("GET /sizes")), 5)
+            self.assertEqual(logged.elapsed["GET /sizes"], runner.results.elapsed["GET /sizes"])
+        finally:
+            server.shutdown()
+            server.server_close()
+            shutil.rmtree(tmpdir)
+
+    def test_phase_breakdown(self):
+        """
+        Assert phases are recorded and connection setup only when cold
+        """
+        server = serve(CannedServer())
+        try:
+            root = "http://127.0.0.1:%i" % server.server_address[1]
+            warm = Runner(5, api_root=root, phases=True)
+            warm.request("sizes")
+            cold = Runner(5, api_root=root, phases=True, keepalive=False)
+            cold.request("sizes")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        for runner in (warm, cold):
+            phases = runner.results.phases("GET /sizes")
+            self.assertEqual(list(phases.keys()), list(PHASES))
+            total  = sum(phases.values())
+            self.assertTrue((total <= runner.results["GET /sizes"] + 1e-6).all())
+
+        # Keep-alive only connects on the first request
+        connects = warm.results.phases("GET /sizes")['connect']
+        self.assertGreater(connects[0], 0)
+        self.assertTrue((connects[1:] == 0).all())
+        self.assertTrue((cold.results.phases("GET /sizes")['connect'] > 0).all())
@@ -0,0 +1,176 @@
+# tests.scenario_tests
+# Tests for scenario files and the weighted scheduler
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 20:34:45 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: scenario_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for scenario files and the weighted scheduler
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import json
+import yaml
+import tempfile
+import unittest
+
+from collections import Counter
+from drifter.scenario import *
+from drifter.runner import Runner
+from drifter.template import RequestTemplate
+from tests.distributed_tests import CannedServer, serve
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+SCENARIO = {
+    'name': 'projections',
+    'variables': {'format': ['light', 'full'], 'user': 'me'},
+    'requests': [
+        {'name': 'GET /sizes ({format})', 'path': 'sizes', 'params': {'format': '{format}'}, 'weight': 3},
+        {'method': 'post', 'path': 'users/{user}/items', 'body': {'items': ['{user}']}, 'weight': 1},
+    ]
+}
+
+EXAMPLE  = os.path.join(os.path.dirname(__file__), '..', 'conf', 'scenarios', 'projections.yaml')
+
+##########################################################################
+## Test case
+##########################################################################
+
+class ScenarioTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.NamedTemporaryFile(suffix=".yaml", delete=False).name
+        with open(self.path, 'w') as conf:
+            yaml.dump(SCENARIO, conf, default_flow_style=False)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load(self):
+        """
+        Assert scenarios load from YAML into request configurations
+        """
+        scenario = ScenarioConfiguration.load_file(self.path)
+        self.assertEqual(scenario['name'], 'projections')
+        self.assertEqual(len(scenario.requests), 2)
+        self.assertIsInstance(scenario.requests[0], RequestConfiguration)
+        self.assertEqual(scenario.requests[1]['method'], 'POST')
+        self.assertEqual(scenario.requests[1]['name'], 'POST /users/{user}/items')
+        self.assertEqual(len(ScenarioConfiguration.load_file(EXAMPLE).requests), 3)
+
+        # Scenarios survive serialization to distributed workers
+        clone = ScenarioConfiguration.deserialize(scenario.serialize())
+        self.assertEqual(clone.serialize(), scenario.serialize())
+
+    def test_render(self):
+        """
+        Assert request templates are filled from the scenario variables
+        """
+        scenario = ScenarioConfiguration.load_file(self.path)
+        template = RequestTemplate(scenario.requests[1], 'http://api', variables=scenario.variables)
+        prepared = template.prepare()
+        self.assertEqual(prepared.url, 'http://api/users/me/items')
+        self.assertEqual(json.loads(prepared.body), {'items': ['me']})
+        self.assertNotIn('API-Key', prepared.headers)
+
+        prepared = RequestTemplate(scenario.requests[0], 'http://api', variables=scenario.variables).prepare()
+        self.assertIn(prepared.context['format'], ('light', 'full'))
+        self.assertTrue(prepared.url.endswith('format=%s' % prepared.context['format']))
+
+    def test_endpoint(self):
+        """
+        Assert built in endpoints can change their method
+        """
+        self.assertEqual(endpoint('brands')['name'], 'GET /merchants')
+        self.assertEqual(endpoint('sizes', 'delete')['name'], 'DELETE /sizes')
+        self.assertRaises(KeyError, endpoint, 'users')
+
+    def test_weighted_scheduler(self):
+        """
+        Assert requests are drawn in proportion to their weights
+        """
+        scenario  = ScenarioConfiguration.load_file(self.path)
+        scheduler = WeightedScheduler(scenario.requests, seed=42)
+        counts    = Counter(scheduler.next()['name'] for _ in xrange(10000))
+        self.assertAlmostEqual(counts['GET /sizes ({format})'] / 10000.0, 0.75, delta=0.02)
+        self.assertRaises(ValueError, WeightedScheduler, [])
+
+    def test_run_scenario(self):
+        """
+        Assert a runner sends the mix of a scenario
+        """
+        scenario = ScenarioConfiguration.deserialize({
+            'variables': {'format': ['light', 'full']},
+            'requests': [
+                {'name': 'GET /sizes', 'path': 'sizes', 'params': {'format': '{format}'}, 'weight': 1},
+                {'name': 'GET /categories', 'path': 'categories', 'weight': 1},
+            ]
+        })
+
+        server = serve(CannedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(40, api_root=root, concurrency=4, quiet=True)
+            runner.scenario(scenario, seed=1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        results = runner.results
+        self.assertEqual(len(results['GET /sizes']) + len(results['GET /categories']), 40)
+        self.assertGreater(len(results['GET /sizes']), 0)
+        self.assertEqual(results.elapsed['GET /sizes'], results.elapsed['GET /categories'])
+
+    def test_seeded_labels(self):
+        """
+        Assert seeded runs choose the same variables and can label by them
+        """
+        scenario = ScenarioConfiguration.deserialize({
+            'variables': {'format': ['light', 'full', 'none']},
+            'requests': [{'name': 'GET /sizes', 'path': 'sizes', 'params': {'format': '{format}'}}],
+        })
+
+        server = serve(CannedServer())
+        try:
+            root = "http://127.0.0.1:%i" % server.server_address[1]
+            runs = []
+            for seed in (7, 7):
+                runner = Runner(60, api_root=root, quiet=True)
+                runner.scenario(scenario, seed=seed, label_by=['format'])
+                runs.append(runner.results)
+
+            runner = Runner(10, api_root=root, quiet=True, converge=[50])
+            self.assertRaises(ValueError, runner.scenario, scenario, label_by=['format'])
+
+            # Variables in the name label the results by default, even converging
+            named  = ScenarioConfiguration.deserialize(dict(scenario.serialize(), requests=[
+                {'name': 'GET /sizes ({format})', 'path': 'sizes', 'params': {'format': '{format}'}},
+            ]))
+            runner = Runner(1000, api_root=root, concurrency=8, quiet=True, converge=[50], tolerance=0.5)
+            runner.scenario(named, seed=7)
+            runs.append(runner.results)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        labels = sorted(runs[0])
+        self.assertEqual(labels, ['GET /sizes (format=full)', 'GET /sizes (format=light)',
+                                  'GET /sizes (format=none)'])
+        self.assertEqual(sorted(runs[2]), ['GET /sizes (full)', 'GET /sizes (light)', 'GET /sizes (none)'])
+        self.assertTrue(all(len(runs[2][label]) >= 20 for label in runs[2]))
+        self.assertEqual(sum(len(runs[0][label]) for label in labels), 60)
+        for label in labels:
+            self.assertEqual(len(runs[0][label]), len(runs[1][label]))
+            self.assertGreater(runs[0].elapsed[label], 0)
@@ -0,0 +1,79 @@
+# tests.schedule_tests
+# Tests for the open-loop schedule module
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 10:31:50 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: schedule_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the open-loop schedule module
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from drifter.schedule import *
+
+##########################################################################
+## Test case
+##########################################################################
+
+class ScheduleTestCase(unittest.TestCase):
+
+    def test_uniform_steady(self):
+        """
+        Assert a uniform schedule is evenly spaced at the rate
+        """
+        offsets = Schedule(10, runs=50).offsets()
+        self.assertEqual(len(offsets), 50)
+        self.assertTrue(np.allclose(np.diff(offsets), 0.1))
+        self.assertEqual(offsets[0], 0)
+
+    def test_duration(self):
+        """
+        Assert a duration schedule offers rate * duration requests
+        """
+        schedule = Schedule(20, duration=5)
+        self.assertEqual(len(schedule.offsets()), 100)
+        self.assertAlmostEqual(schedule.length, 5)
+
+    def test_ramps(self):
+        """
+        Assert that ramps space requests more widely at the edges
+        """
+        schedule = Schedule(10, duration=10, ramp_up=4, ramp_down=4)
+        offsets  = schedule.offsets()
+        gaps     = np.diff(offsets)
+
+        self.assertEqual(len(offsets), int(schedule.expected))
+        self.assertTrue(np.all(gaps > 0))
+        self.assertGreater(gaps[0], gaps[len(gaps) // 2])
+        self.assertGreater(gaps[-1], gaps[len(gaps) // 2])
+        self.assertLessEqual(offsets[-1], schedule.length)
+
+    def test_poisson(self):
+        """
+        Assert poisson arrivals average out to the target rate
+        """
+        offsets = Schedule(100, duration=100, arrival='poisson', seed=42).offsets()
+        self.assertTrue(np.all(np.diff(offsets) >= 0))
+        self.assertAlmostEqual(np.mean(np.diff(offsets)), 0.01, places=3)
+
+    def test_bad_schedule(self):
+        """
+        Assert invalid schedules raise ValueError
+        """
+        with self.assertRaises(ValueError):
+            Schedule(0, runs=10)
+        with self.assertRaises(ValueError):
+            Schedule(10)
+        with self.assertRaises(ValueError):
+            Schedule(10, runs=10, arrival='bursty')
@@ -0,0 +1,267 @@
+# tests.stats_tests
+# Tests for the statistics module
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 11:52:36 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: stats_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the statistics module
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+import threading
+import numpy as np
+
+from StringIO import StringIO
+from drifter.stats import *
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'fixtures')
+
+def fixture(name):
+    return open(os.path.join(FIXTURES, name), 'r')
+
+##########################################################################
+## Test case
+##########################################################################
+
+class TimeSeriesTestCase(unittest.TestCase):
+
+    def test_load_fixture(self):
+        """
+        Assert that fixtures load as raw samples
+        """
+        with fixture('phoenix-local.json') as stream:
+            series = TimeSeries.load(stream)
+
+        self.assertFalse(series.histogram)
+        self.assertIn('GET /merchants', series)
+        self.assertAlmostEqual(series.mean('GET /merchants'), 526.712, places=3)
+
+    def test_histogram_statistics(self):
+        """
+        Assert the histogram backend agrees with the raw backend
+        """
+        with fixture('phoenix-local.json') as stream:
+            raw = TimeSeries.load(stream)
+
+        compact = TimeSeries(histogram=True).merge(raw)
+        for label in raw:
+            self.assertAlmostEqual(raw.mean(label), compact.mean(label))
+            self.assertEqual(raw.max(label), compact.max(label))
+            self.assertEqual(raw.min(label), compact.min(label))
+            self.assertLess(abs(raw.median(label) - compact.median(label)) / raw.median(label), 0.01)
+
+    def test_histogram_timeouts(self):
+        """
+        Assert negative samples are counted as timeouts in histograms
+        """
+        series = TimeSeries(histogram=True)
+        series.extend('GET /sizes', [10, 20, -1, 30])
+        series.append('GET /sizes', -1)
+
+        self.assertEqual(series.errors('GET /sizes')['timeout'], 2)
+        self.assertEqual(len(series['GET /sizes']), 3)
+        self.assertEqual(series.mean('GET /sizes'), 20)
+
+    def test_histogram_dump(self):
+        """
+        Assert histogram series round trip through dump and load
+        """
+        series = TimeSeries(histogram=True)
+        series.extend('GET /sizes', np.arange(1, 1001))
+        series.append('GET /sizes', -1)
+
+        stream = StringIO()
+        series.dump(stream)
+        stream.seek(0)
+        loaded = TimeSeries.load(stream)
+
+        self.assertTrue(loaded.histogram)
+        self.assertEqual(loaded.errors('GET /sizes')['timeout'], 1)
+        self.assertEqual(loaded.percentile('GET /sizes', 99), series.percentile('GET /sizes', 99))
+
+    def test_summary(self):
+        """
+        Assert the one pass summary agrees with numpy
+        """
+        values = np.random.RandomState(7).lognormal(5, 1, 1001)
+        stats  = summarize(values, (50, 90, 99, 99.9))
+
+        self.assertEqual(stats['count'], 1001)
+        self.assertAlmostEqual(stats['mean'], np.mean(values))
+        self.assertAlmostEqual(stats['stddev'], np.std(values))
+        self.assertAlmostEqual(stats['median'], np.median(values))
+        for q in (50, 90, 99, 99.9):
+            self.assertAlmostEqual(stats[pkey(q)], np.percentile(values, q))
+
+    def test_batch_summary(self):
+        """
+        Assert the batched summaries of a ragged array agree with summarize
+        """
+        random = np.random.RandomState(7)
+        arrays = [random.lognormal(5, 1, size) for size in (1, 0, 2, 1001, 17)]
+        ragged = Ragged.concatenate(arrays)
+        self.assertEqual(len(ragged), 5)
+        self.assertEqual(list(ragged.counts), [1, 0, 2, 1001, 17])
+        self.assertTrue((ragged[3] == arrays[3]).all())
+
+        for values, stats in zip(arrays, batch_summarize(ragged, (50, 90, 99.9))):
+            expected = summarize(values, (50, 90, 99.9))
+            self.assertEqual(list(stats), list(expected))
+            for key, value in expected.items():
+                self.assertAlmostEqual(stats[key], value)
+
+    def test_concurrent_ragged(self):
+        """
+        Assert series can be summarized while results are appended
+        """
+        series = TimeSeries()
+        series.extend('GET /sizes', [10, 20, 30])
+
+        def append():
+            for idx in xrange(20000):
+                series.append('GET /sizes', idx % 100, error='http' if idx % 7 == 0 else None)
+
+        thread = threading.Thread(target=append)
+        thread.start()
+        while thread.is_alive():
+            ragged = series.ragged(['GET /sizes'])
+            self.assertEqual(len(ragged[0]), ragged.counts[0])
+        thread.join()
+        self.assertEqual(series.statistics()['GET /sizes']['count'], 3 + 20000 - 2858)
+
+    def test_cached_statistics(self):
+        """
+        Assert statistics are cached until their series is appended to
+        """
+        series = TimeSeries()
+        series.extend('GET /sizes', [10, 20, 30])
+        series.extend('GET /brands', [40])
+        first = series.statistics()
+        self.assertIs(series.summaries['GET /brands'][1], series.latency_summaries(['GET /brands'])['GET /brands'])
+
+        cached = series.summaries['GET /brands'][1]
+        series.append('GET /sizes', 60)
+        again  = series.statistics()
+        self.assertIs(series.summaries['GET /brands'][1], cached)
+        self.assertEqual(again['GET /sizes']['count'], 4)
+        self.assertEqual(series.mean('GET /sizes'), 30)
+        self.assertEqual(series.max('GET /sizes'), 60)
+        self.assertEqual(first['GET /sizes']['count'], 3)
+
+        series['GET /brands'] = Records()
+        self.assertEqual(series.statistics()['GET /brands']['count'], 0)
+        self.assertTrue(np.isnan(series.mean('GET /brands')))
+
+    def test_failure_rates(self):
+        """
+        Assert timeouts are excluded from latencies and reported as rates
+        """
+        series = TimeSeries(percentiles=(75,))
+        series.extend('GET /sizes', [10, 20, 30, -1])
+        series.append('GET /sizes', 5, error='connection')
+        series.elapsed['GET /sizes'] = 2.0
+
+        stats = series.statistics()['GET /sizes']
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['mean'], 20)
+        self.assertEqual(stats['min'], 10)
+        self.assertIn('p75', stats)
+        self.assertEqual(stats['throughput'], 1.5)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['connection_errors'], 1)
+        self.assertEqual(stats['timeout_rate'], 0.2)
+        self.assertEqual(stats['error_rate'], 0.2)
+
+    def test_tabelize(self):
+        """
+        Assert the table has a header row and a cell per column in every row
+        """
+        series = TimeSeries(percentiles=(50,))
+        series.extend('GET /sizes', [10, 20, 30])
+        series.extend('GET /brands', [40])
+        series.elapsed['GET /sizes'] = 2.0
+
+        rows = [line for line in series.tabelize().splitlines() if line.startswith('<tr>')]
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(rows[0].startswith('<tr><th>series'))
+        self.assertIn('<th>throughput</th>', rows[0])
+        self.assertEqual(len(set(len(row) for row in rows)), 1)
+        self.assertTrue(all(row.count('<t') == rows[0].count('<t') for row in rows))
+        self.assertTrue(any('<td></td>' in row.replace(' ', '') for row in rows[1:]))
+
+    def test_records(self):
+        """
+        Assert results are stored as structured records
+        """
+        series = TimeSeries()
+        series.append('GET /sizes', 12.5, start=1000.0, status=200, nbytes=4096)
+        series.append('GET /sizes', 30000, start=1001.0, error='timeout')
+        series.append('GET /sizes', 80.0, start=1002.0, status=503, nbytes=12, error='http')
+
+        records = series.records('GET /sizes')
+        self.assertEqual(records.dtype, RECORD)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records['status'].tolist(), [200, 0, 503])
+        self.assertEqual(records['bytes'][0], 4096)
+        self.assertEqual(series['GET /sizes'].tolist(), [12.5])
+        self.assertEqual(series.errors('GET /sizes')['http'], 1)
+
+    def test_side_series(self):
+        """
+        Assert phase and side series are kept apart from request series
+        """
+        series = TimeSeries()
+        series.extend('GET /sizes', [10, 20, 30])
+        series.extend(phase_label('GET /sizes', 'ttfb'), [1, 2, 3])
+        series.extend(phase_label('GET /sizes', '304'), [5])
+        series.extend(phase_label('checkout', 'journey'), [100])
+
+        self.assertEqual(list(series), ['GET /sizes', 'checkout [journey]'])
+        self.assertEqual(len(series), 2)
+        self.assertEqual(len(series.labels(sides=True)), 4)
+        self.assertIn('GET /sizes [ttfb]', series)
+        self.assertEqual(list(series.statistics()), ['GET /sizes', 'checkout [journey]'])
+        self.assertEqual(parent_label('GET /sizes [ttfb]'), 'GET /sizes')
+        self.assertIsNone(parent_label('GET /sizes'))
+
+        # Side series are still merged and saved with their requests
+        merged = TimeSeries().merge(series)
+        self.assertEqual(sorted(merged.labels(sides=True)), sorted(series.labels(sides=True)))
+
+        stream = StringIO()
+        series.dump(stream)
+        stream.seek(0)
+        self.assertEqual(len(TimeSeries.load(stream).labels(sides=True)), 4)
+
+    def test_records_dump(self):
+        """
+        Assert records round trip through dump and load
+        """
+        series = TimeSeries()
+        for idx in xrange(1000):
+            series.append('GET /sizes', idx, start=idx, status=200, nbytes=idx)
+        series.append('GET /sizes', 10, error='connection')
+
+        stream = StringIO()
+        series.dump(stream)
+        stream.seek(0)
+        loaded = TimeSeries.load(stream)
+
+        self.assertTrue(np.array_equal(loaded.records('GET /sizes')['bytes'],
+                                       series.records('GET /sizes')['bytes']))
+        self.assertEqual(loaded.errors('GET /sizes')['connection'], 1)
@@ -0,0 +1,195 @@
+# tests.store_tests
+# Tests for the binary results file format
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 15:40:19 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: store_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for the binary results file format
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+
+from drifter.store import *
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'phoenix-local.json')
+
+##########################################################################
+## Test case
+##########################################################################
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path   = os.path.join(self.tmpdir, "results.drift")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        """
+        Assert records, errors, elapsed and metadata round trip
+        """
+        series = read(FIXTURE)
+        series.append('GET /sizes', 30000, start=10.0, error='timeout')
+        series.elapsed['GET /sizes'] = 12.5
+        series.meta = {'runs': 100}
+        save(series, self.path)
+
+        loaded = read(self.path)
+        self.assertTrue(is_binary(self.path))
+        self.assertEqual(loaded.meta, {'runs': 100})
+        self.assertEqual(loaded.elapsed['GET /sizes'], 12.5)
+        self.assertEqual(loaded.errors('GET /sizes')['timeout'], 1)
+        series.extend('GET /sizes [ttfb]', [1.0, 2.0])
+        save(series, self.path)
+        loaded = read(self.path)
+        for label in series.labels(sides=True):
+            self.assertEqual(loaded.records(label).tostring(), series.records(label).tostring())
+        self.assertEqual(list(loaded), list(series))
+
+    def test_memory_mapped(self):
+        """
+        Assert binary records are memory-mapped views onto the file
+        """
+        save(read(FIXTURE), self.path)
+        loaded  = read(self.path)
+        records = loaded.records('GET /merchants')
+        self.assertIsInstance(records.base, np.memmap)
+
+        # Appending copies rather than writing into the mapped file
+        loaded.append('GET /merchants', 1.0)
+        self.assertEqual(len(loaded.records('GET /merchants')), 101)
+        self.assertEqual(len(read(self.path).records('GET /merchants')), 100)
+
+    def test_smaller_than_json(self):
+        """
+        Assert the binary format is smaller than the JSON export
+        """
+        series = read(FIXTURE)
+        save(series, self.path)
+
+        export = os.path.join(self.tmpdir, "results.json")
+        with open(export, 'w') as f:
+            series.dump(f)
+        self.assertLess(os.path.getsize(self.path), os.path.getsize(export))
+
+    def test_histograms(self):
+        """
+        Assert histogram results round trip
+        """
+        series = TimeSeries(histogram=True, precision=2).merge(read(FIXTURE))
+        save(series, self.path)
+        loaded = read(self.path)
+
+        self.assertTrue(loaded.histogram)
+        self.assertEqual(loaded.percentile('GET /sizes', 99), series.percentile('GET /sizes', 99))
+
+    def test_result_log(self):
+        """
+        Assert results streamed to a log are read back with their elapsed
+        """
+        series = TimeSeries()
+        series.sink = ResultLog(self.path, interval=60, capacity=64)
+        for idx in xrange(100):
+            series.append('GET /sizes', float(idx), start=float(idx))
+        series.append('GET /sizes', 30000, error='timeout')
+        series.sink.metadata(elapsed={'GET /sizes': 4.5})
+        series.sink.close()
+
+        loaded = read(self.path)
+        self.assertEqual(loaded.records('GET /sizes').tostring(), series.records('GET /sizes').tostring())
+        self.assertEqual(loaded.errors('GET /sizes')['timeout'], 1)
+        self.assertEqual(loaded.elapsed['GET /sizes'], 4.5)
+
+    def test_histogram_log(self):
+        """
+        Assert histogram runs keep raw records in the log, not in memory
+        """
+        series = TimeSeries(histogram=True)
+        series.sink = ResultLog(self.path, interval=60, series=series)
+        for idx in xrange(100):
+            series.append('GET /sizes', float(idx + 1), start=float(idx), nbytes=idx)
+        series.sink.close()
+
+        loaded = read(self.path)
+        self.assertFalse(loaded.histogram)
+        self.assertEqual(loaded.records('GET /sizes')['bytes'].tolist(), range(100))
+        self.assertAlmostEqual(loaded.mean('GET /sizes'), series.mean('GET /sizes'))
+
+    def test_log_writes(self):
+        """
+        Assert results are buffered while a flush is writing to disk
+        """
+        log = ResultLog(self.path, interval=60, capacity=10)
+        with log.writing:
+            thread = threading.Thread(target=log.write, args=('GET /sizes', np.zeros(5, dtype=RECORD)))
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+        log.write('GET /sizes', np.zeros(5, dtype=RECORD))
+        self.assertEqual(log.buffered, 0)
+        log.close()
+        self.assertEqual(len(read(self.path).records('GET /sizes')), 10)
+
+    def test_partial_log(self):
+        """
+        Assert a log with a partially written last block can be read
+        """
+        log = ResultLog(self.path, interval=60)
+        log.write('GET /sizes', np.zeros(10, dtype=RECORD))
+        log.flush()
+        log.write('GET /sizes', np.zeros(10, dtype=RECORD))
+        log.close()
+
+        # Truncate the file half way through the second block
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(size - 5 * RECORD.itemsize)
+        self.assertEqual(len(read(self.path).records('GET /sizes')), 10)
+
+    def test_aggregate(self):
+        """
+        Assert files of either layout aggregate into histograms
+        """
+        series = read(FIXTURE)
+        save(series, self.path)
+
+        for result in (aggregate(self.path, precision=2), aggregate(FIXTURE, precision=2)):
+            self.assertTrue(result.histogram)
+            self.assertEqual(len(result['GET /sizes']), len(series['GET /sizes']))
+            self.assertAlmostEqual(result.mean('GET /sizes'), series.mean('GET /sizes'))
+
+    def test_report(self):
+        """
+        Assert reports are strict JSON with missing statistics as null
+        """
+        path = os.path.join(self.tmpdir, "report.json")
+        write_report({'curve': [{'p99': float('nan'), 'mean': np.float64(12.5)}],
+                      'limit': None, 'rates': (np.float32('inf'), 2)}, path)
+
+        with open(path) as f:
+            report = json.load(f)
+        self.assertIsNone(report['curve'][0]['p99'])
+        self.assertEqual(report['curve'][0]['mean'], 12.5)
+        self.assertEqual(report['rates'], [None, 2])
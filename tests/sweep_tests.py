@@ -0,0 +1,83 @@
+# tests.sweep_tests
+# Tests for parameter sweeps and latency vs size fits
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sun Oct 19 03:05:48 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: sweep_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for parameter sweeps and latency vs size fits
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import unittest
+import numpy as np
+
+from drifter.sweep import *
+from drifter.runner import Runner
+from drifter.mock import MockServer
+
+##########################################################################
+## Test case
+##########################################################################
+
+class SweepTestCase(unittest.TestCase):
+
+    def test_grid(self):
+        """
+        Assert the grid holds every combination of the parameters
+        """
+        parameters = [parse_parameter("format=full,light"), parse_parameter("limit=10,100,1000")]
+        points     = grid(parameters)
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points[0], {'format': 'full', 'limit': '10'})
+        self.assertEqual(list(points[0].keys()), ['format', 'limit'])
+        self.assertRaises(ValueError, parse_parameter, "format")
+
+        requests = sweep_requests({'path': 'sizes', 'params': {'key': 'a'}}, parameters)
+        point, config = requests[-1]
+        self.assertEqual(config.name, "GET /sizes (format=light, limit=1000)")
+        self.assertEqual(config.params, {'key': 'a', 'format': 'light', 'limit': '1000'})
+
+    def test_fit(self):
+        """
+        Assert latency is fit linearly and as a power law of size
+        """
+        nbytes  = np.array([1024, 2048, 4096, 8192] * 10, dtype=np.float64)
+        latency = 5.0 + 2.0 * nbytes / 1024.0
+        fitted  = fit(nbytes, latency)
+        self.assertAlmostEqual(fitted['intercept'], 5.0)
+        self.assertAlmostEqual(fitted['slope'], 2.0)
+        self.assertAlmostEqual(fitted['r2'], 1.0)
+
+        fitted  = fit(nbytes, 3.0 * (nbytes / 1024.0) ** 0.5)
+        self.assertAlmostEqual(fitted['exponent'], 0.5)
+        self.assertTrue(np.isnan(fit([100, 100], [1, 2])['slope']))
+
+    def test_sweep(self):
+        """
+        Assert a sweep reports every point of the grid against the mock
+        """
+        server = MockServer(size=100000).start()
+        try:
+            requests = sweep_requests({'path': 'merchants'}, [('limit', ['10', '1000'])])
+            runner   = Runner(10, api_root=server.api_root, quiet=True)
+            runner.run([config for _, config in requests])
+        finally:
+            server.stop()
+
+        summary = report(runner.results, requests)
+        small, large = summary['points'].values()
+        self.assertEqual(small['count'], 10)
+        self.assertEqual(small['params'], {'limit': '10'})
+        self.assertGreater(large['kb'], 10 * small['kb'])
+        self.assertGreaterEqual(max(small['speedup'], large['speedup']), 1.0)
+        self.assertFalse(np.isnan(summary['fit']['slope']))
+        self.assertIn("Latency vs size", format_report(summary))
@@ -0,0 +1,94 @@
+# tests.template_tests
+# Tests for precompiled request templates
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 21:58:36 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: template_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for precompiled request templates
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import json
+import unittest
+
+from drifter.template import *
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+API_ROOT = "http://localhost:8000"
+
+##########################################################################
+## Test case
+##########################################################################
+
+class TemplateTestCase(unittest.TestCase):
+
+    def test_compiled(self):
+        """
+        Assert compiled strings substitute escaped values
+        """
+        compiled = Compiled("100% of {a} and {b}", {'a': 'x'}, quote_url)
+        self.assertEqual(compiled.fields, ('b',))
+        self.assertEqual(compiled.render({'b': 'y z&'}), "100% of x and y+z%26")
+        self.assertEqual(Compiled("no {a}", {'a': 1}).text, "no 1")
+
+    def test_static_template(self):
+        """
+        Assert templates without choices are prepared only once
+        """
+        template = RequestTemplate({'path': 'sizes', 'params': {'format': '{format}'}},
+                                   API_ROOT, 'key', {'format': 'light'})
+        self.assertTrue(template.static)
+        self.assertIs(template.prepare(), template.prepare())
+
+        url, headers, body = template.prepare()
+        self.assertEqual(url, API_ROOT + "/sizes?format=light")
+        self.assertEqual(headers, {'API-Key': 'key'})
+        self.assertIsNone(body)
+
+    def test_dynamic_template(self):
+        """
+        Assert per-request variables are substituted where they appear
+        """
+        request  = {
+            'method': 'post', 'path': 'users/{user}/items', 'params': {'q': '{user}'},
+            'headers': {'X-User': '{user}'}, 'body': {'note': 'by "{user}"', 'count': 1},
+        }
+        template = RequestTemplate(request, API_ROOT, variables={'user': ['a b', 'c"d']})
+        self.assertFalse(template.static)
+        self.assertEqual(template.method, 'POST')
+        self.assertEqual(template.name, 'POST /users/{user}/items')
+
+        url, headers, body = template.prepare(chooser=lambda values: values[1])
+        self.assertEqual(url, API_ROOT + '/users/c%22d/items?q=c%22d')
+        self.assertEqual(headers, {'X-User': 'c"d', 'content-type': 'application/json'})
+        self.assertEqual(json.loads(body), {'note': 'by "c"d"', 'count': 1})
+
+        url, _, _ = template.prepare(chooser=lambda values: values[0])
+        self.assertEqual(url, API_ROOT + '/users/a%20b/items?q=a+b')
+
+        # The chosen values label the request when asked
+        prepared = template.prepare(chooser=lambda values: values[0])
+        self.assertEqual(prepared.context, {'user': 'a b'})
+        self.assertEqual(prepared.url, url)
+        self.assertEqual(template.label(prepared.context, ['user']), 'POST /users/a b/items')
+        self.assertEqual(template.label(prepared.context, ['format']), template.name)
+        self.assertEqual(template.named, ['user'])
+        self.assertEqual(template.labels(['user']), ['POST /users/a b/items', 'POST /users/c"d/items'])
+
+        template = RequestTemplate({'name': 'GET /sizes', 'path': 'sizes', 'params': {'format': '{format}'}},
+                                   API_ROOT, variables={'format': ['light', 'full']})
+        self.assertEqual(template.label({'format': 'full'}, ['format']), 'GET /sizes (format=full)')
+        self.assertEqual(template.named, [])
+        self.assertEqual(template.labels([]), ['GET /sizes'])
@@ -0,0 +1,148 @@
+# tests.users_tests
+# Tests for virtual users following scripted flows
+#
+# Author:   Benjamin Bengfort <benjamin@bengfort.com>
+# Created:  Sat Oct 18 22:58:31 2026 -0400
+#
+# Copyright (C) 2014 Bengfort.com
+# For license information, see LICENSE.txt
+#
+# ID: users_tests.py [] benjamin@bengfort.com $
+
+"""
+Tests for virtual users following scripted flows
+"""
+
+##########################################################################
+## Imports
+##########################################################################
+
+import os
+import unittest
+import numpy as np
+
+from drifter.users import *
+from drifter.runner import Runner
+from drifter.scenario import ScenarioConfiguration
+from tests.distributed_tests import CannedServer, serve
+
+##########################################################################
+## Fixtures
+##########################################################################
+
+SCENARIO = {
+    'name': 'shoppers',
+    'think': 0.01,
+    'api_keys': ['one', 'two'],
+    'flows': [
+        {'name': 'browse', 'weight': 3, 'steps': [
+            {'name': 'categories', 'path': 'categories'},
+            {'name': 'sizes', 'path': 'sizes', 'think': {'distribution': 'uniform', 'max': 0.02}},
+        ]},
+        {'name': 'lookup', 'weight': 1, 'steps': [
+            {'name': 'sizes', 'path': 'sizes'},
+        ]},
+    ]
+}
+
+EXAMPLE  = os.path.join(os.path.dirname(__file__), '..', 'conf', 'scenarios', 'shoppers.yaml')
+
+##########################################################################
+## Test case
+##########################################################################
+
+class UsersTestCase(unittest.TestCase):
+
+    def test_think_time(self):
+        """
+        Assert think times are drawn from their distributions
+        """
+        random = np.random.RandomState(42)
+        self.assertEqual(think_time(None, random)(), 0.0)
+        self.assertEqual(think_time(2, random)(), 2.0)
+        self.assertEqual(think_time({'mean': 1.5}, random)(), 1.5)
+
+        draw  = think_time({'distribution': 'uniform', 'min': 1, 'max': 2}, random)
+        draws = [draw() for _ in xrange(1000)]
+        self.assertTrue(all(1 <= val < 2 for val in draws))
+
+        draw  = think_time({'distribution': 'exponential', 'mean': 2.0}, random)
+        self.assertAlmostEqual(np.mean([draw() for _ in xrange(10000)]), 2.0, delta=0.1)
+
+        draw  = think_time({'distribution': 'lognormal', 'median': 3.0, 'sigma': 0.5}, random)
+        self.assertAlmostEqual(np.median([draw() for _ in xrange(10000)]), 3.0, delta=0.1)
+
+        self.assertRaises(ValueError, think_time, {'distribution': 'pareto'}, random)
+
+    def test_load_flows(self):
+        """
+        Assert flows load from YAML with their steps
+        """
+        scenario = ScenarioConfiguration.load_file(EXAMPLE)
+        self.assertEqual([flow.name for flow in scenario.flows], ['browse', 'lookup'])
+        self.assertEqual(len(scenario.flows[0].steps), 3)
+        self.assertEqual(scenario.flows[0].steps[1].think['max'], 10)
+
+        clone = ScenarioConfiguration.deserialize(scenario.serialize())
+        self.assertEqual(clone.serialize(), scenario.serialize())
+
+    def test_engine(self):
+        """
+        Assert every user completes its journeys through the flows
+        """
+        scenario = ScenarioConfiguration.deserialize(SCENARIO)
+        server   = serve(CannedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(1, api_root=root, concurrency=4, quiet=True)
+            runner.users(scenario, users=10, journeys=3, ramp_up=0.05, seed=1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        results  = runner.results
+        browse   = len(results['browse [journey]'])
+        lookup   = len(results['lookup [journey]'])
+        self.assertEqual(browse + lookup, 30)
+        self.assertGreater(browse, lookup)
+        self.assertEqual(len(results['browse / categories']), browse)
+        self.assertEqual(len(results['browse / sizes']), browse)
+        self.assertEqual(len(results['lookup / sizes']), lookup)
+
+        # Journeys sum the latencies of their steps
+        journeys = results.records('browse [journey]')
+        self.assertTrue((journeys['latency'] > 0).all())
+        self.assertTrue((journeys['error'] == 0).all())
+
+    def test_workers(self):
+        """
+        Assert users get a worker each unless bounded and flag queued steps
+        """
+        scenario = ScenarioConfiguration.deserialize(SCENARIO)
+        self.assertEqual(UserEngine(Runner(1, quiet=True), scenario, users=25, journeys=1).workers, 25)
+        self.assertEqual(UserEngine(Runner(1, concurrency=3, quiet=True), scenario, users=25, journeys=1).workers, 3)
+
+        server = serve(CannedServer())
+        try:
+            root   = "http://127.0.0.1:%i" % server.server_address[1]
+            runner = Runner(1, api_root=root, quiet=True)
+            runner.users(scenario, users=10, journeys=1, seed=1)
+            self.assertEqual(runner.late, 0.0)
+
+            # Ten users starting at once queue for a single worker
+            runner = Runner(1, api_root=root, concurrency=1, quiet=True)
+            runner.users(scenario, users=10, journeys=1, seed=1)
+            self.assertGreater(runner.late, 0.5)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_requires_flows(self):
+        """
+        Assert the engine needs flows and a way to end the run
+        """
+        runner   = Runner(1, quiet=True)
+        scenario = ScenarioConfiguration.deserialize({'requests': [{'path': 'sizes'}]})
+        self.assertRaises(ValueError, UserEngine, runner, scenario, journeys=1)
+        scenario = ScenarioConfiguration.deserialize(SCENARIO)
+        self.assertRaises(ValueError, UserEngine, runner, scenario)